@@ -0,0 +1,406 @@
+"""
+ASGI entry point for the backend.
+
+Serve it with any ASGI server, e.g.:
+
+    pip install uvicorn
+    uvicorn asgi:app --workers 2
+
+The hottest routes are served natively with the async Supabase client, so
+one worker keeps many requests in flight while their database and storage
+calls are outstanding, and independent calls within a request run
+concurrently:
+
+    GET  /accounts
+    GET  /user-info
+    GET  /bootstrap
+    POST /upload-profile-picture
+
+Every other route is passed to the Flask app, which runs on a bounded
+thread pool (ASGI_WSGI_THREADS). Responses are the same as the Flask
+handlers'; vercel_wrapper.py and run_flask.py keep serving WSGI.
+"""
+
+import asyncio
+import contextvars
+import io
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
+from werkzeug.formparser import parse_form_data
+from werkzeug.wrappers import Response
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+from flask_app import app as flask_app
+from controllers.account_controller import ACCOUNT_LIST_COLUMNS, account_list_fallback, account_list_reads, normalize_account_images
+from controllers.bootstrap_controller import ACCOUNT_COLUMNS, USER_COLUMNS, build_bootstrap_payload
+from controllers.user_controller import USER_INFO_COLUMNS, normalize_profile_picture, user_info_fallback, user_info_reads
+from middleware.auth import decode_token, parse_bearer_token
+from repositories import AccountRepository, ItemRepository, UserRepository, store as sync_store
+from repositories.async_store import create_async_store
+from supabase_client import get_async_supabase_client
+from utils.instrumentation import REQUEST_DURATION, REQUESTS
+from utils.resilience import CircuitOpenError, is_dependency_failure, stale_headers
+from utils.serialization import JSON, encode_compact_accounts, negotiate_accounts_format
+from utils.storage_paths import PROFILE_PICTURE_PREFIX, object_key, upload_key
+from utils.supabase_storage import IMAGE_TYPES_MESSAGE, delete_file_from_supabase_async, detect_content_type, upload_file_to_supabase_async
+from utils.tokens import cache_token_version, cached_token_version, token_version_reads
+
+logger = logging.getLogger(__name__)
+
+_wsgi_executor = ThreadPoolExecutor(max_workers=Config.ASGI_WSGI_THREADS, thread_name_prefix='asgi-wsgi')
+_backend = {}
+_backend_lock = asyncio.Lock()
+
+class AsgiRequest:
+    """
+    The parts of an ASGI HTTP request the native handlers need.
+    """
+    def __init__(self, scope, body):
+        self.method = scope['method']
+        self.path = scope['path']
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        self.body = body
+
+    def files(self):
+        """
+        Parse a multipart body into werkzeug FileStorage objects.
+        """
+        environ = {
+            'REQUEST_METHOD': self.method,
+            'CONTENT_TYPE': self.headers.get('content-type', ''),
+            'CONTENT_LENGTH': str(len(self.body)),
+            'wsgi.input': io.BytesIO(self.body)
+        }
+        _, _, files = parse_form_data(environ)
+        return files
+
+async def get_backend():
+    """
+    Create the async client and repositories once, inside the serving loop.
+    """
+    if not _backend:
+        async with _backend_lock:
+            if not _backend:
+                client = await get_async_supabase_client()
+                store = create_async_store(client, sync_store)
+                _backend.update(client=client, store=store, users=UserRepository(store), accounts=AccountRepository(store), items=ItemRepository(store))
+    return _backend
+
+def error(status, message):
+    return status, {'success': False, 'message': message}
+
+def encode_headers(headers):
+    return [(name.lower().encode('latin-1'), str(value).encode('latin-1')) for name, value in headers.items()]
+
+async def authenticate(request, backend):
+    """
+    Async counterpart of middleware.auth.authenticate_token.
+
+    Returns:
+        tuple: (user dict, None) or (None, (status, payload)) on failure
+    """
+    token = parse_bearer_token(request.headers.get('authorization'))
+    if not token:
+        return None, error(401, 'Access token required.')
+
+    try:
+        claims = decode_token(token)
+    except jwt.ExpiredSignatureError:
+        return None, error(403, 'Token has expired. Please log in again.')
+    except jwt.InvalidTokenError:
+        return None, error(403, 'Invalid token. Please log in again.')
+
+    token_version = cached_token_version(claims['id'])
+    if token_version is None:
+        try:
+            response = await token_version_reads.do_async(
+                (claims['id'], 'token_version'), backend['users'].get_by_id, claims['id'], 'token_version'
+            )
+        except Exception as err:
+            # An unverified token version is not trusted (the token may be revoked)
+            if not (isinstance(err, CircuitOpenError) or is_dependency_failure(err)):
+                raise
+            logger.error("authenticate: %s", err)
+            return None, error(503, 'Authentication is temporarily unavailable. Please try again shortly.')
+        if response.error:
+            logger.error("authenticate: DB Error during token validation for request to: %s, Error: %s", request.path, response.error)
+            return None, error(500, 'An error occurred during token validation.')
+        if response.data:
+            token_version = response.data[0].get('token_version') or 0
+            cache_token_version(claims['id'], token_version)
+
+    if token_version is None or token_version != claims.get('token_version', 0):
+        return None, error(403, 'Invalid token. Please log in again.')
+
+    return {'id': claims['id'], 'email': claims['email']}, None
+
+async def get_accounts(request, user, backend):
+    try:
+        response, stale_age = await account_list_fallback.get_async(
+            user['id'], account_list_reads.do_async, user['id'], backend['accounts'].list_for_user, user['id'], ACCOUNT_LIST_COLUMNS
+        )
+    except CircuitOpenError as err:
+        logger.error("/accounts: %s", err)
+        return error(503, 'Accounts are temporarily unavailable. Please try again shortly.')
+    if response.error:
+        logger.error("/accounts: DB Error reading accounts: %s", response.error)
+        return error(500, 'Error reading accounts.')
+    accounts = normalize_account_images(response.data)
+    vary = [(b'vary', b'Accept')] + encode_headers(stale_headers(stale_age) if stale_age is not None else {})
+
+    media_type = negotiate_accounts_format(request.headers.get('accept'))
+    if media_type != JSON:
+        body, content_type = encode_compact_accounts(accounts, media_type, flask_app.json.dumps)
+        return 200, body, [(b'content-type', content_type.encode())] + vary
+    return 200, {
+        'success': True,
+        'message': 'Accounts retrieved successfully!',
+        'accounts': accounts
+    }, vary
+
+async def get_user_info(request, user, backend):
+    try:
+        response, stale_age = await user_info_fallback.get_async(
+            user['id'], user_info_reads.do_async, user['id'], backend['users'].get_by_id, user['id'], USER_INFO_COLUMNS
+        )
+    except CircuitOpenError as err:
+        logger.error("getUserInfo: %s", err)
+        return error(503, 'User information is temporarily unavailable. Please try again shortly.')
+    if response.error:
+        logger.error("Error in getUserInfo - Supabase query failed: %s", response.error)
+        return error(500, 'An error occurred while fetching user information.')
+    if not response.data:
+        return error(404, 'User not found.')
+    user_data = response.data[0]
+    user_data['profilepicture'] = normalize_profile_picture(user_data.get('profilepicture'))
+    return 200, {'success': True, 'user': user_data}, encode_headers(stale_headers(stale_age) if stale_age is not None else {})
+
+async def get_bootstrap(request, user, backend):
+    page_size = Config.BOOTSTRAP_ACCOUNTS_PAGE_SIZE
+    user_result, accounts, items = await asyncio.gather(
+        backend['users'].get_by_id(user['id'], USER_COLUMNS),
+        backend['accounts'].list_for_user(user['id'], ACCOUNT_COLUMNS, page_size + 1),
+        backend['items'].list_for_user(user['id'])
+    )
+    payload, status = build_bootstrap_payload(user_result, accounts, items, page_size)
+    return status, payload
+
+async def upload_profile_picture(request, user, backend):
+    """
+    Same contract as user_controller.upload_profile_picture, with the
+    current-picture lookup running alongside the upload. The old picture is
+    only deleted once the row points at the new one.
+    """
+    files = request.files()
+    if 'profilePicture' not in files:
+        return error(400, 'No file uploaded.')
+
+    file = files['profilePicture']
+    user_id = user['id']
+    content = file.read()
+    content_type = detect_content_type(content)
+    if content_type is None:
+        return error(415, IMAGE_TYPES_MESSAGE)
+    file_name = upload_key(PROFILE_PICTURE_PREFIX, user_id, content_type)
+    client = backend['client']
+
+    current, upload = await asyncio.gather(
+        backend['users'].get_by_id(user_id, 'profilepicture'),
+        upload_file_to_supabase_async(client, content, file_name, 'images', content_type),
+        return_exceptions=True
+    )
+
+    if isinstance(current, Exception) or current.error or not current.data:
+        # The lookup failed after the upload went through; do not leave it orphaned
+        if not upload['error']:
+            await delete_file_from_supabase_async(client, file_name, 'images')
+        if isinstance(current, Exception):
+            raise current
+        if current.error:
+            logger.error(current.error)
+            return error(500, 'Error fetching current user data.')
+        return error(404, 'User not found.')
+
+    if upload['error']:
+        logger.error("Error uploading profile picture to Supabase Storage: %s", upload['error'])
+        return error(500, upload['error'])
+
+    # Default pictures have no key and are never deleted
+    old_file_path = object_key(current.data[0].get('profilepicture'))
+
+    try:
+        update = await backend['users'].update(user_id, {'profilepicture': file_name})
+    except Exception:
+        await delete_file_from_supabase_async(client, file_name, 'images')
+        raise
+
+    if update.error:
+        logger.error("Error updating profile picture in DB: %s", update.error)
+        await delete_file_from_supabase_async(client, file_name, 'images')
+        return error(500, 'Error saving profile picture.')
+
+    # The row no longer references the previous picture
+    if old_file_path and old_file_path != file_name:
+        delete_result = await delete_file_from_supabase_async(client, old_file_path, 'images')
+        if delete_result['error']:
+            logger.error("Error deleting old profile picture from Supabase Storage: %s", delete_result['error'])
+
+    return 200, {
+        'success': True,
+        'message': 'Profile picture updated successfully!',
+        'profilepicture': normalize_profile_picture(file_name)
+    }
+
+# (method, path) -> handler for the routes served natively
+ROUTES = {
+    ('GET', '/accounts'): get_accounts,
+    ('GET', '/user-info'): get_user_info,
+    ('GET', '/bootstrap'): get_bootstrap,
+    ('POST', '/upload-profile-picture'): upload_profile_picture
+}
+
+async def read_body(receive):
+    chunks = []
+    more_body = True
+    while more_body:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        more_body = message.get('more_body', False)
+    return b''.join(chunks)
+
+async def send_response(send, status, headers, body):
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def handle_native(handler, route, request, send):
+    start = time.perf_counter()
+    try:
+        backend = await get_backend()
+        user, failure = await authenticate(request, backend)
+        result = failure or await handler(request, user, backend)
+    except Exception as err:
+        logger.error("Error in %s %s: %s", request.method, route, err)
+        result = error(500, 'An unexpected error occurred.')
+
+    # Handlers return (status, payload) or (status, payload, headers); a bytes
+    # payload is an already-encoded body whose headers carry the content type
+    status, payload = result[0], result[1]
+    headers = list(result[2]) if len(result) > 2 else []
+    if isinstance(payload, bytes):
+        body = payload
+    else:
+        body = flask_app.json.dumps_bytes(payload)
+        headers.append((b'content-type', b'application/json'))
+    headers.append((b'content-length', str(len(body)).encode()))
+    if 'origin' in request.headers:
+        headers.append((b'access-control-allow-origin', b'*'))
+    await send_response(send, status, headers, body)
+
+    REQUEST_DURATION.observe(time.perf_counter() - start, request.method, route)
+    REQUESTS.inc(request.method, route, status)
+
+def wsgi_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'],
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'CONTENT_LENGTH': str(len(body)),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': 'HTTP/' + scope.get('http_version', '1.1'),
+        'REMOTE_ADDR': (scope.get('client') or ('', 0))[0],
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'CONTENT_LENGTH':
+            key = 'HTTP_' + name
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def run_wsgi(environ):
+    """
+    Run the Flask app for one request.
+
+    Returns (status, headers, body, None) for a complete response, or
+    (status, headers, None, response) for a streamed one (no Content-Length,
+    e.g. the exports), whose chunks are read later by send_stream.
+    """
+    response = Response.from_app(flask_app, environ)
+    headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.headers.items()]
+    if 'Content-Length' in response.headers:
+        return response.status_code, headers, response.get_data(), None
+    return response.status_code, headers, None, response
+
+async def send_stream(send, status, headers, context, response):
+    loop = asyncio.get_running_loop()
+    chunks = iter(response.response)
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    try:
+        while True:
+            chunk = await loop.run_in_executor(_wsgi_executor, context.run, next, chunks, None)
+            if chunk is None:
+                break
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        await loop.run_in_executor(_wsgi_executor, context.run, response.close)
+
+async def handle_wsgi(scope, body, send):
+    loop = asyncio.get_running_loop()
+    # The request and every chunk of a streamed body run in this one context,
+    # whichever pool thread picks them up, so stream_with_context still has
+    # its request context and Flask's context tokens reset where they were set
+    context = contextvars.copy_context()
+    status, headers, response_body, streamed = await loop.run_in_executor(
+        _wsgi_executor, context.run, run_wsgi, wsgi_environ(scope, body)
+    )
+    if streamed is None:
+        await send_response(send, status, headers, response_body)
+    else:
+        await send_stream(send, status, headers, context, streamed)
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                await get_backend()
+            except Exception as err:
+                logger.error("ASGI startup failed to create the async backend: %s", err)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    body = await read_body(receive)
+    route = (scope['method'], scope['path'])
+    handler = ROUTES.get(route)
+    if handler is None:
+        return await handle_wsgi(scope, body, send)
+    return await handle_native(handler, scope['path'], AsgiRequest(scope, body), send)
@@ -0,0 +1,137 @@
+"""
+Compare how many concurrent requests the WSGI and ASGI paths sustain.
+
+Both paths serve GET /accounts from the local Supabase stand-in with a
+simulated round-trip latency (LOCAL_SUPABASE_LATENCY_MS, default 20), so
+throughput is bounded by how many requests can wait on I/O at once:
+
+    wsgi   the Flask app on a pool of --threads threads, like one threaded
+           WSGI worker (gunicorn --threads N, waitress)
+    asgi   asgi.app on a single event loop, like one uvicorn worker
+
+Requests are driven in-process (no sockets), so the numbers isolate the
+serving model rather than the HTTP server.
+
+Usage:
+    python benchmarks/bench_concurrency.py
+    python benchmarks/bench_concurrency.py --threads 8 --concurrency 1 16 64 256 --requests 1000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOCAL_SUPABASE_DB', ':memory:')
+os.environ.setdefault('LOCAL_SUPABASE_LATENCY_MS', '20')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def summarize(latencies, elapsed):
+    latencies.sort()
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+def setup_user():
+    """
+    Sign up and log in through the Flask app, returning a bearer token.
+    """
+    from flask_app import app
+
+    client = app.test_client()
+    credentials = {'email': 'bench@example.com', 'password': 'bench-password'}
+    client.post('/signup', json=dict(credentials, confirmPassword=credentials['password'], name='Bench'))
+    token = client.post('/login', json=credentials).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+    for i in range(20):
+        client.post('/accounts', json={'site': f'https://site{i}.example.com/', 'username': 'user', 'password': 'secret'}, headers=headers)
+    return token
+
+def run_wsgi(token, threads, concurrency, requests):
+    """
+    At most `threads` requests are served at once; other clients wait for a
+    free thread, and that wait counts towards their latency.
+    """
+    from flask_app import app
+
+    worker_threads = threading.BoundedSemaphore(threads)
+
+    def call(_):
+        start = time.perf_counter()
+        with worker_threads:
+            response = app.test_client().get('/accounts', headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 200, response.status_code
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as clients:
+        start = time.perf_counter()
+        latencies = list(clients.map(call, range(requests)))
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed)
+
+async def _asgi_get(app, path, token):
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'authorization', f'Bearer {token}'.encode())]
+    }
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    return sent[0]['status']
+
+def run_asgi(token, concurrency, requests):
+    from asgi import app
+
+    async def main():
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def call():
+            async with semaphore:
+                start = time.perf_counter()
+                status = await _asgi_get(app, '/accounts', token)
+                assert status == 200, status
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(call() for _ in range(requests)))
+        return summarize(latencies, time.perf_counter() - start)
+
+    return asyncio.run(main())
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare WSGI and ASGI concurrency capacity.')
+    parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32, 128], help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=400, help='Requests per measurement')
+    args = parser.parse_args()
+
+    token = setup_user()
+    latency_ms = float(os.environ['LOCAL_SUPABASE_LATENCY_MS'])
+    print(f"GET /accounts, simulated Supabase latency {latency_ms:.0f} ms, WSGI threads {args.threads}")
+    print(f"{'concurrency':>12}{'wsgi rps':>12}{'wsgi p99':>12}{'asgi rps':>12}{'asgi p99':>12}")
+    for concurrency in args.concurrency:
+        wsgi = run_wsgi(token, args.threads, concurrency, args.requests)
+        asgi = run_asgi(token, concurrency, args.requests)
+        print(f"{concurrency:>12}{wsgi['rps']:>12.0f}{wsgi['p99_ms']:>10.1f}ms{asgi['rps']:>12.0f}{asgi['p99_ms']:>10.1f}ms")
+
+if __name__ == "__main__":
+    main()
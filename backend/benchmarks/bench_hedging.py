@@ -0,0 +1,66 @@
+"""
+Tail latency of PostgREST selects with and without hedged reads.
+
+Selects go through supabase_client.InstrumentedClient to the local stand-in,
+where every call takes --latency ms except a --slow-rate share that takes
+--slow ms, independently per call, like a replica or connection having a
+bad moment. Reports latency percentiles and the extra load hedging adds.
+
+Usage:
+    python benchmarks/bench_hedging.py
+    python benchmarks/bench_hedging.py --reads 2000 --slow-rate 0.02 --slow 300
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOCAL_SUPABASE_DB', ':memory:')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare select latency with and without hedging.')
+    parser.add_argument('--reads', type=int, default=1000, help='Selects per run')
+    parser.add_argument('--latency', type=float, default=5, help='Normal call latency (ms)')
+    parser.add_argument('--slow', type=float, default=200, help='Slow call latency (ms)')
+    parser.add_argument('--slow-rate', type=float, default=0.03, help='Share of slow calls')
+    args = parser.parse_args()
+
+    from config import Config
+    from local_supabase import LocalFaults, LocalSupabaseClient
+    from supabase_client import SUPABASE_REQUESTS, InstrumentedClient
+    from utils.hedging import HEDGED_REQUESTS
+
+    faults = LocalFaults(latency=args.latency / 1000, slow_rate=args.slow_rate, slow_latency=args.slow / 1000)
+    local = LocalSupabaseClient(':memory:', faults=faults)
+    client = InstrumentedClient(local)
+    faults.latency = 0
+    local.table('accounts').insert({'site': 'a.com', 'user_id': 1}).execute()
+    faults.latency = args.latency / 1000
+
+    print(f"{args.reads} selects, {args.latency:.0f} ms normally, {args.slow_rate:.0%} take {args.slow:.0f} ms")
+    print(f"{'hedging':<9}{'p50 ms':>8}{'p95 ms':>8}{'p99 ms':>8}{'max ms':>8}{'extra load':>12}{'won':>6}")
+    for hedged in (False, True):
+        Config.HEDGED_READS = hedged
+        attempts = SUPABASE_REQUESTS.value('accounts', 'select', 'ok')
+        won = HEDGED_REQUESTS.value('accounts:id', 'won')
+        latencies = []
+        for _ in range(args.reads):
+            start = time.perf_counter()
+            client.table('accounts').select('id').eq('user_id', 1).execute()
+            latencies.append(time.perf_counter() - start)
+        # Let losing hedges finish so they are counted
+        time.sleep(args.slow / 1000)
+        extra = (SUPABASE_REQUESTS.value('accounts', 'select', 'ok') - attempts) / args.reads - 1
+        latencies.sort()
+        print(f"{'on' if hedged else 'off':<9}{percentile(latencies, 0.5) * 1000:>8.1f}{percentile(latencies, 0.95) * 1000:>8.1f}"
+              f"{percentile(latencies, 0.99) * 1000:>8.1f}{latencies[-1] * 1000:>8.1f}{extra:>11.1%}"
+              f"{HEDGED_REQUESTS.value('accounts:id', 'won') - won:>6.0f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Response encoding time for large GET /accounts and GET /read payloads.
+
+Compares Flask's stock JSON provider with utils/json_provider.py on the
+standard library and on orjson, building the full response as jsonify
+does. Item rows carry a created_at datetime, as rows read through the
+direct SQL backend do.
+
+Usage:
+    python benchmarks/bench_json.py
+    python benchmarks/bench_json.py --sizes 1000 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOCAL_SUPABASE_DB', ':memory:')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from bench_hot_paths import make_accounts
+
+def make_items(rows):
+    created = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [{
+        'id': i,
+        'name': f'Item {i}',
+        'description': f'Description of item {i}, long enough to look like a note.',
+        'user_id': i % 50,
+        'created_at': created + timedelta(seconds=i)
+    } for i in range(rows)]
+
+def time_per_call(fn, min_time=0.3):
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare JSON providers on large responses.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='Rows per response')
+    args = parser.parse_args()
+
+    from flask.json.provider import DefaultJSONProvider
+    from flask_app import app
+    from utils.json_provider import FastJSONProvider, orjson
+
+    providers = {
+        'flask': DefaultJSONProvider(app),
+        'stdlib': FastJSONProvider(app, use_orjson=False)
+    }
+    if orjson is not None:
+        providers['orjson'] = FastJSONProvider(app, use_orjson=True)
+    else:
+        print("orjson is not installed; skipping it (pip install orjson)\n")
+
+    payloads = {
+        '/accounts': lambda rows: {'success': True, 'message': 'Accounts retrieved successfully!', 'accounts': make_accounts(rows)},
+        '/read': lambda rows: {'success': True, 'items': make_items(rows)}
+    }
+
+    print(f"{'route':<10}{'rows':>7}{'provider':>10}{'bytes':>11}{'encode':>12}{'speedup':>9}")
+    with app.app_context():
+        for route, build in payloads.items():
+            for size in args.sizes:
+                payload = build(size)
+                baseline = None
+                for name, provider in providers.items():
+                    body = provider.response(payload).get_data()
+                    encode_time = time_per_call(lambda: provider.response(payload))
+                    baseline = baseline or encode_time
+                    print(f"{route:<10}{size:>7}{name:>10}{len(body):>11}{encode_time * 1e6:>10.0f}us{baseline / encode_time:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark the per-request logging overhead of GET /accounts.
+
+Compares the statements the request used to emit (eager f-strings at INFO,
+including the full account list) with the current ones (%-style arguments,
+DEBUG/sampled hot-path lines, JSON output). Both write to a null stream so
+only formatting cost is measured.
+
+Usage:
+    python benchmarks/bench_logging.py [--rows 200] [--iterations 2000]
+"""
+
+import argparse
+import io
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logging_config import JsonFormatter, RequestIdFilter, log_sampled
+
+def make_logger(name, formatter):
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = logging.StreamHandler(io.StringIO())
+    handler.addFilter(RequestIdFilter())
+    handler.setFormatter(formatter)
+    logger.handlers = [handler]
+    return logger, handler
+
+def make_accounts(rows):
+    return [{
+        'id': i,
+        'site': f'https://site{i}.example.com/',
+        'username': f'user{i}',
+        'password': f'secret{i}',
+        'image': 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png'
+    } for i in range(rows)]
+
+def legacy_request(logger, accounts, token, path, user):
+    logger.info(f"authenticateToken: Incoming request to: {path}")
+    logger.info(f"authenticateToken: Incoming token: {token[:10] + '...' if token else 'No token'}")
+    logger.info(f"authenticateToken: JWT verified for user: {user.get('email')}, ID: {user.get('id')}")
+    logger.info(f"authenticateToken: Token successfully validated in DB for user: {user['email']}, Request to: {path}")
+    logger.info(f"/accounts: Request received for user ID: {user['id']}")
+    logger.info(f"/accounts: Raw accounts data: {accounts}")
+    logger.info(f"/accounts: Processed accounts data: {accounts}")
+    logger.info(f"/accounts: Successfully retrieved accounts for user ID: {user['id']}, Count: {len(accounts)}")
+
+def current_request(logger, accounts, token, path, user):
+    log_sampled(logger, logging.DEBUG, "authenticateToken: Token successfully validated for user: %s, Request to: %s", user['email'], path)
+    logger.debug("/accounts: Request received for user ID: %s", user['id'])
+    logger.debug("/accounts: Successfully retrieved accounts for user ID: %s, Count: %s", user['id'], len(accounts))
+
+def run(rows, iterations):
+    accounts = make_accounts(rows)
+    token = 'eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.payload.signature'
+    user = {'id': 1, 'email': 'user@example.com'}
+    path = '/accounts'
+
+    legacy_logger, legacy_handler = make_logger('bench.legacy', logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+    current_logger, current_handler = make_logger('bench.current', JsonFormatter())
+
+    legacy = timeit.timeit(lambda: legacy_request(legacy_logger, accounts, token, path, user), number=iterations)
+    current = timeit.timeit(lambda: current_request(current_logger, accounts, token, path, user), number=iterations)
+
+    legacy_bytes = legacy_handler.stream.tell() / iterations
+    current_bytes = current_handler.stream.tell() / iterations
+
+    print(f"GET /accounts logging overhead ({rows} rows, {iterations} iterations)")
+    print(f"  legacy : {legacy / iterations * 1e6:10.1f} us/request  {legacy_bytes:10.0f} bytes/request")
+    print(f"  current: {current / iterations * 1e6:10.1f} us/request  {current_bytes:10.0f} bytes/request")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark per-request logging overhead.')
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    run(args.rows, args.iterations)
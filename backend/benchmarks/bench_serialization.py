@@ -0,0 +1,67 @@
+"""
+Payload size and encoding time for the GET /accounts response formats.
+
+Compares the default list-of-objects JSON with the columnar JSON and
+MessagePack representations from utils/serialization.py, raw and gzipped,
+for vaults of increasing size. Encoding goes through the app's JSON
+provider, as in the controller.
+
+Usage:
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --sizes 100 10000
+"""
+
+import argparse
+import gzip
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+from bench_hot_paths import make_accounts
+
+def time_per_call(fn, min_time=0.2):
+    fn()
+    calls = 0
+    start = time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure /accounts payload formats.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000], help='Accounts per response')
+    args = parser.parse_args()
+
+    from controllers.account_controller import normalize_account_images
+    from flask_app import app
+    from utils.serialization import COLUMNAR_JSON, MSGPACK, encode_compact_accounts, msgpack
+
+    dumps = app.json.dumps
+    formats = {
+        'json': lambda accounts: dumps({'success': True, 'message': 'Accounts retrieved successfully!', 'accounts': accounts}, separators=(',', ':')).encode(),
+        'columnar': lambda accounts: encode_compact_accounts(accounts, COLUMNAR_JSON, dumps)[0]
+    }
+    if msgpack is not None:
+        formats['msgpack'] = lambda accounts: encode_compact_accounts(accounts, MSGPACK, dumps)[0]
+    else:
+        print("msgpack is not installed; skipping MessagePack (pip install msgpack)\n")
+
+    print(f"{'accounts':>9}{'format':>10}{'bytes':>11}{'gzip':>9}{'vs json':>9}{'encode':>12}")
+    for size in args.sizes:
+        accounts = normalize_account_images(make_accounts(size))
+        baseline = None
+        for name, encode in formats.items():
+            body = encode(accounts)
+            baseline = baseline or len(body)
+            encode_time = time_per_call(lambda: encode(accounts))
+            print(f"{size:>9}{name:>10}{len(body):>11}{len(gzip.compress(body)):>9}"
+                  f"{len(body) / baseline:>8.0%}{encode_time * 1e6:>10.0f}us")
+
+if __name__ == "__main__":
+    main()
@@ -9,9 +9,72 @@ class Config:
     SUPABASE_URL = os.environ.get('SUPABASE_URL') or ''
     SUPABASE_KEY = os.environ.get('SUPABASE_KEY') or ''
     
+    # Local stand-in (SQLite path or ':memory:'); when set, SUPABASE_URL/KEY are ignored
+    LOCAL_SUPABASE_DB = os.environ.get('LOCAL_SUPABASE_DB') or ''
+    # Simulated round-trip latency for the stand-in (milliseconds)
+    LOCAL_SUPABASE_LATENCY_MS = float(os.environ.get('LOCAL_SUPABASE_LATENCY_MS') or 0)
+    # Fault injection for the stand-in: share of calls that fail, and of calls that take LOCAL_SUPABASE_SLOW_MS
+    LOCAL_SUPABASE_ERROR_RATE = float(os.environ.get('LOCAL_SUPABASE_ERROR_RATE') or 0)
+    LOCAL_SUPABASE_SLOW_RATE = float(os.environ.get('LOCAL_SUPABASE_SLOW_RATE') or 0)
+    LOCAL_SUPABASE_SLOW_MS = float(os.environ.get('LOCAL_SUPABASE_SLOW_MS') or 0)
+    
+    # Timeouts (seconds): PostgREST reads and writes, Storage calls, SMTP socket operations
+    SUPABASE_READ_TIMEOUT = float(os.environ.get('SUPABASE_READ_TIMEOUT') or 5.0)
+    SUPABASE_WRITE_TIMEOUT = float(os.environ.get('SUPABASE_WRITE_TIMEOUT') or 10.0)
+    STORAGE_TIMEOUT = float(os.environ.get('STORAGE_TIMEOUT') or 20.0)
+    SMTP_TIMEOUT = float(os.environ.get('SMTP_TIMEOUT') or 10.0)
+    
+    # Hedged PostgREST selects (utils/hedging.py): opt-in; a second copy is sent after the
+    # HEDGE_PERCENTILE latency, for at most HEDGE_BUDGET of reads
+    HEDGED_READS = (os.environ.get('HEDGED_READS') or 'false').lower() == 'true'
+    HEDGE_PERCENTILE = float(os.environ.get('HEDGE_PERCENTILE') or 0.95)
+    HEDGE_BUDGET = float(os.environ.get('HEDGE_BUDGET') or 0.05)
+    HEDGE_BURST = int(os.environ.get('HEDGE_BURST') or 10)
+    HEDGE_MIN_DELAY_MS = float(os.environ.get('HEDGE_MIN_DELAY_MS') or 5)
+    HEDGE_MIN_SAMPLES = int(os.environ.get('HEDGE_MIN_SAMPLES') or 20)
+    HEDGE_THREADS = int(os.environ.get('HEDGE_THREADS') or 16)
+    
+    # Circuit breakers (utils/resilience.py): consecutive failures that open one, seconds before a trial call
+    CIRCUIT_FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD') or 5)
+    CIRCUIT_RESET_TIMEOUT = float(os.environ.get('CIRCUIT_RESET_TIMEOUT') or 30.0)
+    # Last good /accounts and /user-info results served while Supabase is unavailable
+    STALE_MAX_AGE = float(os.environ.get('STALE_MAX_AGE') or 300)
+    STALE_MAX_ENTRIES = int(os.environ.get('STALE_MAX_ENTRIES') or 1000)
+    
+    # Data backend: 'supabase' (PostgREST) or 'sql' (direct Postgres via DATABASE_URL)
+    DATA_BACKEND = (os.environ.get('DATA_BACKEND') or 'supabase').lower()
+    DATABASE_URL = os.environ.get('DATABASE_URL') or ''
+    DATABASE_POOL_MIN_SIZE = int(os.environ.get('DATABASE_POOL_MIN_SIZE') or 1)
+    DATABASE_POOL_MAX_SIZE = int(os.environ.get('DATABASE_POOL_MAX_SIZE') or 10)
+    
+    # Storage uploads: Cache-Control max-age for uploaded objects (keys are never
+    # reused, so they are immutable) and optional signed URLs with their lifetime (seconds)
+    STORAGE_CACHE_CONTROL = os.environ.get('STORAGE_CACHE_CONTROL') or '31536000, immutable'
+    STORAGE_SIGNED_URLS = os.environ.get('STORAGE_SIGNED_URLS', 'False').lower() == 'true'
+    STORAGE_SIGNED_URL_TTL = int(os.environ.get('STORAGE_SIGNED_URL_TTL') or 604800)
+    # Largest image accepted through /uploads/sign and /uploads/finalize (bytes)
+    UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES') or 5 * 1024 * 1024)
+    # Abandoned direct uploads: sweep interval (0 disables the background sweeper) and the
+    # age an unreferenced upload must reach, past the two-hour signed-upload window (seconds)
+    UPLOAD_SWEEP_INTERVAL = int(os.environ.get('UPLOAD_SWEEP_INTERVAL') or 0)
+    UPLOAD_SWEEP_MIN_AGE = int(os.environ.get('UPLOAD_SWEEP_MIN_AGE') or 10800)
+    
     # JWT Secret
     JWT_SECRET = os.environ.get('JWT_SECRET') or 'mybearertoken123'
     
+    # Flask session signing key (login stores the user in the session)
+    SECRET_KEY = os.environ.get('SECRET_KEY') or JWT_SECRET
+    
+    # JWT lifetime and token-version cache TTL (seconds)
+    JWT_EXPIRES_IN = int(os.environ.get('JWT_EXPIRES_IN') or 3600)
+    TOKEN_VERSION_CACHE_TTL = int(os.environ.get('TOKEN_VERSION_CACHE_TTL') or 60)
+    
+    # Login session cookie (it signs /dashboard navigations in, so it lasts no longer
+    # than a JWT): HTTPS only and not sent with cross-site subrequests
+    PERMANENT_SESSION_LIFETIME = JWT_EXPIRES_IN
+    SESSION_COOKIE_SECURE = (os.environ.get('SESSION_COOKIE_SECURE') or 'true').lower() == 'true'
+    SESSION_COOKIE_SAMESITE = os.environ.get('SESSION_COOKIE_SAMESITE') or 'Lax'
+    
     # Base URL
     BASE_URL = os.environ.get('BASE_URL') or 'http://localhost:5000'
     
@@ -21,5 +84,55 @@ class Config:
     EMAIL_USER = os.environ.get('EMAIL_USER') or 'your_email@gmail.com'
     EMAIL_PASS = os.environ.get('EMAIL_PASS') or 'your_app_password'
     
+    # OTP Configuration (sweep interval 0 disables the background sweeper)
+    OTP_TTL_SECONDS = int(os.environ.get('OTP_TTL_SECONDS') or 300)
+    OTP_MAX_ATTEMPTS = int(os.environ.get('OTP_MAX_ATTEMPTS') or 5)
+    OTP_SWEEP_INTERVAL = int(os.environ.get('OTP_SWEEP_INTERVAL') or 0)
+    OTP_SWEEP_BATCH_SIZE = int(os.environ.get('OTP_SWEEP_BATCH_SIZE') or 500)
+    
+    # Readiness probes: per-probe timeout and result cache TTL (seconds)
+    HEALTH_PROBE_TIMEOUT = float(os.environ.get('HEALTH_PROBE_TIMEOUT') or 2.0)
+    HEALTH_CACHE_TTL = float(os.environ.get('HEALTH_CACHE_TTL') or 5.0)
+    
+    # GET /bootstrap: accounts returned in the first page, and threads for its parallel reads
+    BOOTSTRAP_ACCOUNTS_PAGE_SIZE = int(os.environ.get('BOOTSTRAP_ACCOUNTS_PAGE_SIZE') or 100)
+    BOOTSTRAP_THREADS = int(os.environ.get('BOOTSTRAP_THREADS') or 8)
+    # /dashboard: render the page with the bootstrap data embedded instead of
+    # serving the static file (signed-in users only)
+    DASHBOARD_SSR = os.environ.get('DASHBOARD_SSR', 'False').lower() == 'true'
+    
+    # /accounts/changes and /items/changes: rows per page, and how long deleted_rows tombstones are kept
+    SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE') or 500)
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get('SYNC_TOMBSTONE_RETENTION_DAYS') or 30)
+    # Watermarks stay this many seconds behind the current time, so a write
+    # that commits up to this late (plus clock skew to the database) is not skipped
+    SYNC_SAFETY_LAG_SECONDS = float(os.environ.get('SYNC_SAFETY_LAG_SECONDS') or 10.0)
+    
+    # /accounts/export, /items/export and export_vault.py: rows read per query
+    EXPORT_PAGE_SIZE = int(os.environ.get('EXPORT_PAGE_SIZE') or 1000)
+    
+    # Production WSGI server (gunicorn.conf.py / serve.py); 0 workers means 2 x cores + 1
+    WSGI_BIND = os.environ.get('WSGI_BIND') or f"0.0.0.0:{os.environ.get('PORT') or 5000}"
+    WSGI_WORKERS = int(os.environ.get('WEB_CONCURRENCY') or 0)
+    WSGI_WORKER_CLASS = os.environ.get('WSGI_WORKER_CLASS') or 'gthread'
+    WSGI_THREADS = int(os.environ.get('WSGI_THREADS') or 8)
+    WSGI_TIMEOUT = int(os.environ.get('WSGI_TIMEOUT') or 30)
+    WSGI_MAX_REQUESTS = int(os.environ.get('WSGI_MAX_REQUESTS') or 2000)
+    
+    # ASGI entry point: threads running the Flask app for routes without an async handler
+    ASGI_WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS') or 16)
+    
+    # Share one database read among identical concurrent reads (utils/single_flight.py)
+    SINGLE_FLIGHT = (os.environ.get('SINGLE_FLIGHT') or 'true').lower() == 'true'
+    
+    # Response JSON encoder: 'orjson' when installed (default), or 'stdlib'
+    JSON_PROVIDER = (os.environ.get('JSON_PROVIDER') or 'orjson').lower()
+    
+    # Logging (LOG_LEVELS overrides per module, e.g. 'middleware.auth=WARNING,controllers=DEBUG')
+    LOG_LEVEL = (os.environ.get('LOG_LEVEL') or 'INFO').upper()
+    LOG_LEVELS = os.environ.get('LOG_LEVELS') or ''
+    LOG_FORMAT = (os.environ.get('LOG_FORMAT') or 'json').lower()
+    LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE') or 0.01)
+    
     # Debug mode
     DEBUG = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
\ No newline at end of file
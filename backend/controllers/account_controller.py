@@ -1,13 +1,28 @@
 import logging
-from flask import request, jsonify
-from supabase_client import supabase
+from flask import current_app, request, jsonify
+from repositories import account_repository
 from config import Config
-from utils.supabase_storage import upload_file_to_supabase, delete_file_from_supabase
+from utils.supabase_storage import upload_file_to_supabase, delete_file_from_supabase, delete_stored_image, detect_content_type, IMAGE_TYPES_MESSAGE
+from utils.storage_paths import ACCOUNT_IMAGE_PREFIX, DEFAULT_ACCOUNT_IMAGE, normalize_many, object_key, upload_key
+from utils.serialization import JSON, encode_compact_accounts, negotiate_accounts_format
+from utils.single_flight import SingleFlight, copy_rows
+from utils.resilience import CircuitOpenError, StaleFallback, stale_headers
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+ACCOUNT_LIST_COLUMNS = 'id, site, username, password, image'
+
+# Concurrent GET /accounts for one user share a single query
+account_list_reads = SingleFlight('accounts', share=copy_rows)
+# Served while Supabase is unavailable
+account_list_fallback = StaleFallback('accounts', share=copy_rows)
+
+def normalize_account_images(accounts):
+    """
+    Replace stored image keys with public URLs (the default image for NULL).
+    """
+    return normalize_many(accounts, 'image', DEFAULT_ACCOUNT_IMAGE)
+
 def create_account():
     """
     Create a new account.
@@ -21,7 +36,8 @@ def create_account():
         
         user_id = user['id']
         
-        data = request.get_json()
+        # Multipart requests (with an image) carry the fields as form data
+        data = request.get_json(silent=True) or request.form
         site = data.get('site')
         username = data.get('username')
         password = data.get('password')
@@ -29,7 +45,8 @@ def create_account():
         if not site or not username or not password:
             return jsonify({'success': False, 'message': 'Site, username, and password are required.'}), 400
         
-        image_path = 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png'
+        # The storage object key is stored; None means the default image
+        image_key = None
         
         # Check if a file was uploaded
         if 'image' in request.files:
@@ -39,53 +56,49 @@ def create_account():
                 try:
                     # Read file content
                     file_content = file.read()
-                    file_name = f"accounts/{user_id}_{file.filename}"
+                    # A fresh key per upload keeps stored objects immutable (and cacheable)
+                    content_type = detect_content_type(file_content)
+                    if content_type is None:
+                        return jsonify({'success': False, 'message': IMAGE_TYPES_MESSAGE}), 415
+                    file_name = upload_key(ACCOUNT_IMAGE_PREFIX, user_id, content_type)
                     
-                    result = upload_file_to_supabase(file_content, file_name)
+                    result = upload_file_to_supabase(file_content, file_name, content_type=content_type)
                     
                     if result['error']:
-                        logger.error(f"Error uploading file to Supabase Storage: {result['error']}")
+                        logger.error("Error uploading file to Supabase Storage: %s", result['error'])
                         return jsonify({
                             'success': False,
                             'message': result['error'] or 'Failed to upload image to Supabase Storage. Please try again or contact support.'
                         }), 500
                     else:
-                        image_path = result['public_url']
+                        image_key = file_name
                 
                 except Exception as file_read_error:
-                    logger.error(f"Error reading file for Supabase upload: {str(file_read_error)}")
-                    image_path = 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png'
-        
-        # If no file was uploaded, use the default image path that was sent from frontend
-        # This handles the case where req.body.image === 'images/default.png'
+                    logger.error("Error reading file for Supabase upload: %s", file_read_error)
         
-        # Log the image path for debugging
-        logger.info(f"/accounts: Image path being stored: {image_path}")
+        # Log the image key for debugging
+        logger.debug("/accounts: Image key being stored: %s", image_key)
         
-        response = supabase.table('accounts').insert({
+        response = account_repository.create({
             'site': site,
             'username': username,
             'password': password,
-            'image': image_path,
+            'image': image_key,
             'user_id': user_id
-        }).execute()
+        })
         
         if response.error:
             logger.error(response.error)
             # If there was an error and we uploaded a file, try to delete it from Supabase
-            if 'image' in request.files and image_path.startswith('http'):
-                try:
-                    file_name = f"accounts/{user_id}_{request.files['image'].filename}"
-                    delete_file_from_supabase(file_name, 'images')
-                except Exception as delete_err:
-                    logger.error(f"Error deleting uploaded file: {str(delete_err)}")
+            if image_key:
+                delete_file_from_supabase(image_key, 'images')
             
             return jsonify({'success': False, 'message': 'Error creating account.'}), 500
         
         return jsonify({'success': True, 'message': 'Account created successfully!', 'accountId': response.data[0]['id']})
         
     except Exception as e:
-        logger.error(f"Error in create_account: {str(e)}")
+        logger.error("Error in create_account: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
 
 def get_accounts():
@@ -101,47 +114,44 @@ def get_accounts():
         
         user_id = user['id']
         
-        logger.info(f"/accounts: Request received for user ID: {user_id}")
+        logger.debug("/accounts: Request received for user ID: %s", user_id)
         
-        response = supabase.table('accounts').select('id, site, username, password, image').eq('user_id', user_id).execute()
+        response, stale_age = account_list_fallback.get(
+            user_id, account_list_reads.do, user_id, account_repository.list_for_user, user_id, ACCOUNT_LIST_COLUMNS
+        )
         
         if response.error:
-            logger.error(f"/accounts: DB Error reading accounts: {response.error}")
+            logger.error("/accounts: DB Error reading accounts: %s", response.error)
             return jsonify({'success': False, 'message': 'Error reading accounts.'}), 500
         
         accounts = response.data
         
-        # Log the raw accounts data for debugging
-        logger.info(f"/accounts: Raw accounts data: {accounts}")
-        
         # Process accounts to handle image paths correctly
-        accounts_with_full_image_urls = []
-        for account in accounts:
-            # Ensure image field has a default value if null
-            if not account.get('image'):
-                account['image'] = 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png'
-            
-            # For Supabase Storage URLs, return as-is since they're already full URLs
-            # For local images or default images, return relative path
-            if (account['image'] and 
-                not account['image'].startswith('http') and 
-                account['image'] != 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png'):
-                account['image'] = account['image'].replace('\\', '/')
-            
-            accounts_with_full_image_urls.append(account)
-        
-        # Log the processed accounts data for debugging
-        logger.info(f"/accounts: Processed accounts data: {accounts_with_full_image_urls}")
-        
-        logger.info(f"/accounts: Successfully retrieved accounts for user ID: {user_id}, Count: {len(accounts)}")
-        return jsonify({
-            'success': True, 
-            'message': 'Accounts retrieved successfully!', 
-            'accounts': accounts_with_full_image_urls
-        })
-        
+        accounts_with_full_image_urls = normalize_account_images(accounts)
+        
+        logger.debug("/accounts: Successfully retrieved accounts for user ID: %s, Count: %s", user_id, len(accounts))
+        
+        # Clients can ask for a compact columnar JSON or MessagePack body
+        media_type = negotiate_accounts_format(request.headers.get('Accept'))
+        if media_type != JSON:
+            body, content_type = encode_compact_accounts(accounts_with_full_image_urls, media_type, current_app.json.dumps)
+            response = current_app.response_class(body, content_type=content_type)
+        else:
+            response = jsonify({
+                'success': True, 
+                'message': 'Accounts retrieved successfully!', 
+                'accounts': accounts_with_full_image_urls
+            })
+        response.vary.add('Accept')
+        if stale_age is not None:
+            response.headers.update(stale_headers(stale_age))
+        return response
+        
+    except CircuitOpenError as e:
+        logger.error("/accounts: %s", e)
+        return jsonify({'success': False, 'message': 'Accounts are temporarily unavailable. Please try again shortly.'}), 503
     except Exception as e:
-        logger.error(f"Error in get_accounts: {str(e)}")
+        logger.error("Error in get_accounts: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
 
 def update_account(account_id):
@@ -157,7 +167,8 @@ def update_account(account_id):
         
         user_id = user['id']
         
-        data = request.get_json()
+        # Multipart requests (with an image) carry the fields as form data
+        data = request.get_json(silent=True) or request.form
         site = data.get('site')
         username = data.get('username')
         password = data.get('password')
@@ -166,7 +177,7 @@ def update_account(account_id):
             return jsonify({'success': False, 'message': 'Site, username, and password are required.'}), 400
         
         # First, get the current account data to retrieve the existing image URL
-        response = supabase.table('accounts').select('image').eq('id', account_id).eq('user_id', user_id).execute()
+        response = account_repository.get_for_user(account_id, user_id, 'image')
         
         if response.error:
             logger.error(response.error)
@@ -179,7 +190,9 @@ def update_account(account_id):
             return jsonify({'success': False, 'message': 'Account not found or you do not have permission to update it.'}), 404
         
         current_image = current_account_data[0].get('image')
-        image_path = current_image or 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png'
+        # Keep the stored value unless a new image or the default is chosen
+        image_value = current_image
+        uploaded_key = None
         
         # Check if a file was uploaded
         if 'image' in request.files:
@@ -189,103 +202,62 @@ def update_account(account_id):
                 try:
                     # Read file content
                     file_content = file.read()
-                    file_name = f"accounts/{user_id}_{file.filename}"
+                    # A fresh key per upload keeps stored objects immutable (and cacheable)
+                    content_type = detect_content_type(file_content)
+                    if content_type is None:
+                        return jsonify({'success': False, 'message': IMAGE_TYPES_MESSAGE}), 415
+                    file_name = upload_key(ACCOUNT_IMAGE_PREFIX, user_id, content_type)
                     
-                    result = upload_file_to_supabase(file_content, file_name)
+                    result = upload_file_to_supabase(file_content, file_name, content_type=content_type)
                     
                     if result['error']:
-                        logger.error(f"Error uploading file to Supabase Storage: {result['error']}")
+                        logger.error("Error uploading file to Supabase Storage: %s", result['error'])
                         return jsonify({
                             'success': False,
                             'message': result['error'] or 'Failed to upload image to Supabase Storage. Please try again or contact support.'
                         }), 500
                     else:
-                        image_path = result['public_url']
-                        
-                        # If there was a previous image stored in Supabase Storage, delete it
-                        # But only if it's not the default account image
-                        if (current_image and 
-                            current_image.startswith('http') and 
-                            'supabase.co/storage' in current_image and
-                            current_image != 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png'):
-                            try:
-                                # Extract the file path from the URL
-                                url_parts = current_image.split('/')
-                                # Find the index of 'object' in the URL parts
-                                object_index = url_parts.index('object')
-                                if object_index != -1 and object_index + 2 < len(url_parts):
-                                    # Get everything after 'object/public/<bucket>/'
-                                    old_file_path = '/'.join(url_parts[object_index + 3:])
-                                    logger.info(f"Deleting old image file: {old_file_path}")
-                                    delete_result = delete_file_from_supabase(old_file_path, 'images')
-                                    
-                                    if delete_result['error']:
-                                        logger.error(f"Error deleting old image from Supabase Storage: {delete_result['error']}")
-                                    else:
-                                        logger.info("Old image deleted successfully from Supabase Storage")
-                            except Exception as delete_err:
-                                logger.error(f"Error deleting old image file: {str(delete_err)}")
+                        image_value = uploaded_key = file_name
                 
                 except Exception as file_read_error:
-                    logger.error(f"Error reading file for Supabase upload: {str(file_read_error)}")
-        elif data.get('image') == 'images/default.png' or data.get('image') == 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png':
+                    logger.error("Error reading file for Supabase upload: %s", file_read_error)
+        elif data.get('image') in ('images/default.png', DEFAULT_ACCOUNT_IMAGE):
             # If user explicitly selected default image, use it
-            image_path = 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png'
-            
-            # If there was a previous image stored in Supabase Storage, delete it
-            # But only if it's not the default account image
-            if (current_image and 
-                current_image.startswith('http') and 
-                'supabase.co/storage' in current_image and
-                current_image != 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png'):
-                try:
-                    # Extract the file path from the URL
-                    url_parts = current_image.split('/')
-                    # Find the index of 'object' in the URL parts
-                    object_index = url_parts.index('object')
-                    if object_index != -1 and object_index + 2 < len(url_parts):
-                        # Get everything after 'object/public/<bucket>/'
-                        old_file_path = '/'.join(url_parts[object_index + 3:])
-                        logger.info(f"Deleting old image file: {old_file_path}")
-                        delete_result = delete_file_from_supabase(old_file_path, 'images')
-                        
-                        if delete_result['error']:
-                            logger.error(f"Error deleting old image from Supabase Storage: {delete_result['error']}")
-                        else:
-                            logger.info("Old image deleted successfully from Supabase Storage")
-                except Exception as delete_err:
-                    logger.error(f"Error deleting old image file: {str(delete_err)}")
-        
-        # Log the image path for debugging
-        logger.info(f"/accounts/:id: Image path being updated: {image_path}")
-        
-        response = supabase.table('accounts').update({
+            image_value = None
+        
+        # Log the image key for debugging
+        logger.debug("/accounts/:id: Image key being updated: %s", image_value)
+        
+        response = account_repository.update_for_user(account_id, user_id, {
             'site': site,
             'username': username,
             'password': password,
-            'image': image_path
-        }).eq('id', account_id).eq('user_id', user_id).execute()
+            'image': image_value
+        })
         
         if response.error:
             logger.error(response.error)
             return jsonify({'success': False, 'message': 'Error updating account.'}), 500
         
         # Check if no rows were affected (account not found or not owned by user)
-        if response.data and len(response.data) == 0:
+        if response.data is not None and len(response.data) == 0:
             # If we uploaded a new file but the update failed, try to delete the uploaded file
-            if 'image' in request.files and image_path and image_path.startswith('http'):
-                try:
-                    file_name = f"accounts/{user_id}_{request.files['image'].filename}"
-                    delete_file_from_supabase(file_name, 'images')
-                except Exception as delete_err:
-                    logger.error(f"Error deleting uploaded file: {str(delete_err)}")
+            if uploaded_key:
+                delete_file_from_supabase(uploaded_key, 'images')
             
             return jsonify({'success': False, 'message': 'Account not found or you do not have permission to update it.'}), 404
         
+        # The previous image is no longer referenced; default images are never deleted
+        old_key = object_key(current_image)
+        if old_key and old_key != object_key(image_value):
+            delete_result = delete_stored_image(current_image)
+            if delete_result['error']:
+                logger.error("Error deleting old image from Supabase Storage: %s", delete_result['error'])
+        
         return jsonify({'success': True, 'message': 'Account updated successfully!'})
         
     except Exception as e:
-        logger.error(f"Error in update_account: {str(e)}")
+        logger.error("Error in update_account: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
 
 def delete_account(account_id):
@@ -302,7 +274,7 @@ def delete_account(account_id):
         user_id = user['id']
         
         # First, get the account to retrieve the image URL
-        response = supabase.table('accounts').select('image').eq('id', account_id).eq('user_id', user_id).execute()
+        response = account_repository.get_for_user(account_id, user_id, 'image')
         
         if response.error:
             logger.error(response.error)
@@ -317,7 +289,7 @@ def delete_account(account_id):
         account_image = account_data[0].get('image')
         
         # Delete the account
-        response = supabase.table('accounts').delete().eq('id', account_id).eq('user_id', user_id).execute()
+        response = account_repository.delete_for_user(account_id, user_id)
         
         if response.error:
             logger.error(response.error)
@@ -329,31 +301,12 @@ def delete_account(account_id):
         
         # If the account had an image stored in Supabase Storage, delete it
         # But only if it's not the default account image
-        if (account_image and 
-            account_image.startswith('http') and 
-            'supabase.co/storage' in account_image and
-            account_image != 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png'):
-            try:
-                # Extract the file path from the URL
-                url_parts = account_image.split('/')
-                # Find the index of 'object' in the URL parts
-                object_index = url_parts.index('object')
-                if object_index != -1 and object_index + 2 < len(url_parts):
-                    # Get everything after 'object/public/<bucket>/'
-                    file_path = '/'.join(url_parts[object_index + 3:])
-                    
-                    logger.info(f"Deleting image file: {file_path}")
-                    delete_result = delete_file_from_supabase(file_path, 'images')
-                    
-                    if delete_result['error']:
-                        logger.error(f"Error deleting image from Supabase Storage: {delete_result['error']}")
-                    else:
-                        logger.info("Image deleted successfully from Supabase Storage")
-            except Exception as delete_err:
-                logger.error(f"Error deleting image file: {str(delete_err)}")
+        delete_result = delete_stored_image(account_image)
+        if delete_result['error']:
+            logger.error("Error deleting image from Supabase Storage: %s", delete_result['error'])
         
         return jsonify({'success': True, 'message': 'Account deleted successfully!'})
         
     except Exception as e:
-        logger.error(f"Error in delete_account: {str(e)}")
+        logger.error("Error in delete_account: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
\ No newline at end of file
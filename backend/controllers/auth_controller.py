@@ -1,15 +1,15 @@
 import hashlib
+import time
 import uuid
 import re
 import logging
-import jwt
 from flask import jsonify, request, session
-from supabase_client import supabase
+from repositories import store, user_repository
 from config import Config
 from utils.mailer import send_otp_email, send_password_reset_email
+from utils.tokens import bump_token_version, cache_token_version, issue_token
+from utils.otp import issue_otp, verify_otp
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def hash_password(password):
@@ -44,13 +44,13 @@ def signup():
         if len(password) < 6:
             return jsonify({'success': False, 'message': 'Password must be at least 6 characters'}), 400
 
-        # Check if Supabase client is initialized
-        if supabase is None:
-            logger.error("Supabase client is not initialized")
+        # Check if the data backend is available
+        if not store.is_ready():
+            logger.error("Data backend is not initialized")
             return jsonify({'success': False, 'message': 'Database connection error'}), 500
 
         # Check if user already exists
-        existing_user = supabase.table('users').select('*').eq('email', email).execute()
+        existing_user = user_repository.get_by_email(email)
         if existing_user.data:
             return jsonify({'success': False, 'message': 'Email already registered'}), 400
 
@@ -65,7 +65,7 @@ def signup():
             'name': name
         }
         
-        result = supabase.table('users').insert(user_data).execute()
+        result = user_repository.create(user_data)
         
         if result.data:
             return jsonify({'success': True, 'message': 'Account created successfully'}), 201
@@ -73,7 +73,7 @@ def signup():
             return jsonify({'success': False, 'message': 'Failed to create account'}), 500
             
     except Exception as e:
-        logger.error(f'Signup error: {str(e)}')
+        logger.error('Signup error: %s', e)
         return jsonify({'success': False, 'message': 'An error occurred during signup'}), 500
 
 def login():
@@ -86,13 +86,13 @@ def login():
         if not email or not password:
             return jsonify({'success': False, 'message': 'Email and password are required'}), 400
 
-        # Check if Supabase client is initialized
-        if supabase is None:
-            logger.error("Supabase client is not initialized")
+        # Check if the data backend is available
+        if not store.is_ready():
+            logger.error("Data backend is not initialized")
             return jsonify({'success': False, 'message': 'Database connection error'}), 500
 
         # Get user
-        result = supabase.table('users').select('*').eq('email', email).execute()
+        result = user_repository.get_by_email(email)
         users = result.data
         
         if not users:
@@ -106,18 +106,20 @@ def login():
         if not verify_password(hashed_password, salt, password):
             return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
 
-        # Generate JWT token
-        token_payload = {
-            'id': user['id'],
-            'email': user['email']
-        }
-        
-        token = jwt.encode(token_payload, Config.JWT_SECRET, algorithm='HS256')
+        # Generate JWT token bound to the user's current token version
+        token_version = user.get('token_version') or 0
+        token = issue_token(user['id'], user['email'], token_version)
+        cache_token_version(user['id'], token_version)
         
-        # Store user info in session
+        # Store user info in session; the cookie expires with the JWT
+        # (PERMANENT_SESSION_LIFETIME) and issued_at bounds the session itself
+        session.permanent = True
+        session['issued_at'] = int(time.time())
         session['user_id'] = user['id']
         session['user_email'] = user['email']
         session['user_name'] = user['name']
+        # Lets /dashboard check the session against revocations, like the JWT
+        session['token_version'] = token_version
 
         return jsonify({
             'success': True, 
@@ -131,7 +133,7 @@ def login():
         }), 200
         
     except Exception as e:
-        logger.error(f'Login error: {str(e)}')
+        logger.error('Login error: %s', e)
         return jsonify({'success': False, 'message': 'An error occurred during login'}), 500
 
 def logout():
@@ -139,7 +141,7 @@ def logout():
         session.clear()
         return jsonify({'success': True, 'message': 'Logged out successfully'}), 200
     except Exception as e:
-        logger.error(f'Logout error: {str(e)}')
+        logger.error('Logout error: %s', e)
         return jsonify({'success': False, 'message': 'An error occurred during logout'}), 500
 
 def forgot_password():
@@ -150,13 +152,13 @@ def forgot_password():
         if not email:
             return jsonify({'success': False, 'message': 'Email is required'}), 400
 
-        # Check if Supabase client is initialized
-        if supabase is None:
-            logger.error("Supabase client is not initialized")
+        # Check if the data backend is available
+        if not store.is_ready():
+            logger.error("Data backend is not initialized")
             return jsonify({'success': False, 'message': 'Database connection error'}), 500
 
         # Check if user exists
-        result = supabase.table('users').select('*').eq('email', email).execute()
+        result = user_repository.get_by_email(email)
         users = result.data
         
         if not users:
@@ -165,25 +167,14 @@ def forgot_password():
 
         user = users[0]
         
-        # Generate OTP
-        otp = str(uuid.uuid4().int)[:6]
-        otp_hash, salt = hash_password(otp)
-
-        # Store OTP in database
-        otp_data = {
-            'user_id': user['id'],
-            'otp_hash': otp_hash,
-            'salt': salt
-        }
+        # Generate and store OTP (hashed, with expiry)
+        otp_result = issue_otp(email)
         
-        # Delete any existing OTPs for this user
-        supabase.table('password_resets').delete().eq('user_id', user['id']).execute()
+        if otp_result['error']:
+            return jsonify({'success': False, 'message': 'An error occurred'}), 500
         
-        # Insert new OTP
-        supabase.table('password_resets').insert(otp_data).execute()
-
         # Send OTP email
-        email_sent = send_password_reset_email(email, user['name'], otp)
+        email_sent = send_password_reset_email(email, otp_result['otp'])
         
         if email_sent:
             return jsonify({'success': True, 'message': 'If the email exists, a password reset link has been sent'}), 200
@@ -191,7 +182,7 @@ def forgot_password():
             return jsonify({'success': False, 'message': 'Failed to send email'}), 500
             
     except Exception as e:
-        logger.error(f'Forgot password error: {str(e)}')
+        logger.error('Forgot password error: %s', e)
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
 def reset_password():
@@ -212,13 +203,13 @@ def reset_password():
         if len(new_password) < 6:
             return jsonify({'success': False, 'message': 'Password must be at least 6 characters'}), 400
 
-        # Check if Supabase client is initialized
-        if supabase is None:
-            logger.error("Supabase client is not initialized")
+        # Check if the data backend is available
+        if not store.is_ready():
+            logger.error("Data backend is not initialized")
             return jsonify({'success': False, 'message': 'Database connection error'}), 500
 
         # Get user
-        user_result = supabase.table('users').select('*').eq('email', email).execute()
+        user_result = user_repository.get_by_email(email)
         users = user_result.data
         
         if not users:
@@ -226,35 +217,30 @@ def reset_password():
 
         user = users[0]
 
-        # Get OTP record
-        otp_result = supabase.table('password_resets').select('*').eq('user_id', user['id']).execute()
-        otp_records = otp_result.data
+        # Verify OTP (expiry and attempt limits are enforced by verify_otp)
+        otp_result = verify_otp(email, otp)
         
-        if not otp_records:
-            return jsonify({'success': False, 'message': 'Invalid or expired OTP'}), 400
-
-        otp_record = otp_records[0]
-        otp_hash = otp_record['otp_hash']
-        salt = otp_record['salt']
-
-        # Verify OTP
-        if not verify_password(otp_hash, salt, otp):
+        if otp_result['error']:
+            return jsonify({'success': False, 'message': 'An error occurred'}), 500
+        
+        if not otp_result['valid']:
             return jsonify({'success': False, 'message': 'Invalid or expired OTP'}), 400
 
         # Hash new password
         new_hashed_password, new_salt = hash_password(new_password)
 
-        # Update password
-        supabase.table('users').update({
+        # Update password and revoke previously issued tokens
+        bump_result = bump_token_version(user['id'], {
             'password_hash': new_hashed_password,
             'salt': new_salt
-        }).eq('id', user['id']).execute()
+        }, user.get('token_version'))
 
-        # Delete OTP record
-        supabase.table('password_resets').delete().eq('user_id', user['id']).execute()
+        if bump_result['error'] or bump_result['token_version'] is None:
+            logger.error('Reset password update failed: %s', bump_result['error'] or 'user not found')
+            return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
         return jsonify({'success': True, 'message': 'Password reset successfully'}), 200
         
     except Exception as e:
-        logger.error(f'Reset password error: {str(e)}')
+        logger.error('Reset password error: %s', e)
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
\ No newline at end of file
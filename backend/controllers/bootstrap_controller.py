@@ -0,0 +1,99 @@
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from flask import request, jsonify
+from config import Config
+from repositories import account_repository, item_repository
+from controllers.account_controller import normalize_account_images
+from controllers.user_controller import normalize_profile_picture
+from utils.current_user import load_current_user
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=Config.BOOTSTRAP_THREADS, thread_name_prefix='bootstrap')
+
+USER_COLUMNS = 'id, firstname, middlename, lastname, email, profilepicture'
+ACCOUNT_COLUMNS = 'id, site, username, password, image'
+
+def _submit(fn, *args):
+    # Run in a copy of the request's context so spans still reach its Server-Timing header
+    return _executor.submit(contextvars.copy_context().run, fn, *args)
+
+def build_bootstrap_payload(user, accounts, items, page_size):
+    """
+    Combine the results of the three dashboard reads into one response body.
+    
+    Args:
+        user: Result of the users read
+        accounts: Result of the accounts read (page_size + 1 rows at most)
+        items: Result of the items read
+        page_size: Accounts returned in the first page
+    
+    Returns:
+        tuple: (payload dict, status code)
+    """
+    for name, response in (('user', user), ('accounts', accounts), ('items', items)):
+        if response.error:
+            logger.error("/bootstrap: DB Error reading %s: %s", name, response.error)
+            return {'success': False, 'message': 'An error occurred while loading the dashboard.'}, 500
+    
+    if not user.data:
+        return {'success': False, 'message': 'User not found.'}, 404
+    
+    user_data = user.data[0]
+    user_data['profilepicture'] = normalize_profile_picture(user_data.get('profilepicture'))
+    
+    # One extra row was read to tell whether more accounts follow
+    account_rows = accounts.data[:page_size]
+    return {
+        'success': True,
+        'user': user_data,
+        'accounts': normalize_account_images(account_rows),
+        'accountsHasMore': len(accounts.data) > page_size,
+        'items': items.data
+    }, 200
+
+def load_bootstrap(user_id):
+    """
+    Run the three dashboard reads concurrently and combine them.
+    
+    The user row comes from load_current_user, so a row already read by
+    authenticate_token is not read again.
+    
+    Returns:
+        tuple: (payload dict, status code)
+    """
+    page_size = Config.BOOTSTRAP_ACCOUNTS_PAGE_SIZE
+    
+    user_future = _submit(load_current_user, user_id, USER_COLUMNS)
+    accounts_future = _submit(account_repository.list_for_user, user_id, ACCOUNT_COLUMNS, page_size + 1)
+    items_future = _submit(item_repository.list_for_user, user_id)
+    
+    return build_bootstrap_payload(
+        user_future.result(),
+        accounts_future.result(),
+        items_future.result(),
+        page_size
+    )
+
+def get_bootstrap():
+    """
+    Get everything the dashboard shows on load: the user, the first page of
+    accounts and the items.
+    
+    Replaces separate /user-info, /profile-picture, /accounts and /read calls:
+    the token is checked once and the three reads run concurrently.
+    """
+    try:
+        # Get user from request context (set by auth middleware)
+        user = getattr(request, 'user', None)
+        
+        if not user:
+            return jsonify({'success': False, 'message': 'User not authenticated.'}), 401
+        
+        payload, status_code = load_bootstrap(user['id'])
+        return jsonify(payload), status_code
+        
+    except Exception as e:
+        logger.error("Error in get_bootstrap: %s", e)
+        return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
@@ -0,0 +1,110 @@
+import os
+import logging
+import threading
+import time
+import jwt
+from flask import current_app, request, session
+from jinja2.utils import htmlsafe_json_dumps
+from config import Config
+from controllers.bootstrap_controller import USER_COLUMNS, load_bootstrap
+from middleware.auth import decode_token, parse_bearer_token
+from utils.tokens import get_token_version
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_FILE = os.path.join('..', 'frontend', 'dashboard.html')
+
+# The page split where the data goes, re-read only when the file changes
+_template = {'mtime': None, 'parts': None}
+_template_lock = threading.Lock()
+
+def _template_parts():
+    """
+    The static dashboard split in two around the point where the initial
+    data is inserted: just before the first script, so it can be read as
+    soon as the page's scripts run.
+    """
+    path = os.path.join(current_app.root_path, DASHBOARD_FILE)
+    mtime = os.stat(path).st_mtime
+    if _template['mtime'] == mtime:
+        return _template['parts']
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+    index = html.find('<script')
+    if index == -1:
+        index = html.rfind('</body>')
+    if index == -1:
+        index = len(html)
+    with _template_lock:
+        _template['parts'] = (html[:index], html[index:])
+        _template['mtime'] = mtime
+    return _template['parts']
+
+def _signed_in_user_id():
+    """
+    The user a page request is signed in as, or None.
+
+    Navigations carry no Authorization header, so the login session is
+    accepted as well as a bearer token. A session expires JWT_EXPIRES_IN
+    after login, like the token it stands in for. Either way the token
+    version must be current, so a password change signs the page out too.
+    The version lookup also reads the user's dashboard columns if it has to
+    query.
+    """
+    token = parse_bearer_token(request.headers.get('Authorization'))
+    if token:
+        try:
+            claims = decode_token(token)
+        except jwt.InvalidTokenError:
+            return None
+        user_id, token_version = claims['id'], claims.get('token_version', 0)
+    elif 'user_id' in session:
+        # The cookie's own expiry is up to the browser; the signed issue time is not
+        issued_at = session.get('issued_at')
+        if not isinstance(issued_at, int) or time.time() - issued_at > Config.JWT_EXPIRES_IN:
+            return None
+        user_id, token_version = session['user_id'], session.get('token_version', 0)
+    else:
+        return None
+
+    result = get_token_version(user_id, USER_COLUMNS)
+    if result['error'] or result['token_version'] is None or result['token_version'] != token_version:
+        return None
+    return user_id
+
+def render_dashboard():
+    """
+    Render the dashboard with the user's /bootstrap data embedded as JSON.
+
+    Returns:
+        Response, or None when the request is not signed in or the data
+        could not be loaded; the static page is served instead and loads
+        its data itself
+    """
+    try:
+        user_id = _signed_in_user_id()
+        if user_id is None:
+            return None
+
+        payload, status_code = load_bootstrap(user_id)
+        if status_code != 200:
+            return None
+
+        head, tail = _template_parts()
+        body = ''.join((
+            head,
+            '<script id="initial-data" type="application/json">',
+            # Escapes <, >, & and ' so the JSON cannot close the script element
+            htmlsafe_json_dumps(payload, dumps=current_app.json.dumps),
+            '</script>\n    ',
+            tail
+        ))
+        response = current_app.response_class(body, mimetype='text/html')
+        # The page holds the user's data
+        response.headers['Cache-Control'] = 'no-store, private'
+        response.vary.update(('Cookie', 'Authorization'))
+        return response
+
+    except Exception as e:
+        logger.error("Error in render_dashboard: %s", e)
+        return None
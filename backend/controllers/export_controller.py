@@ -0,0 +1,88 @@
+import itertools
+import logging
+from flask import Response, current_app, request, jsonify, stream_with_context
+from config import Config
+from repositories import account_repository, item_repository
+from controllers.account_controller import normalize_account_images
+from utils.export import EXPORT_COLUMNS, FORMATS, encode_pages, iter_pages
+from utils.json_provider import FastJSONProvider
+
+logger = logging.getLogger(__name__)
+
+def _export_format():
+    """
+    Format from ?format=ndjson|csv, else from Accept (NDJSON by default).
+    """
+    requested = request.args.get('format')
+    if requested:
+        requested = requested.lower()
+        return requested if requested in FORMATS else None
+    media_type = request.accept_mimetypes.best_match(list(FORMATS.values()), default=FORMATS['ndjson'])
+    return next(name for name, value in FORMATS.items() if value == media_type)
+
+def _logged(chunks, table_name):
+    try:
+        yield from chunks
+    except Exception as e:
+        # Headers are already sent; aborting leaves the chunked body unterminated,
+        # so clients see a failed download rather than a silently short file
+        logger.error("Export of %s failed mid-stream: %s", table_name, e)
+        raise
+
+def export_rows(repository, table_name, normalize=None):
+    """
+    Stream all of the user's rows of one table as NDJSON or CSV.
+
+    Rows are read EXPORT_PAGE_SIZE at a time and each page is written as
+    one chunk, so memory use does not grow with the vault.
+    """
+    try:
+        # Get user from request context (set by auth middleware)
+        user = getattr(request, 'user', None)
+
+        if not user:
+            return jsonify({'success': False, 'message': 'User not authenticated.'}), 401
+
+        user_id = user['id']
+
+        export_format = _export_format()
+        if export_format is None:
+            return jsonify({'success': False, 'message': 'format must be ndjson or csv.'}), 400
+
+        columns = EXPORT_COLUMNS[table_name]
+        pages = iter_pages(
+            lambda after_id, limit: repository.page_for_user(user_id, after_id, ', '.join(columns), limit),
+            Config.EXPORT_PAGE_SIZE,
+            table_name
+        )
+        # Read the first page before responding, so a failing query still gets a 500
+        first = next(pages, None)
+        pages = itertools.chain([first] if first else [], pages)
+        if normalize:
+            pages = map(normalize, pages)
+
+        # Untimed encoder: a json span per row would cost more than the encoding
+        provider = current_app.json
+        dumps_bytes = lambda row: FastJSONProvider.dumps_bytes(provider, row)
+        chunks = encode_pages(pages, export_format, columns, dumps_bytes)
+
+        response = Response(stream_with_context(_logged(chunks, table_name)), mimetype=FORMATS[export_format])
+        response.headers['Content-Disposition'] = f'attachment; filename="{table_name}.{export_format}"'
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    except Exception as e:
+        logger.error("Error in export_rows (%s): %s", table_name, e)
+        return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
+
+def export_accounts():
+    """
+    Export the user's accounts.
+    """
+    return export_rows(account_repository, 'accounts', normalize_account_images)
+
+def export_items():
+    """
+    Export the user's items.
+    """
+    return export_rows(item_repository, 'items')
@@ -1,9 +1,7 @@
 import logging
 from flask import request, jsonify
-from supabase_client import supabase
+from repositories import item_repository
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 def create_item():
@@ -26,11 +24,11 @@ def create_item():
         if not name or not description:
             return jsonify({'success': False, 'message': 'Name and description are required.'}), 400
         
-        response = supabase.table('items').insert({
+        response = item_repository.create({
             'name': name,
             'description': description,
             'user_id': user_id
-        }).execute()
+        })
         
         if response.error:
             logger.error(response.error)
@@ -43,7 +41,7 @@ def create_item():
         })
         
     except Exception as e:
-        logger.error(f"Error in create_item: {str(e)}")
+        logger.error("Error in create_item: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
 
 def read_items():
@@ -59,7 +57,7 @@ def read_items():
         
         user_id = user['id']
         
-        response = supabase.table('items').select('*').eq('user_id', user_id).execute()
+        response = item_repository.list_for_user(user_id)
         
         if response.error:
             logger.error(response.error)
@@ -72,7 +70,7 @@ def read_items():
         })
         
     except Exception as e:
-        logger.error(f"Error in read_items: {str(e)}")
+        logger.error("Error in read_items: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
 
 def update_item():
@@ -96,10 +94,10 @@ def update_item():
         if not item_id or not name or not description:
             return jsonify({'success': False, 'message': 'Item ID, name, and description are required.'}), 400
         
-        response = supabase.table('items').update({
+        response = item_repository.update_for_user(item_id, user_id, {
             'name': name,
             'description': description
-        }).eq('id', item_id).eq('user_id', user_id).execute()
+        })
         
         if response.error:
             logger.error(response.error)
@@ -111,7 +109,7 @@ def update_item():
         return jsonify({'success': True, 'message': 'Item updated successfully!'})
         
     except Exception as e:
-        logger.error(f"Error in update_item: {str(e)}")
+        logger.error("Error in update_item: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
 
 def delete_item():
@@ -133,7 +131,7 @@ def delete_item():
         if not item_id:
             return jsonify({'success': False, 'message': 'Item ID is required.'}), 400
         
-        response = supabase.table('items').delete().eq('id', item_id).eq('user_id', user_id).execute()
+        response = item_repository.delete_for_user(item_id, user_id)
         
         if response.error:
             logger.error(response.error)
@@ -145,5 +143,5 @@ def delete_item():
         return jsonify({'success': True, 'message': 'Item deleted successfully!'})
         
     except Exception as e:
-        logger.error(f"Error in delete_item: {str(e)}")
+        logger.error("Error in delete_item: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
\ No newline at end of file
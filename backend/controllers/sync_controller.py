@@ -0,0 +1,164 @@
+import logging
+import re
+from datetime import datetime, timedelta, timezone
+from flask import request, jsonify
+from config import Config
+from repositories import account_repository, item_repository, tombstone_repository
+from controllers.account_controller import normalize_account_images
+
+logger = logging.getLogger(__name__)
+
+ACCOUNT_COLUMNS = 'id, site, username, password, image, updated_at'
+ITEM_COLUMNS = '*'
+
+# Fractional seconds of any precision (Postgres trims trailing zeros)
+_FRACTION = re.compile(r'\.(\d+)')
+# An unescaped '+' in a query string arrives as a space
+_SPACED_OFFSET = re.compile(r' (\d\d:?\d\d)$')
+
+def parse_timestamp(value):
+    """
+    Parse an ISO 8601 timestamp as stored by Postgres or sent by a client.
+
+    Naive timestamps are taken as UTC.
+
+    Raises:
+        ValueError: If value is not a timestamp
+    """
+    if isinstance(value, datetime):
+        timestamp = value
+    else:
+        value = _SPACED_OFFSET.sub(r'+\1', value.strip()).replace('Z', '+00:00')
+        value = _FRACTION.sub(lambda m: '.' + m.group(1)[:6].ljust(6, '0'), value, count=1)
+        timestamp = datetime.fromisoformat(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+def format_watermark(timestamp):
+    # Fixed width UTC, the same form the local store writes
+    return timestamp.astimezone(timezone.utc).isoformat(timespec='microseconds')
+
+def build_changes_page(rows, tombstones, page_size):
+    """
+    Cut the changed rows and tombstones read after a watermark into one page.
+
+    Both streams are read oldest first with page_size + 1 rows, so a longer
+    stream shows that more changes follow. When one does, the page stops
+    just before that stream's last timestamp: everything older is complete
+    in both streams, and nothing at or after it is skipped by the next
+    request.
+
+    Args:
+        rows: Changed rows (with updated_at), oldest first
+        tombstones: deleted_rows entries (row_id, deleted_at), oldest first
+        page_size: Changes returned per stream
+
+    Returns:
+        tuple: (rows, deleted row ids, newest timestamp included or None, has_more)
+    """
+    rows = [(parse_timestamp(row['updated_at']), row) for row in rows]
+    tombstones = [(parse_timestamp(row['deleted_at']), row['row_id']) for row in tombstones]
+
+    cutoffs = [stream[page_size - 1][0] for stream in (rows, tombstones) if len(stream) > page_size]
+    has_more = bool(cutoffs)
+    if has_more:
+        cutoff = min(cutoffs)
+        kept_rows = [entry for entry in rows if entry[0] < cutoff]
+        kept_tombstones = [entry for entry in tombstones if entry[0] < cutoff]
+        if not kept_rows and not kept_tombstones:
+            # A whole page shares one timestamp; take it, at the risk of
+            # missing further changes stamped with exactly that time
+            logger.warning("Sync page of %s changes shares the timestamp %s", page_size, cutoff)
+            kept_rows = [entry for entry in rows[:page_size] if entry[0] <= cutoff]
+            kept_tombstones = [entry for entry in tombstones[:page_size] if entry[0] <= cutoff]
+        rows, tombstones = kept_rows, kept_tombstones
+
+    timestamps = [entry[0] for entry in rows[-1:] + tombstones[-1:]]
+    newest = max(timestamps) if timestamps else None
+    return [row for _, row in rows], [row_id for _, row_id in tombstones], newest, has_more
+
+def get_changes(repository, table_name, collection, columns, normalize=None):
+    """
+    Rows of one table changed or deleted since the client's watermark.
+
+    Query parameter since is the watermark from the previous response. A
+    missing since, or one older than the tombstone retention, returns every
+    row with reset = true: the client replaces its copy instead of merging.
+    Otherwise the client upserts the returned rows and then removes the
+    deleted ids. Either way it stores the new watermark, and asks again
+    straight away while hasMore is true. The watermark never passes
+    now - SYNC_SAFETY_LAG_SECONDS, so recent changes can come back twice.
+    """
+    try:
+        # Get user from request context (set by auth middleware)
+        user = getattr(request, 'user', None)
+
+        if not user:
+            return jsonify({'success': False, 'message': 'User not authenticated.'}), 401
+
+        user_id = user['id']
+
+        since = request.args.get('since')
+        if since:
+            try:
+                since = parse_timestamp(since)
+            except ValueError:
+                return jsonify({'success': False, 'message': 'since must be an ISO 8601 timestamp.'}), 400
+
+        retention = timedelta(days=Config.SYNC_TOMBSTONE_RETENTION_DAYS)
+        reset = not since or since < datetime.now(timezone.utc) - retention
+        watermark = None if reset else format_watermark(since)
+        page_size = Config.SYNC_PAGE_SIZE
+
+        rows = repository.changed_since(user_id, watermark, columns, page_size + 1)
+        if rows.error:
+            logger.error(rows.error)
+            return jsonify({'success': False, 'message': f'Error reading {collection}.'}), 500
+
+        # A full resync holds every live row, so older deletions do not matter
+        tombstones = []
+        if not reset:
+            deleted = tombstone_repository.deleted_since(table_name, user_id, watermark, page_size + 1)
+            if deleted.error:
+                logger.error(deleted.error)
+                return jsonify({'success': False, 'message': f'Error reading {collection}.'}), 500
+            tombstones = deleted.data
+
+        changed, deleted_ids, newest, has_more = build_changes_page(rows.data, tombstones, page_size)
+        if newest is not None:
+            # updated_at is stamped before commit, so a row stamped earlier
+            # than the newest one may still become visible. Keep the watermark
+            # SYNC_SAFETY_LAG_SECONDS behind now: changes after it are sent
+            # again next time, which the client's upserts and deletes absorb.
+            safe = datetime.now(timezone.utc) - timedelta(seconds=Config.SYNC_SAFETY_LAG_SECONDS)
+            if newest > safe:
+                newest = safe if reset else max(safe, since)
+                # Whatever follows is newer still; the next sync reads it
+                has_more = False
+            watermark = format_watermark(newest)
+
+        return jsonify({
+            'success': True,
+            collection: normalize(changed) if normalize else changed,
+            'deleted': deleted_ids,
+            'watermark': watermark,
+            'hasMore': has_more,
+            'reset': reset
+        })
+
+    except Exception as e:
+        logger.error("Error in get_changes (%s): %s", table_name, e)
+        return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
+
+def get_account_changes():
+    """
+    Accounts changed or deleted since the client's last sync.
+    """
+    return get_changes(account_repository, 'accounts', 'accounts', ACCOUNT_COLUMNS, normalize_account_images)
+
+def get_item_changes():
+    """
+    Items changed or deleted since the client's last sync.
+    """
+    return get_changes(item_repository, 'items', 'items', ITEM_COLUMNS)
@@ -0,0 +1,227 @@
+import logging
+from flask import request, jsonify
+from repositories import account_repository, user_repository
+from config import Config
+from utils.current_user import load_current_user
+from utils.supabase_storage import (
+    IMAGE_CONTENT_TYPES,
+    IMAGE_TYPES_MESSAGE,
+    create_signed_upload,
+    delete_file_from_supabase,
+    delete_stored_image,
+    detect_content_type,
+    download_file_head,
+    get_file_metadata
+)
+from utils.storage_paths import (
+    ACCOUNT_IMAGE_PREFIX,
+    DEFAULT_ACCOUNT_IMAGE,
+    DEFAULT_PROFILE_PICTURE,
+    PROFILE_PICTURE_PREFIX,
+    object_key,
+    public_url,
+    upload_key,
+    upload_key_prefix
+)
+
+logger = logging.getLogger(__name__)
+
+# What an upload is for -> the key prefix it is stored under
+UPLOAD_KINDS = {
+    'account': ACCOUNT_IMAGE_PREFIX,
+    'profile': PROFILE_PICTURE_PREFIX
+}
+
+def sign_upload():
+    """
+    Create a signed URL for uploading an image straight to Supabase Storage.
+
+    The body names what the image is for ('account' or 'profile') and its
+    content type. The key is chosen here, under the user's own prefix, so
+    /uploads/finalize can tell the object was signed for this user.
+    """
+    try:
+        # Get user from request context (set by auth middleware)
+        user = getattr(request, 'user', None)
+
+        if not user:
+            return jsonify({'success': False, 'message': 'User not authenticated.'}), 401
+
+        user_id = user['id']
+        data = request.get_json(silent=True) or {}
+        prefix = UPLOAD_KINDS.get(data.get('kind'))
+        content_type = (data.get('contentType') or '').lower()
+        size = data.get('size')
+
+        if prefix is None:
+            return jsonify({'success': False, 'message': "kind must be 'account' or 'profile'."}), 400
+        if content_type not in IMAGE_CONTENT_TYPES:
+            return jsonify({'success': False, 'message': IMAGE_TYPES_MESSAGE}), 415
+        # The declared size is only a hint; /uploads/finalize checks the stored object
+        if isinstance(size, int) and size > Config.UPLOAD_MAX_BYTES:
+            return jsonify({'success': False, 'message': f'Images can be at most {Config.UPLOAD_MAX_BYTES} bytes.'}), 413
+
+        key = upload_key(prefix, user_id, content_type)
+        result = create_signed_upload(key)
+
+        if result['error']:
+            logger.error("Error signing upload: %s", result['error'])
+            return jsonify({'success': False, 'message': 'Could not prepare the upload. Please try again.'}), 500
+
+        return jsonify({
+            'success': True,
+            'key': key,
+            'uploadUrl': result['signed_url'],
+            'token': result['token'],
+            # Sent with the upload, so the object is stored like server-side uploads
+            'headers': {
+                'Content-Type': content_type,
+                'Cache-Control': f'max-age={Config.STORAGE_CACHE_CONTROL}'
+            },
+            'maxBytes': Config.UPLOAD_MAX_BYTES
+        })
+
+    except Exception as e:
+        logger.error("Error in sign_upload: %s", e)
+        return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
+
+def _verify_upload(key):
+    """
+    Check the stored object behind an upload key.
+
+    The browser chose the object's bytes and its Content-Type, so both are
+    checked: the leading bytes must be an accepted image, and the stored
+    type must be the one they show.
+
+    Returns:
+        tuple: (None, None) if the object is an acceptable image, else an
+        (error message, status code) pair. Rejected objects are deleted.
+    """
+    metadata = get_file_metadata(key)
+    if metadata['error']:
+        return 'Could not check the upload. Please try again.', 500
+    if metadata['size'] is None:
+        return 'Upload not found. Upload the file before finalizing it.', 404
+
+    error = None
+    detected = None
+    if metadata['size'] > Config.UPLOAD_MAX_BYTES:
+        error = (f'Images can be at most {Config.UPLOAD_MAX_BYTES} bytes.', 413)
+    else:
+        head = download_file_head(key)
+        if head['error']:
+            return 'Could not check the upload. Please try again.', 500
+        detected = detect_content_type(head['head'])
+        if detected is None or (metadata['content_type'] or '').lower() != detected:
+            error = (IMAGE_TYPES_MESSAGE, 415)
+
+    if error:
+        logger.warning("Rejected upload %s: %s bytes of %s (detected %s)", key, metadata['size'], metadata['content_type'], detected)
+        delete_file_from_supabase(key, 'images')
+        return error
+    return None, None
+
+def _attach_account_image(user_id, account_id, key):
+    response = account_repository.get_for_user(account_id, user_id, 'image')
+
+    if response.error:
+        logger.error(response.error)
+        return jsonify({'success': False, 'message': 'Error fetching current account data.'}), 500
+    if not response.data:
+        delete_file_from_supabase(key, 'images')
+        return jsonify({'success': False, 'message': 'Account not found or you do not have permission to update it.'}), 404
+
+    current_image = response.data[0].get('image')
+    response = account_repository.update_for_user(account_id, user_id, {'image': key})
+
+    if response.error:
+        logger.error(response.error)
+        delete_file_from_supabase(key, 'images')
+        return jsonify({'success': False, 'message': 'Error updating account.'}), 500
+
+    # The previous image is no longer referenced; default images are never deleted
+    old_key = object_key(current_image)
+    if old_key and old_key != key:
+        delete_result = delete_stored_image(current_image)
+        if delete_result['error']:
+            logger.error("Error deleting old image from Supabase Storage: %s", delete_result['error'])
+
+    return jsonify({
+        'success': True,
+        'message': 'Account image updated successfully!',
+        'image': public_url(key, DEFAULT_ACCOUNT_IMAGE)
+    })
+
+def _attach_profile_picture(user_id, key):
+    response = load_current_user(user_id, 'profilepicture')
+
+    if response.error:
+        logger.error(response.error)
+        return jsonify({'success': False, 'message': 'Error fetching current user data.'}), 500
+    if not response.data:
+        delete_file_from_supabase(key, 'images')
+        return jsonify({'success': False, 'message': 'User not found.'}), 404
+
+    current_profile_picture = response.data[0].get('profilepicture')
+    response = user_repository.update(user_id, {'profilepicture': key})
+
+    if response.error:
+        logger.error("Error updating profile picture in DB: %s", response.error)
+        delete_file_from_supabase(key, 'images')
+        return jsonify({'success': False, 'message': 'Error saving profile picture.'}), 500
+
+    # The previous picture is no longer referenced; the default is never deleted
+    old_key = object_key(current_profile_picture)
+    if old_key and old_key != key:
+        delete_result = delete_stored_image(current_profile_picture)
+        if delete_result['error']:
+            logger.error("Error deleting old profile picture from Supabase Storage: %s", delete_result['error'])
+
+    return jsonify({
+        'success': True,
+        'message': 'Profile picture updated successfully!',
+        'profilepicture': public_url(key, DEFAULT_PROFILE_PICTURE)
+    })
+
+def finalize_upload():
+    """
+    Attach a directly uploaded image to an account or to the user's profile.
+
+    The body carries the key from /uploads/sign, and accountId for account
+    images. The stored object's size, leading bytes and content type are
+    checked first; an object that fails the check is deleted. Uploads that
+    are never finalized are removed by sweep_abandoned_uploads.
+    """
+    try:
+        # Get user from request context (set by auth middleware)
+        user = getattr(request, 'user', None)
+
+        if not user:
+            return jsonify({'success': False, 'message': 'User not authenticated.'}), 401
+
+        user_id = user['id']
+        data = request.get_json(silent=True) or {}
+        key = data.get('key')
+        prefix = upload_key_prefix(key, user_id)
+
+        if prefix is None:
+            return jsonify({'success': False, 'message': 'Invalid upload key.'}), 400
+
+        account_id = data.get('accountId')
+        if prefix == ACCOUNT_IMAGE_PREFIX:
+            try:
+                account_id = int(account_id)
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'message': 'accountId is required for account images.'}), 400
+
+        message, status = _verify_upload(key)
+        if message:
+            return jsonify({'success': False, 'message': message}), status
+
+        if prefix == ACCOUNT_IMAGE_PREFIX:
+            return _attach_account_image(user_id, account_id, key)
+        return _attach_profile_picture(user_id, key)
+
+    except Exception as e:
+        logger.error("Error in finalize_upload: %s", e)
+        return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
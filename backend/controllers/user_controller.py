@@ -1,17 +1,32 @@
 import bcrypt
-import jwt
 import os
 import logging
 from flask import request, jsonify, current_app
-from supabase_client import supabase
+from repositories import user_repository
 from config import Config
-from utils.supabase_storage import upload_file_to_supabase, delete_file_from_supabase
+from utils.supabase_storage import upload_file_to_supabase, delete_file_from_supabase, delete_stored_image, detect_content_type, IMAGE_TYPES_MESSAGE
+from utils.storage_paths import DEFAULT_PROFILE_PICTURE, PROFILE_PICTURE_PREFIX, object_key, public_url, upload_key
 from middleware.auth import authenticate_token
+from utils.tokens import bump_token_version, issue_token
+from utils.current_user import load_current_user
+from utils.single_flight import SingleFlight, copy_rows
+from utils.resilience import CircuitOpenError, StaleFallback, stale_headers
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+USER_INFO_COLUMNS = 'id, firstname, middlename, lastname, email, profilepicture'
+
+# Concurrent GET /user-info for one user share a single query
+user_info_reads = SingleFlight('user_info', share=copy_rows)
+# Served while Supabase is unavailable
+user_info_fallback = StaleFallback('user_info', share=copy_rows)
+
+def normalize_profile_picture(profile_picture):
+    """
+    Public URL for a stored profile picture key (the default picture for NULL).
+    """
+    return public_url(profile_picture, DEFAULT_PROFILE_PICTURE)
+
 def get_user_info():
     """
     Get user information.
@@ -24,37 +39,37 @@ def get_user_info():
             return jsonify({'success': False, 'message': 'User not authenticated.'}), 401
         
         user_id = user['id']
-        logger.info(f"getUserInfo: Fetching user info for user ID: {user_id}")
+        logger.debug("getUserInfo: Fetching user info for user ID: %s", user_id)
         
-        response = supabase.table('users').select('id, firstname, middlename, lastname, email, profilepicture').eq('id', user_id).execute()
+        response, stale_age = user_info_fallback.get(
+            user_id, user_info_reads.do, user_id, load_current_user, user_id, USER_INFO_COLUMNS
+        )
         
         if response.error:
-            logger.error(f"Error in getUserInfo - Supabase query failed: {response.error}")
+            logger.error("Error in getUserInfo - Supabase query failed: %s", response.error)
             return jsonify({'success': False, 'message': 'An error occurred while fetching user information.'}), 500
         
         users = response.data
         
         if users and len(users) > 0:
             user_data = users[0]
-            logger.info(f"getUserInfo: User found: {user_data['email']}")
-            
-            # Ensure profilePicture has a default value if null
-            if not user_data.get('profilepicture'):
-                user_data['profilepicture'] = 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default-profile.png'
+            logger.debug("getUserInfo: User found: %s", user_data['email'])
             
-            # For Supabase Storage URLs, return as-is since they're already full URLs
-            # For local images, return relative path
-            if user_data.get('profilepicture') and not user_data['profilepicture'].startswith('http'):
-                user_data['profilepicture'] = user_data['profilepicture'].replace('\\', '/')
+            user_data['profilepicture'] = normalize_profile_picture(user_data.get('profilepicture'))
             
-            logger.info(f"getUserInfo: Returning user data with profile picture: {user_data['profilepicture']}")
+            logger.debug("getUserInfo: Returning user data with profile picture: %s", user_data['profilepicture'])
+            if stale_age is not None:
+                return jsonify({'success': True, 'user': user_data}), 200, stale_headers(stale_age)
             return jsonify({'success': True, 'user': user_data})
         else:
-            logger.info(f"getUserInfo: User not found for ID: {user_id}")
+            logger.info("getUserInfo: User not found for ID: %s", user_id)
             return jsonify({'success': False, 'message': 'User not found.'}), 404
             
+    except CircuitOpenError as e:
+        logger.error("getUserInfo: %s", e)
+        return jsonify({'success': False, 'message': 'User information is temporarily unavailable. Please try again shortly.'}), 503
     except Exception as e:
-        logger.error(f"Error in getUserInfo - Unexpected error: {str(e)}")
+        logger.error("Error in getUserInfo - Unexpected error: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred while fetching user information.'}), 500
 
 def update_user_info(user_id):
@@ -81,12 +96,12 @@ def update_user_info(user_id):
         if not firstname or not lastname or not email:
             return jsonify({'success': False, 'message': 'First name, last name, and email are required.'}), 400
         
-        response = supabase.table('users').update({
+        response = user_repository.update(user_id, {
             'firstname': firstname,
             'middlename': middlename,
             'lastname': lastname,
             'email': email
-        }).eq('id', user_id).execute()
+        })
         
         if response.error:
             logger.error(response.error)
@@ -95,7 +110,7 @@ def update_user_info(user_id):
         return jsonify({'success': True, 'message': 'Account information updated successfully!'})
         
     except Exception as e:
-        logger.error(f"Error in update_user_info: {str(e)}")
+        logger.error("Error in update_user_info: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
 
 def upload_profile_picture():
@@ -118,7 +133,7 @@ def upload_profile_picture():
         file = request.files['profilePicture']
         
         # First, get the current user data to retrieve the existing profile picture URL
-        response = supabase.table('users').select('profilepicture').eq('id', user_id).execute()
+        response = load_current_user(user_id, 'profilepicture')
         
         if response.error:
             logger.error(response.error)
@@ -131,80 +146,59 @@ def upload_profile_picture():
             return jsonify({'success': False, 'message': 'User not found.'}), 404
         
         current_profile_picture = current_user_data[0].get('profilepicture')
-        profile_picture_path = 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default-profile.png'
+        # The storage object key is stored; None means the default picture
+        profile_picture_key = None
         
         # Upload file to Supabase Storage
         if file:
             try:
                 # Read file content
                 file_content = file.read()
-                file_name = f"profile-pictures/{user_id}_{file.filename}"
+                # A fresh key per upload keeps stored objects immutable (and cacheable)
+                content_type = detect_content_type(file_content)
+                if content_type is None:
+                    return jsonify({'success': False, 'message': IMAGE_TYPES_MESSAGE}), 415
+                file_name = upload_key(PROFILE_PICTURE_PREFIX, user_id, content_type)
                 
-                result = upload_file_to_supabase(file_content, file_name, 'images')
+                result = upload_file_to_supabase(file_content, file_name, 'images', content_type)
                 
                 if result['error']:
-                    logger.error(f"Error uploading profile picture to Supabase Storage: {result['error']}")
+                    logger.error("Error uploading profile picture to Supabase Storage: %s", result['error'])
                     return jsonify({
                         'success': False,
                         'message': result['error'] or 'Failed to upload profile picture to Supabase Storage. Please try again or contact support.'
                     }), 500
                 else:
-                    profile_picture_path = result['public_url']
-                    
-                    # If there was a previous profile picture stored in Supabase Storage, delete it
-                    # But only if it's not the default profile picture
-                    if (current_profile_picture and 
-                        current_profile_picture.startswith('http') and 
-                        'supabase.co/storage' in current_profile_picture and
-                        current_profile_picture != 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default-profile.png'):
-                        try:
-                            # Extract the file path from the URL
-                            url_parts = current_profile_picture.split('/')
-                            # Find the index of 'object' in the URL parts
-                            object_index = url_parts.index('object')
-                            if object_index != -1 and object_index + 2 < len(url_parts):
-                                # Get everything after 'object/public/<bucket>/'
-                                old_file_path = '/'.join(url_parts[object_index + 3:])
-                                logger.info(f"Deleting old profile picture file: {old_file_path}")
-                                delete_result = delete_file_from_supabase(old_file_path, 'images')
-                                
-                                if delete_result['error']:
-                                    logger.error(f"Error deleting old profile picture from Supabase Storage: {delete_result['error']}")
-                                else:
-                                    logger.info("Old profile picture deleted successfully from Supabase Storage")
-                        except Exception as delete_err:
-                            logger.error(f"Error deleting old profile picture file: {str(delete_err)}")
+                    profile_picture_key = file_name
             
             except Exception as file_read_error:
-                logger.error(f"Error reading file for Supabase upload: {str(file_read_error)}")
-                profile_picture_path = 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default-profile.png'
+                logger.error("Error reading file for Supabase upload: %s", file_read_error)
         
-        response = supabase.table('users').update({'profilepicture': profile_picture_path}).eq('id', user_id).execute()
+        response = user_repository.update(user_id, {'profilepicture': profile_picture_key})
         
         if response.error:
-            logger.error(f"Error updating profile picture in DB: {response.error}")
+            logger.error("Error updating profile picture in DB: %s", response.error)
             # If there was an error, try to delete the uploaded file from Supabase
-            # But only if it's not the default profile picture
-            if (profile_picture_path.startswith('http') and 
-                profile_picture_path != 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default-profile.png'):
-                try:
-                    url_parts = profile_picture_path.split('/')
-                    file_name = url_parts[-1]
-                    file_path = f"profile-pictures/{file_name}"
-                    delete_file_from_supabase(file_path, 'images')
-                except Exception as delete_err:
-                    logger.error(f"Error deleting uploaded file: {str(delete_err)}")
+            if profile_picture_key:
+                delete_file_from_supabase(profile_picture_key, 'images')
             
             return jsonify({'success': False, 'message': 'Error saving profile picture.'}), 500
         
+        # The previous picture is no longer referenced; the default is never deleted
+        old_key = object_key(current_profile_picture)
+        if old_key and old_key != profile_picture_key:
+            delete_result = delete_stored_image(current_profile_picture)
+            if delete_result['error']:
+                logger.error("Error deleting old profile picture from Supabase Storage: %s", delete_result['error'])
+        
         return jsonify({
             'success': True, 
             'message': 'Profile picture updated successfully!', 
-            'profilepicture': profile_picture_path
+            'profilepicture': normalize_profile_picture(profile_picture_key)
         })
         
     except Exception as e:
-        logger.error(f"Error in upload_profile_picture: {str(e)}")
+        logger.error("Error in upload_profile_picture: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
 
 def get_profile_picture():
@@ -219,38 +213,30 @@ def get_profile_picture():
             return jsonify({'success': False, 'message': 'User not authenticated.'}), 401
         
         user_id = user['id']
-        logger.info(f"getProfilePicture: Fetching profile picture for user ID: {user_id}")
+        logger.debug("getProfilePicture: Fetching profile picture for user ID: %s", user_id)
         
-        response = supabase.table('users').select('profilepicture').eq('id', user_id).execute()
+        response = load_current_user(user_id, 'profilepicture')
         
         if response.error:
-            logger.error(f"Error in getProfilePicture - Supabase query failed: {response.error}")
+            logger.error("Error in getProfilePicture - Supabase query failed: %s", response.error)
             return jsonify({'success': False, 'message': 'An error occurred while fetching profile picture.'}), 500
         
         users = response.data
         
         if users and len(users) > 0:
             profile_picture = users[0].get('profilepicture')
-            logger.info(f"getProfilePicture: Profile picture from DB: {profile_picture}")
-            
-            # Ensure profilePicture has a default value if null
-            if not profile_picture:
-                profile_picture = 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default-profile.png'
+            logger.debug("getProfilePicture: Profile picture from DB: %s", profile_picture)
             
-            # For Supabase Storage URLs, return as-is since they're already full URLs
-            # For local images, return relative path
-            if profile_picture and not profile_picture.startswith('http'):
-                # Ensure the path is properly formatted
-                profile_picture = profile_picture.replace('\\', '/')
+            profile_picture = normalize_profile_picture(profile_picture)
             
-            logger.info(f"getProfilePicture: Returning profile picture: {profile_picture}")
+            logger.debug("getProfilePicture: Returning profile picture: %s", profile_picture)
             return jsonify({'success': True, 'profilepicture': profile_picture})
         else:
-            logger.info(f"getProfilePicture: User not found for ID: {user_id}")
+            logger.info("getProfilePicture: User not found for ID: %s", user_id)
             return jsonify({'success': False, 'message': 'User not found.'}), 404
             
     except Exception as e:
-        logger.error(f"Error in getProfilePicture - Unexpected error: {str(e)}")
+        logger.error("Error in getProfilePicture - Unexpected error: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred while fetching profile picture.'}), 500
 
 def verify_current_password():
@@ -272,7 +258,7 @@ def verify_current_password():
         if not current_password:
             return jsonify({'success': False, 'message': 'Current password is required.'}), 400
         
-        response = supabase.table('users').select('password').eq('id', user_id).execute()
+        response = load_current_user(user_id, 'password')
         
         if response.error:
             logger.error(response.error)
@@ -291,7 +277,7 @@ def verify_current_password():
             return jsonify({'success': False, 'message': 'Current password does not match.'}), 401
             
     except Exception as e:
-        logger.error(f"Error in verify_current_password: {str(e)}")
+        logger.error("Error in verify_current_password: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
 
 def change_password():
@@ -308,7 +294,7 @@ def change_password():
         user_id = user['id']
         user_email = user['email']
         
-        logger.info(f"/change-password: Request received for user ID: {user_id}, Email: {user_email}")
+        logger.debug("/change-password: Request received for user ID: %s, Email: %s", user_id, user_email)
         
         data = request.get_json()
         current_password = data.get('currentPassword')
@@ -321,53 +307,46 @@ def change_password():
         if new_password != confirm_new_password:
             return jsonify({'success': False, 'message': 'New password and confirm password do not match.'}), 400
         
-        response = supabase.table('users').select('password').eq('id', user_id).execute()
+        response = load_current_user(user_id, 'password, token_version')
         
         if response.error:
-            logger.error(f"/change-password: Error verifying current password from DB: {response.error}")
+            logger.error("/change-password: Error verifying current password from DB: %s", response.error)
             return jsonify({'success': False, 'message': 'An error occurred while verifying current password.'}), 500
         
         users = response.data
         
         if len(users) == 0:
-            logger.info(f"/change-password: User not found for ID: {user_id}")
+            logger.info("/change-password: User not found for ID: %s", user_id)
             return jsonify({'success': False, 'message': 'User not found.'}), 404
         
         hashed_password = users[0]['password']
         
         if not bcrypt.checkpw(current_password.encode('utf-8'), hashed_password.encode('utf-8')):
-            logger.info(f"/change-password: Invalid current password for user ID: {user_id}")
+            logger.info("/change-password: Invalid current password for user ID: %s", user_id)
             return jsonify({'success': False, 'message': 'Invalid current password.'}), 401
         
         # Hash new password
         new_hashed_password = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
         
-        update_response = supabase.table('users').update({'password': new_hashed_password}).eq('id', user_id).execute()
+        # Bumping the token version revokes every token issued before the change
+        bump_result = bump_token_version(user_id, {'password': new_hashed_password}, users[0].get('token_version'))
         
-        if update_response.error:
-            logger.error(f"/change-password: Error updating password in DB: {update_response.error}")
+        if bump_result['error']:
+            logger.error("/change-password: Error updating password in DB: %s", bump_result['error'])
             return jsonify({'success': False, 'message': 'An error occurred while changing password.'}), 500
         
-        logger.info(f"/change-password: Password updated in DB for user ID: {user_id}")
-        
-        # Generate new JWT token
-        token_payload = {
-            'id': user_id,
-            'email': user_email
-        }
-        
-        new_access_token = jwt.encode(token_payload, Config.JWT_SECRET, algorithm='HS256')
-        logger.info(f"/change-password: Generated new token: {new_access_token[:10]}...")
+        if bump_result['token_version'] is None:
+            logger.info("/change-password: User not found for ID: %s", user_id)
+            return jsonify({'success': False, 'message': 'User not found.'}), 404
         
-        token_update_response = supabase.table('users').update({'token': new_access_token}).eq('id', user_id).execute()
+        new_token_version = bump_result['token_version']
+        logger.info("/change-password: Password and token version updated in DB for user ID: %s", user_id)
         
-        if token_update_response.error:
-            logger.error(f"/change-password: Error updating token after password change: {token_update_response.error}")
-            return jsonify({'success': False, 'message': 'An error occurred while updating session.'}), 500
+        # Generate new JWT token
+        new_access_token = issue_token(user_id, user_email, new_token_version)
         
-        logger.info(f"/change-password: Token updated in DB for user ID: {user_id}")
         return jsonify({'success': True, 'message': 'Password changed successfully!', 'token': new_access_token})
         
     except Exception as e:
-        logger.error(f"Error in change_password: {str(e)}")
+        logger.error("Error in change_password: %s", e)
         return jsonify({'success': False, 'message': 'An unexpected error occurred.'}), 500
\ No newline at end of file
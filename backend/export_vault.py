@@ -0,0 +1,63 @@
+"""
+Script to export accounts or items, for backups and admin bulk exports.
+
+Streams every user's rows (or one user's, with --user-id) as NDJSON or CSV,
+reading --page-size rows per query, so memory use stays flat however large
+the tables are. Stored values are written as-is: images stay object keys,
+and every row carries its user_id.
+
+    python export_vault.py accounts > accounts.ndjson
+    python export_vault.py items --format csv --output items.csv
+    python export_vault.py accounts --user-id 42 --page-size 5000
+"""
+
+import argparse
+import sys
+import time
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Export accounts or items as NDJSON or CSV.')
+    parser.add_argument('table', choices=('accounts', 'items'), help='Table to export')
+    parser.add_argument('--format', choices=('ndjson', 'csv'), default='ndjson', help='Output format')
+    parser.add_argument('--output', default='-', help="Output file ('-' for stdout)")
+    parser.add_argument('--user-id', type=int, default=None, help="Only export this user's rows")
+    parser.add_argument('--page-size', type=int, default=None, help='Rows read per query (default: EXPORT_PAGE_SIZE)')
+    args = parser.parse_args()
+
+    from logging_config import configure_logging
+    configure_logging()
+
+    from config import Config
+    from repositories import account_repository, item_repository
+    from utils.export import EXPORT_COLUMNS, encode_pages, iter_pages
+
+    repository = account_repository if args.table == 'accounts' else item_repository
+    columns = EXPORT_COLUMNS[args.table] + ('user_id',)
+    select = ', '.join(columns)
+    if args.user_id is None:
+        fetch_page = lambda after_id, limit: repository.page_all(after_id, select, limit)
+    else:
+        fetch_page = lambda after_id, limit: repository.page_for_user(args.user_id, after_id, select, limit)
+
+    exported = 0
+
+    def counted(pages):
+        global exported
+        for page in pages:
+            exported += len(page)
+            yield page
+
+    start = time.perf_counter()
+    output = sys.stdout.buffer if args.output == '-' else open(args.output, 'wb')
+    try:
+        pages = counted(iter_pages(fetch_page, args.page_size or Config.EXPORT_PAGE_SIZE, args.table))
+        for chunk in encode_pages(pages, args.format, columns):
+            output.write(chunk)
+    except RuntimeError as err:
+        print(f"Export failed after {exported} {args.table}: {err}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+
+    print(f"Exported {exported} {args.table} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
@@ -9,6 +9,12 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 # Import our modules
 from config import Config
+from logging_config import configure_logging, init_request_logging
+from utils.instrumentation import init_instrumentation
+
+# Set up logging once for the whole process
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -17,16 +23,18 @@ app.config.from_object(Config)
 # Enable CORS
 CORS(app)
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger(__name__)
+# Tag each request with an ID for log correlation
+init_request_logging(app)
+
+# Time requests and dependency calls (Server-Timing header and /metrics)
+init_instrumentation(app)
 
-# Import Supabase client after app initialization
+# Import Supabase client after app initialization (shared with the controllers;
+# a failed initialization leaves it None and is reported by /health/ready)
 try:
-    from supabase_client import get_supabase_client
-    supabase = get_supabase_client()
+    from supabase_client import supabase
 except Exception as e:
-    logger.error(f"Failed to initialize Supabase client: {str(e)}")
+    logger.error("Failed to initialize Supabase client: %s", e)
     supabase = None
 
 # Handle CORS preflight requests
@@ -45,7 +53,14 @@ def index():
     return send_from_directory('../frontend', 'index.html')
 
 @app.route('/dashboard')
+@app.route('/dashboard.html')
 def dashboard():
+    # With DASHBOARD_SSR, signed-in users get the page with their data embedded
+    if Config.DASHBOARD_SSR:
+        from controllers.dashboard_controller import render_dashboard
+        response = render_dashboard()
+        if response is not None:
+            return response
     return send_from_directory('../frontend', 'dashboard.html')
 
 # Serve all frontend static files
@@ -68,19 +83,42 @@ def images(filename):
 
 # Import and register blueprints after app initialization
 try:
-    from routes import auth_bp, user_bp, account_bp, item_bp
+    from routes import auth_bp, user_bp, account_bp, item_bp, health_bp, bootstrap_bp, upload_bp
     app.register_blueprint(auth_bp)
     app.register_blueprint(user_bp)
     app.register_blueprint(account_bp)
     app.register_blueprint(item_bp)
+    app.register_blueprint(health_bp)
+    app.register_blueprint(bootstrap_bp)
+    app.register_blueprint(upload_bp)
 except Exception as e:
-    logger.error(f"Failed to import and register blueprints: {str(e)}")
+    logger.error("Failed to import and register blueprints: %s", e)
 
-# Health check endpoint
+def start_sweepers():
+    """
+    Start the background sweepers enabled in Config: expired OTPs and
+    abandoned direct uploads (both disabled by default). Each runs at most
+    once per process.
+    """
+    if Config.OTP_SWEEP_INTERVAL <= 0 and Config.UPLOAD_SWEEP_INTERVAL <= 0:
+        return
+    from repositories import store
+    if not store.is_ready():
+        return
+    if Config.OTP_SWEEP_INTERVAL > 0:
+        from utils.otp import start_otp_sweeper
+        start_otp_sweeper(Config.OTP_SWEEP_INTERVAL)
+    if Config.UPLOAD_SWEEP_INTERVAL > 0:
+        from utils.upload_sweeper import start_upload_sweeper
+        start_upload_sweeper(Config.UPLOAD_SWEEP_INTERVAL)
+
+# gunicorn.conf.py preloads the app in the master, where a sweeper thread would
+# share the Supabase client's sockets with every forked worker; it starts the
+# sweepers in one worker instead
+if not os.environ.get('SWEEPERS_AFTER_FORK'):
+    start_sweepers()
+
+# Health check endpoint (static; see /health/live and /health/ready)
 @app.route('/health')
 def health_check():
-    return jsonify({'status': 'ok', 'message': 'Backend is running properly'})
-
-# For Vercel serverless deployment
-if __name__ != '__main__':
-    app.logger.setLevel(logging.INFO)
\ No newline at end of file
+    return jsonify({'status': 'ok', 'message': 'Backend is running properly'})
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Gunicorn configuration for production.
+
+    gunicorn -c gunicorn.conf.py flask_app:app
+
+Settings come from Config (and so from the environment / .env):
+
+    WEB_CONCURRENCY      worker processes (default 2 x cores + 1)
+    WSGI_WORKER_CLASS    gthread (default), sync or gevent
+    WSGI_THREADS         threads per gthread worker; handlers mostly wait on
+                         Supabase and SMTP, so threads are cheap concurrency
+    WSGI_BIND            address to listen on (default 0.0.0.0:$PORT or :5000)
+    WSGI_TIMEOUT         seconds before a stuck worker is killed and replaced
+    WSGI_MAX_REQUESTS    recycle each worker after this many requests (jittered)
+
+Send SIGHUP to reload workers gracefully: new workers start before the old
+ones finish their in-flight requests (up to graceful_timeout).
+"""
+
+import fcntl
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import Config
+
+bind = Config.WSGI_BIND
+worker_class = Config.WSGI_WORKER_CLASS
+workers = Config.WSGI_WORKERS or multiprocessing.cpu_count() * 2 + 1
+threads = Config.WSGI_THREADS if worker_class == 'gthread' else 1
+worker_connections = 1000
+
+# Import the app once in the master so workers share its memory copy-on-write.
+# This also matters for gevent: the Supabase client pulls in trio, which
+# needs select.epoll and fails to import once gevent has patched select.
+preload_app = True
+
+# Background sweepers must not start in the master: its threads would use the
+# Supabase client whose sockets (and held locks) every forked worker inherits.
+# flask_app.py skips them at import, and post_worker_init starts them in one worker
+os.environ['SWEEPERS_AFTER_FORK'] = '1'
+
+timeout = Config.WSGI_TIMEOUT
+graceful_timeout = 30
+keepalive = 5
+
+# Recycling bounds slow memory growth; jitter keeps workers from restarting together
+max_requests = Config.WSGI_MAX_REQUESTS
+max_requests_jitter = max(1, max_requests // 10) if max_requests else 0
+
+# Logs go through the app's logging configuration (JSON lines on stderr)
+accesslog = None
+errorlog = '-'
+loglevel = Config.LOG_LEVEL.lower()
+
+def when_ready(server):
+    server.log.info("Serving with %s %s worker(s), %s thread(s) each", workers, worker_class, threads)
+
+def post_worker_init(worker):
+    # One worker per server runs the sweepers: each waits on a lock file keyed
+    # by the master's pid, and the kernel releases it when its holder exits,
+    # so a sibling takes over when that worker is recycled
+    from flask_app import start_sweepers
+    if Config.OTP_SWEEP_INTERVAL <= 0 and Config.UPLOAD_SWEEP_INTERVAL <= 0:
+        return
+    path = os.path.join(tempfile.gettempdir(), f'backend-sweepers-{os.getppid()}.lock')
+    
+    def claim():
+        lock_file = open(path, 'w')
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Polling rather than a blocking flock keeps gevent workers responsive
+                time.sleep(10)
+                continue
+            # Kept open, and so locked, for the rest of the worker's life
+            worker.sweeper_lock_file = lock_file
+            start_sweepers()
+            return
+    
+    threading.Thread(target=claim, name='sweeper-lock', daemon=True).start()
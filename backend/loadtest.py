@@ -0,0 +1,301 @@
+"""
+Load generator for the Flask backend.
+
+Each virtual user signs up once, then repeats a realistic flow:
+login -> GET /accounts -> POST /accounts (with image) -> PUT /accounts/<id>
+(with image) -> GET /accounts -> DELETE /accounts/<id>.
+
+Targets:
+    inprocess   Flask test client in this process (default)
+    vercel      vercel_wrapper.handler with Vercel-style events
+    http://...  A running server, e.g. `python run_flask.py`
+
+In-process targets use the local Supabase stand-in (LOCAL_SUPABASE_DB,
+default ':memory:'). Start HTTP servers with LOCAL_SUPABASE_DB set as well.
+
+Usage:
+    python loadtest.py --users 8 --duration 30
+    python loadtest.py --target vercel --iterations 50
+    python loadtest.py --target http://localhost:5000 --users 16 --json baseline.json
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# A 1x1 transparent PNG used as the uploaded account image
+PNG_IMAGE = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+def encode_multipart(fields, files):
+    """
+    Encode form fields and files as multipart/form-data.
+
+    Args:
+        fields: dict of field name -> value
+        files: dict of field name -> (filename, content, content_type)
+
+    Returns:
+        tuple: (body bytes, content type)
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'.encode() + content + b'\r\n'
+        )
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+class InProcessTarget:
+    """
+    Sends requests through the Flask test client.
+    """
+    def __init__(self):
+        from flask_app import app
+        self._app = app
+        self._local = threading.local()
+
+    def request(self, method, path, headers, body, content_type):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self._app.test_client()
+        response = client.open(path, method=method, headers=headers, data=body, content_type=content_type)
+        return response.status_code, response.get_json(silent=True)
+
+class VercelTarget:
+    """
+    Sends requests through the Vercel handler with serverless-style events.
+    """
+    def __init__(self):
+        from vercel_wrapper import handler
+        self._handler = handler
+
+    def request(self, method, path, headers, body, content_type):
+        event_headers = {key.lower(): value for key, value in headers.items()}
+        if content_type:
+            event_headers['content-type'] = content_type
+        event = {
+            'method': method,
+            'path': path,
+            'queryString': '',
+            'headers': event_headers,
+            'body': body or ''
+        }
+        if isinstance(body, bytes):
+            # The platform delivers binary bodies, such as image uploads, as base64
+            event['body'] = base64.b64encode(body).decode('ascii')
+            event['isBase64Encoded'] = True
+        result = self._handler(event, None)
+        try:
+            payload = json.loads(result['body'])
+        except (TypeError, ValueError):
+            payload = None
+        return result['statusCode'], payload
+
+class HttpTarget:
+    """
+    Sends requests to a running server over HTTP.
+    """
+    def __init__(self, base_url):
+        self._base_url = base_url.rstrip('/')
+
+    def request(self, method, path, headers, body, content_type):
+        headers = dict(headers)
+        if content_type:
+            headers['Content-Type'] = content_type
+        req = urllib.request.Request(self._base_url + path, data=body, headers=headers, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=30) as response:
+                status, raw = response.status, response.read()
+        except urllib.error.HTTPError as err:
+            status, raw = err.code, err.read()
+        try:
+            payload = json.loads(raw)
+        except ValueError:
+            payload = None
+        return status, payload
+
+class Recorder:
+    """
+    Collects latencies and errors per route.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, route, duration, ok):
+        with self._lock:
+            self.latencies.setdefault(route, []).append(duration)
+            if not ok:
+                self.errors[route] = self.errors.get(route, 0) + 1
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class VirtualUser:
+    """
+    Runs the login/accounts flow against a target, recording each call.
+    """
+    def __init__(self, target, recorder, index):
+        self._target = target
+        self._recorder = recorder
+        self._email = f'loadtest-{uuid.uuid4().hex[:12]}-{index}@example.com'
+        self._password = 'loadtest-password'
+        self._token = None
+
+    def _call(self, route, method, path, json_body=None, fields=None, files=None, expected=(200,)):
+        headers = {}
+        if self._token:
+            headers['Authorization'] = f'Bearer {self._token}'
+        body, content_type = None, None
+        if files:
+            body, content_type = encode_multipart(fields or {}, files)
+        elif json_body is not None:
+            body, content_type = json.dumps(json_body).encode(), 'application/json'
+        start = time.perf_counter()
+        status, payload = self._target.request(method, path, headers, body, content_type)
+        self._recorder.record(route, time.perf_counter() - start, status in expected)
+        return status, payload or {}
+
+    def setup(self):
+        self._call('POST /signup', 'POST', '/signup', json_body={
+            'email': self._email,
+            'password': self._password,
+            'confirmPassword': self._password,
+            'name': 'Load Test'
+        }, expected=(201,))
+
+    def iterate(self):
+        status, payload = self._call('POST /login', 'POST', '/login', json_body={'email': self._email, 'password': self._password})
+        self._token = payload.get('token')
+        if not self._token:
+            return
+
+        self._call('GET /accounts', 'GET', '/accounts')
+
+        suffix = uuid.uuid4().hex[:8]
+        status, payload = self._call('POST /accounts', 'POST', '/accounts',
+                                     fields={'site': 'https://example.com/', 'username': 'user', 'password': 'secret'},
+                                     files={'image': (f'icon-{suffix}.png', PNG_IMAGE, 'image/png')})
+        account_id = payload.get('accountId')
+        if account_id is None:
+            return
+
+        self._call('PUT /accounts/<id>', 'PUT', f'/accounts/{account_id}',
+                   fields={'site': 'https://example.org/', 'username': 'user2', 'password': 'secret2'},
+                   files={'image': (f'icon-{suffix}-2.png', PNG_IMAGE, 'image/png')})
+        self._call('GET /accounts', 'GET', '/accounts')
+        self._call('DELETE /accounts/<id>', 'DELETE', f'/accounts/{account_id}')
+
+def make_target(name):
+    if name == 'inprocess':
+        return InProcessTarget()
+    if name == 'vercel':
+        return VercelTarget()
+    if name.startswith('http://') or name.startswith('https://'):
+        return HttpTarget(name)
+    raise ValueError(f'Unknown target: {name}')
+
+def run(target_name, users, duration, iterations):
+    """
+    Drive the flow with `users` concurrent virtual users.
+
+    Stops after `iterations` flows per user, or after `duration` seconds.
+
+    Returns:
+        dict: Report with overall and per-route RPS and latency percentiles
+    """
+    target = make_target(target_name)
+    recorder = Recorder()
+    virtual_users = [VirtualUser(target, recorder, i) for i in range(users)]
+    for virtual_user in virtual_users:
+        virtual_user.setup()
+    recorder.latencies.clear()
+    recorder.errors.clear()
+
+    deadline = time.perf_counter() + duration if duration else None
+
+    def worker(virtual_user):
+        done = 0
+        while (iterations is None or done < iterations) and (deadline is None or time.perf_counter() < deadline):
+            virtual_user.iterate()
+            done += 1
+
+    threads = [threading.Thread(target=worker, args=(virtual_user,)) for virtual_user in virtual_users]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    routes = {}
+    total_requests = 0
+    for route, values in sorted(recorder.latencies.items()):
+        values.sort()
+        total_requests += len(values)
+        routes[route] = {
+            'requests': len(values),
+            'errors': recorder.errors.get(route, 0),
+            'rps': len(values) / elapsed,
+            'p50_ms': percentile(values, 0.50) * 1000,
+            'p95_ms': percentile(values, 0.95) * 1000,
+            'p99_ms': percentile(values, 0.99) * 1000
+        }
+
+    return {
+        'target': target_name,
+        'users': users,
+        'elapsed_s': elapsed,
+        'requests': total_requests,
+        'errors': sum(recorder.errors.values()),
+        'rps': total_requests / elapsed if elapsed else 0.0,
+        'routes': routes
+    }
+
+def print_report(report):
+    print(f"Target: {report['target']}  users: {report['users']}  elapsed: {report['elapsed_s']:.1f}s")
+    print(f"Requests: {report['requests']}  errors: {report['errors']}  throughput: {report['rps']:.1f} req/s")
+    print()
+    print(f"{'route':<24}{'requests':>10}{'errors':>8}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, stats in report['routes'].items():
+        print(f"{route:<24}{stats['requests']:>10}{stats['errors']:>8}{stats['rps']:>10.1f}"
+              f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Load test the backend with realistic user flows.')
+    parser.add_argument('--target', default='inprocess', help="'inprocess', 'vercel' or a base URL")
+    parser.add_argument('--users', type=int, default=4, help='Concurrent virtual users')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run (ignored with --iterations)')
+    parser.add_argument('--iterations', type=int, default=None, help='Flows per user')
+    parser.add_argument('--json', dest='json_path', default=None, help='Write the report as JSON to this file')
+    args = parser.parse_args()
+
+    if not args.target.startswith('http'):
+        os.environ.setdefault('LOCAL_SUPABASE_DB', ':memory:')
+        os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    report = run(args.target, args.users, None if args.iterations else args.duration, args.iterations)
+    print_report(report)
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,556 @@
+"""
+Local stand-in for the Supabase client, for development and load testing.
+
+Tables are backed by SQLite (one JSON document per row, so any column the
+controllers use works without a schema) and storage objects are kept in
+memory. Only the parts of the PostgREST query builder and Storage API that
+this backend uses are implemented.
+
+Enable it by setting LOCAL_SUPABASE_DB to a SQLite path or ':memory:'.
+LOCAL_SUPABASE_LATENCY_MS adds a simulated network round trip to every
+query and storage call, so concurrency behaviour resembles a real project.
+Faults can be injected too (LocalFaults): a share of slow calls
+(LOCAL_SUPABASE_SLOW_RATE, LOCAL_SUPABASE_SLOW_MS) and of failing calls
+(LOCAL_SUPABASE_ERROR_RATE). Calls slower than their timeout raise
+TimeoutError, as the real client's HTTP timeouts do.
+AsyncLocalSupabaseClient exposes the same data with awaitable execute(),
+upload() and remove(), mirroring the async Supabase client.
+"""
+
+import asyncio
+import json
+import os
+import random
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+DEFAULT_PUBLIC_URL = 'http://localhost:54321'
+
+# Column defaults applied on insert, mirroring sql/supabase_tables.sql
+TABLE_DEFAULTS = {
+    'users': {
+        'token_version': 0
+    },
+    'otps': {
+        'attempts': 0
+    }
+}
+
+# Unique columns, mirroring sql/supabase_tables.sql
+TABLE_UNIQUE = {
+    'users': ('email',),
+    'otps': ('email',)
+}
+
+# Tables whose rows get a created_at timestamp on insert
+TIMESTAMPED_TABLES = ('otps',)
+
+# Tables whose rows get updated_at on every write and leave a tombstone in
+# deleted_rows when deleted, mirroring the triggers in sql/supabase_tables.sql
+SYNCED_TABLES = ('accounts', 'items')
+
+_OPERATORS = {
+    'eq': '=',
+    'neq': '!=',
+    'gt': '>',
+    'gte': '>=',
+    'lt': '<',
+    'lte': '<='
+}
+
+class LocalFaults:
+    """
+    Simulated network behaviour, shared by a stand-in's tables and storage.
+
+    Every call waits latency seconds, or slow_latency for a slow_rate share
+    of calls. A call whose wait exceeds its timeout gives up after the
+    timeout with TimeoutError; otherwise an error_rate share of calls fail
+    with ConnectionError. Attributes can be changed at any time.
+    """
+    def __init__(self, latency=0.0, error_rate=0.0, slow_rate=0.0, slow_latency=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+
+    def _plan(self, timeout):
+        delay = self.slow_latency if self.slow_rate and random.random() < self.slow_rate else self.latency
+        if timeout is not None and delay > timeout:
+            return timeout, TimeoutError('local stand-in: timed out after %ss' % timeout)
+        if self.error_rate and random.random() < self.error_rate:
+            return delay, ConnectionError('local stand-in: injected fault')
+        return delay, None
+
+    def wait(self, timeout=None):
+        delay, error = self._plan(timeout)
+        if delay:
+            time.sleep(delay)
+        if error:
+            raise error
+
+    async def wait_async(self, timeout=None):
+        delay, error = self._plan(timeout)
+        if delay:
+            await asyncio.sleep(delay)
+        if error:
+            raise error
+
+def _utcnow_iso():
+    # Fixed width, so stored timestamps compare correctly as strings
+    return datetime.now(timezone.utc).isoformat(timespec='microseconds')
+
+def _column_sql(column):
+    if column == 'id':
+        return 'id'
+    return "json_extract(doc, '$.\"%s\"')" % column.replace('"', '')
+
+class LocalQuery:
+    """
+    A minimal PostgREST-style query builder backed by SQLite.
+    """
+    def __init__(self, client, table_name):
+        self._client = client
+        self._table_name = table_name
+        self._operation = None
+        self._columns = None
+        self._payload = None
+        self._on_conflict = None
+        self._count = None
+        self._filters = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+        # Set per query by supabase_client.InstrumentedQuery (seconds)
+        self.timeout = None
+
+    # Operations
+
+    def select(self, columns='*', count=None):
+        self._operation = 'select'
+        self._columns = [c.strip() for c in columns.split(',')] if columns and columns.strip() != '*' else None
+        self._count = count
+        return self
+
+    def insert(self, data):
+        self._operation = 'insert'
+        self._payload = data
+        return self
+
+    def upsert(self, data, on_conflict=None):
+        self._operation = 'upsert'
+        self._payload = data
+        self._on_conflict = on_conflict
+        return self
+
+    def update(self, data):
+        self._operation = 'update'
+        self._payload = data
+        return self
+
+    def delete(self):
+        self._operation = 'delete'
+        return self
+
+    # Filters and modifiers
+
+    def _filter(self, operator, column, value):
+        self._filters.append(('%s %s ?' % (_column_sql(column), _OPERATORS[operator]), [value]))
+        return self
+
+    def eq(self, column, value):
+        return self._filter('eq', column, value)
+
+    def neq(self, column, value):
+        return self._filter('neq', column, value)
+
+    def gt(self, column, value):
+        return self._filter('gt', column, value)
+
+    def gte(self, column, value):
+        return self._filter('gte', column, value)
+
+    def lt(self, column, value):
+        return self._filter('lt', column, value)
+
+    def lte(self, column, value):
+        return self._filter('lte', column, value)
+
+    def in_(self, column, values):
+        values = list(values)
+        if not values:
+            self._filters.append(('0', []))
+        else:
+            self._filters.append(('%s IN (%s)' % (_column_sql(column), ','.join('?' * len(values))), values))
+        return self
+
+    def order(self, column, desc=False):
+        self._order.append('%s %s' % (_column_sql(column), 'DESC' if desc else 'ASC'))
+        return self
+
+    def limit(self, size):
+        self._limit = size
+        return self
+
+    def range(self, start, end):
+        self._offset = start
+        self._limit = end - start + 1
+        return self
+
+    # Execution
+
+    def _where(self):
+        if not self._filters:
+            return '', []
+        clauses = [clause for clause, _ in self._filters]
+        params = [param for _, values in self._filters for param in values]
+        return ' WHERE ' + ' AND '.join(clauses), params
+
+    def _project(self, row):
+        if self._columns is None:
+            return row
+        return {column: row.get(column) for column in self._columns}
+
+    def execute(self):
+        self._client.faults.wait(self.timeout)
+        return self._run()
+
+    def _run(self):
+        with self._client._lock:
+            self._client._ensure_table(self._table_name)
+            try:
+                data, count = getattr(self, '_execute_' + self._operation)()
+                self._client._conn.commit()
+            except ValueError as err:
+                self._client._conn.rollback()
+                return SimpleNamespace(data=[], error=str(err), count=None)
+        return SimpleNamespace(data=data, error=None, count=count)
+
+    def _matching(self, apply_window=False):
+        where, params = self._where()
+        sql = 'SELECT id, doc FROM "%s"%s' % (self._table_name, where)
+        if apply_window:
+            sql += ' ORDER BY ' + (', '.join(self._order) if self._order else 'id')
+            if self._limit is not None:
+                sql += ' LIMIT %d' % self._limit
+                if self._offset:
+                    sql += ' OFFSET %d' % self._offset
+        rows = self._client._conn.execute(sql, params).fetchall()
+        return [dict(json.loads(doc), id=row_id) for row_id, doc in rows]
+
+    def _execute_select(self):
+        rows = self._matching(apply_window=True)
+        count = None
+        if self._count:
+            where, params = self._where()
+            count = self._client._conn.execute('SELECT COUNT(*) FROM "%s"%s' % (self._table_name, where), params).fetchone()[0]
+        return [self._project(row) for row in rows], count
+
+    def _insert_row(self, row):
+        row = dict(TABLE_DEFAULTS.get(self._table_name, {}), **row)
+        if self._table_name in TIMESTAMPED_TABLES:
+            row.setdefault('created_at', _utcnow_iso())
+        if self._table_name in SYNCED_TABLES:
+            row['updated_at'] = _utcnow_iso()
+        for column in TABLE_UNIQUE.get(self._table_name, ()):
+            if row.get(column) is not None and self._client._find(self._table_name, column, row[column]):
+                raise ValueError('duplicate key value violates unique constraint "%s_%s_key"' % (self._table_name, column))
+        row.pop('id', None)
+        cursor = self._client._conn.execute('INSERT INTO "%s" (doc) VALUES (?)' % self._table_name, (json.dumps(row, default=str),))
+        return dict(row, id=cursor.lastrowid)
+
+    def _write_row(self, row):
+        row_id = row['id']
+        if self._table_name in SYNCED_TABLES:
+            row['updated_at'] = _utcnow_iso()
+        doc = {key: value for key, value in row.items() if key != 'id'}
+        self._client._conn.execute('UPDATE "%s" SET doc = ? WHERE id = ?' % self._table_name, (json.dumps(doc, default=str), row_id))
+
+    def _execute_insert(self):
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        return [self._insert_row(row) for row in rows], None
+
+    def _execute_upsert(self):
+        rows = self._payload if isinstance(self._payload, list) else [self._payload]
+        key = self._on_conflict or 'id'
+        result = []
+        for row in rows:
+            existing = self._client._find(self._table_name, key, row.get(key)) if row.get(key) is not None else None
+            if existing:
+                merged = dict(existing, **row)
+                self._write_row(merged)
+                result.append(merged)
+            else:
+                result.append(self._insert_row(row))
+        return result, None
+
+    def _execute_update(self):
+        rows = self._matching()
+        for row in rows:
+            row.update(self._payload)
+            self._write_row(row)
+        return rows, None
+
+    def _execute_delete(self):
+        rows = self._matching()
+        if rows:
+            self._client._conn.execute(
+                'DELETE FROM "%s" WHERE id IN (%s)' % (self._table_name, ','.join('?' * len(rows))),
+                [row['id'] for row in rows]
+            )
+            if self._table_name in SYNCED_TABLES:
+                self._record_deleted(rows)
+        return rows, None
+
+    def _record_deleted(self, rows):
+        self._client._ensure_table('deleted_rows')
+        deleted_at = _utcnow_iso()
+        self._client._conn.executemany('INSERT INTO deleted_rows (doc) VALUES (?)', [
+            (json.dumps({'table_name': self._table_name, 'row_id': row['id'], 'user_id': row.get('user_id'), 'deleted_at': deleted_at}),)
+            for row in rows
+        ])
+
+class LocalStorageResponse:
+    """
+    Mimics the httpx response the storage client returns.
+    """
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def json(self):
+        return self._body
+
+class LocalBucket:
+    """
+    In-memory stand-in for a Supabase Storage bucket.
+    """
+    def __init__(self, storage, bucket_name):
+        self._storage = storage
+        self._bucket_name = bucket_name
+
+    @property
+    def _objects(self):
+        return self._storage._buckets.setdefault(self._bucket_name, {})
+
+    def upload(self, file, path, file_options=None):
+        self._storage._wait()
+        return self._upload(file, path, file_options)
+
+    def _upload(self, file, path, file_options=None):
+        file_options = file_options or {}
+        content = file.read() if hasattr(file, 'read') else bytes(file)
+        with self._storage._lock:
+            if path in self._objects and str(file_options.get('upsert', 'false')).lower() != 'true':
+                return LocalStorageResponse(400, {'statusCode': '409', 'error': 'Duplicate', 'message': 'The resource already exists'})
+            self._objects[path] = {
+                'content': content,
+                'content_type': file_options.get('content-type', 'application/octet-stream'),
+                'cache_control': file_options.get('cache-control'),
+                'created_at': datetime.now(timezone.utc).isoformat()
+            }
+        return LocalStorageResponse(200, {'Key': '%s/%s' % (self._bucket_name, path)})
+
+    def remove(self, paths):
+        self._storage._wait()
+        return self._remove(paths)
+
+    def _remove(self, paths):
+        with self._storage._lock:
+            removed = [{'name': path} for path in paths if self._objects.pop(path, None) is not None]
+        return LocalStorageResponse(200, removed)
+
+    def download(self, path):
+        self._storage._wait()
+        if path not in self._objects:
+            raise ValueError('Object not found')
+        return self._objects[path]['content']
+
+    def download_head(self, path, length):
+        # What a ranged GET of the object returns
+        return self.download(path)[:length]
+
+    def list(self, path=None, options=None):
+        self._storage._wait()
+        options = options or {}
+        prefix = (path.rstrip('/') + '/') if path else ''
+        search = options.get('search', '')
+        entries = [{'name': name[len(prefix):], 'created_at': obj.get('created_at'),
+                    'metadata': {'size': len(obj['content']), 'mimetype': obj['content_type']}}
+                   for name, obj in self._objects.items()
+                   if name.startswith(prefix) and '/' not in name[len(prefix):] and search in name[len(prefix):]]
+        sort = options.get('sortBy') or {'column': 'name', 'order': 'asc'}
+        entries.sort(key=lambda entry: entry.get(sort['column']) or '', reverse=sort.get('order') == 'desc')
+        offset = options.get('offset', 0)
+        return entries[offset:offset + options.get('limit', 100)]
+
+    def create_signed_upload_url(self, path):
+        self._storage._wait()
+        token = secrets.token_urlsafe(16)
+        with self._storage._lock:
+            self._storage._upload_tokens[token] = (self._bucket_name, path)
+        return {
+            'signed_url': '%s/storage/v1/object/upload/sign/%s/%s?token=%s' % (self._storage._public_url, self._bucket_name, path, token),
+            'token': token,
+            'path': path
+        }
+
+    def upload_to_signed_url(self, path, token, file, file_options=None):
+        # What the browser does with the signed URL; each token uploads once
+        self._storage._wait()
+        with self._storage._lock:
+            if self._storage._upload_tokens.get(token) != (self._bucket_name, path):
+                return LocalStorageResponse(400, {'statusCode': '403', 'error': 'Unauthorized', 'message': 'Invalid upload token'})
+            del self._storage._upload_tokens[token]
+        return self._upload(file, path, file_options)
+
+    def get_public_url(self, path):
+        return '%s/storage/v1/object/public/%s/%s' % (self._storage._public_url, self._bucket_name, path)
+
+    def create_signed_url(self, path, expires_in):
+        self._storage._wait()
+        return {'signedURL': self._signed_url(path, expires_in)}
+
+    def create_signed_urls(self, paths, expires_in):
+        self._storage._wait()
+        return [{'path': path, 'signedURL': self._signed_url(path, expires_in), 'error': None} for path in paths]
+
+    def _signed_url(self, path, expires_in):
+        # Not a real signature: the stand-in does not serve objects over HTTP
+        expires_at = int(time.time()) + int(expires_in)
+        return '%s/storage/v1/object/sign/%s/%s?token=local.%d' % (self._storage._public_url, self._bucket_name, path, expires_at)
+
+class LocalStorage:
+    """
+    In-memory stand-in for the Supabase Storage client.
+    """
+    def __init__(self, public_url, faults=None):
+        self._public_url = public_url.rstrip('/')
+        self._buckets = {'images': {}}
+        # Signed upload token -> (bucket, path)
+        self._upload_tokens = {}
+        self._lock = threading.Lock()
+        self.faults = faults or LocalFaults()
+        # Applies to every storage call, like the real client's storage_client_timeout
+        self.timeout = None
+
+    def _wait(self):
+        self.faults.wait(self.timeout)
+
+    def from_(self, bucket_name):
+        return LocalBucket(self, bucket_name)
+
+    def get_bucket(self, bucket_name):
+        self._wait()
+        if bucket_name not in self._buckets:
+            raise ValueError('Bucket not found')
+        return {'id': bucket_name, 'name': bucket_name, 'public': True}
+
+    def list_buckets(self):
+        self._wait()
+        return [{'id': name, 'name': name, 'public': True} for name in self._buckets]
+
+class LocalSupabaseClient:
+    """
+    Drop-in replacement for supabase.Client backed by SQLite and memory.
+    """
+    def __init__(self, database=':memory:', public_url=DEFAULT_PUBLIC_URL, latency=0.0, faults=None):
+        self._database = database
+        self._connection = None
+        self._pid = None
+        self._lock = threading.RLock()
+        self._tables = set()
+        self.faults = faults or LocalFaults(latency)
+        self.storage = LocalStorage(public_url, self.faults)
+
+    @property
+    def _conn(self):
+        # Connect per process: SQLite connections must not cross a fork
+        # (e.g. gunicorn --preload); share data between workers with a file path
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self._database, check_same_thread=False, timeout=30)
+            self._pid = os.getpid()
+            self._tables = set()
+        return self._connection
+
+    def _ensure_table(self, table_name):
+        if table_name not in self._tables:
+            self._conn.execute('CREATE TABLE IF NOT EXISTS "%s" (id INTEGER PRIMARY KEY AUTOINCREMENT, doc TEXT NOT NULL)' % table_name)
+            self._tables.add(table_name)
+
+    def _find(self, table_name, column, value):
+        row = self._conn.execute(
+            'SELECT id, doc FROM "%s" WHERE %s = ? LIMIT 1' % (table_name, _column_sql(column)), (value,)
+        ).fetchone()
+        return dict(json.loads(row[1]), id=row[0]) if row else None
+
+    def table(self, table_name):
+        return LocalQuery(self, table_name)
+
+    from_ = table
+
+class AsyncLocalQuery:
+    """
+    Awaitable wrapper around LocalQuery; the simulated latency is awaited
+    instead of slept, so it does not hold a thread.
+    """
+    def __init__(self, query):
+        self._query = query
+        self.timeout = None
+
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+
+        def call(*args, **kwargs):
+            attr(*args, **kwargs)
+            return self
+        return call
+
+    async def execute(self):
+        await self._query._client.faults.wait_async(self.timeout)
+        return self._query._run()
+
+class AsyncLocalBucket:
+    """
+    Awaitable counterpart of LocalBucket, matching the async storage client.
+    """
+    def __init__(self, bucket):
+        self._bucket = bucket
+
+    async def _wait(self):
+        storage = self._bucket._storage
+        await storage.faults.wait_async(storage.timeout)
+
+    async def upload(self, path, file, file_options=None):
+        await self._wait()
+        return self._bucket._upload(file, path, file_options)
+
+    async def remove(self, paths):
+        await self._wait()
+        return self._bucket._remove(paths)
+
+    async def get_public_url(self, path):
+        return self._bucket.get_public_url(path)
+
+class AsyncLocalStorage:
+    def __init__(self, storage):
+        self._storage = storage
+
+    def from_(self, bucket_name):
+        return AsyncLocalBucket(self._storage.from_(bucket_name))
+
+class AsyncLocalSupabaseClient:
+    """
+    Async view of a LocalSupabaseClient, sharing its tables and storage.
+    """
+    def __init__(self, client):
+        self._client = client
+        self.storage = AsyncLocalStorage(client.storage)
+
+    def table(self, table_name):
+        return AsyncLocalQuery(LocalQuery(self._client, table_name))
+
+    from_ = table
@@ -3,69 +3,90 @@ import logging
 from functools import wraps
 from flask import request, jsonify
 from config import Config
-from supabase_client import supabase
+from logging_config import log_sampled
+from utils.tokens import get_token_version
+from utils.instrumentation import span
+from utils.resilience import CircuitOpenError, is_dependency_failure
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def parse_bearer_token(auth_header):
+    """
+    Extract the token from an 'Authorization: Bearer <token>' header value.
+    """
+    if auth_header:
+        parts = auth_header.split(' ')
+        if len(parts) == 2 and parts[0] == 'Bearer':
+            return parts[1]
+    return None
+
+def decode_token(token):
+    """
+    Decode and verify a JWT, raising jwt.InvalidTokenError (or a subclass) if it is invalid.
+    """
+    with span('jwt'):
+        return jwt.decode(token, Config.JWT_SECRET, algorithms=['HS256'], options={'require': ['exp', 'iat']})
+
 def authenticate_token(f):
     """
     Middleware to authenticate JWT tokens.
+    
+    The user columns the view declared with user_columns are read along
+    with the token version whenever that has to be looked up.
     """
+    columns = getattr(f, 'user_columns', None)
+    
     @wraps(f)
     def decorated_function(*args, **kwargs):
         try:
-            auth_header = request.headers.get('Authorization')
-            token = None
-            
-            if auth_header:
-                parts = auth_header.split(' ')
-                if len(parts) == 2 and parts[0] == 'Bearer':
-                    token = parts[1]
-            
-            logger.info(f"authenticateToken: Incoming request to: {request.path}")
-            logger.info(f"authenticateToken: Incoming token: {token[:10] + '...' if token else 'No token'}")
+            token = parse_bearer_token(request.headers.get('Authorization'))
             
             if not token:
-                logger.info(f"authenticateToken: No token provided for request to: {request.path}")
+                logger.debug("authenticateToken: No token provided for request to: %s", request.path)
                 return jsonify({'success': False, 'message': 'Access token required.'}), 401
             
             try:
                 # Decode the JWT token
-                user = jwt.decode(token, Config.JWT_SECRET, algorithms=['HS256'])
-                logger.info(f"authenticateToken: JWT verified for user: {user.get('email')}, ID: {user.get('id')}")
+                user = decode_token(token)
                 
-                # Verify token exists in database
-                response = supabase.table('users').select('id, email').eq('id', user['id']).eq('token', token).execute()
+                # Verify the token has not been revoked by comparing its version
+                with span('auth'):
+                    try:
+                        result = get_token_version(user['id'], columns)
+                    except Exception as err:
+                        # An unverified token version is not trusted: the token may be revoked
+                        if not (isinstance(err, CircuitOpenError) or is_dependency_failure(err)):
+                            raise
+                        logger.error("authenticateToken: %s, Request to: %s", err, request.path)
+                        return jsonify({'success': False, 'message': 'Authentication is temporarily unavailable. Please try again shortly.'}), 503
                 
-                if response.error:
-                    logger.error(f"authenticateToken: DB Error during token validation for request to: {request.path}, Error: {response.error}")
+                if result['error']:
+                    logger.error("authenticateToken: DB Error during token validation for request to: %s, Error: %s", request.path, result['error'])
                     return jsonify({'success': False, 'message': 'An error occurred during token validation.'}), 500
                 
-                users = response.data
-                
-                if not users or len(users) == 0:
-                    logger.info(f"authenticateToken: Token not found in DB or revoked for user: {user.get('email')}, ID: {user.get('id')}, Request to: {request.path}")
+                if result['token_version'] is None or result['token_version'] != user.get('token_version', 0):
+                    logger.info("authenticateToken: Token revoked or user not found for user: %s, ID: %s, Request to: %s", user.get('email'), user.get('id'), request.path)
                     return jsonify({'success': False, 'message': 'Invalid token. Please log in again.'}), 403
                 
-                stored_user = users[0]
                 # Add user info to request context
-                request.user = {'id': stored_user['id'], 'email': stored_user['email']}
-                logger.info(f"authenticateToken: Token successfully validated in DB for user: {request.user['email']}, Request to: {request.path}")
+                request.user = {'id': user['id'], 'email': user['email']}
+                log_sampled(logger, logging.DEBUG, "authenticateToken: Token successfully validated for user: %s, Request to: %s", request.user['email'], request.path)
                 
                 # Call the original function with user info
                 return f(*args, **kwargs)
                 
             except jwt.ExpiredSignatureError:
-                logger.error(f"authenticateToken: JWT expired for request to: {request.path}")
+                logger.error("authenticateToken: JWT expired for request to: %s", request.path)
                 return jsonify({'success': False, 'message': 'Token has expired. Please log in again.'}), 403
             except jwt.InvalidTokenError:
-                logger.error(f"authenticateToken: JWT invalid for request to: {request.path}")
+                logger.error("authenticateToken: JWT invalid for request to: %s", request.path)
                 return jsonify({'success': False, 'message': 'Invalid token. Please log in again.'}), 403
-                
+            
+        except CircuitOpenError as err:
+            logger.error("authenticateToken: %s, Request to: %s", err, request.path)
+            return jsonify({'success': False, 'message': 'Authentication is temporarily unavailable. Please try again shortly.'}), 503
         except Exception as err:
-            logger.error(f"authenticateToken: Unexpected error for request to: {request.path}, Error: {str(err)}")
+            logger.error("authenticateToken: Unexpected error for request to: %s, Error: %s", request.path, err)
             return jsonify({'success': False, 'message': 'An unexpected error occurred during authentication.'}), 500
     
     return decorated_function
\ No newline at end of file
@@ -0,0 +1,47 @@
+"""
+Data access for users, accounts, items, otps and deletion tombstones.
+
+DATA_BACKEND selects the store: 'supabase' (default) goes through the
+PostgREST client, 'sql' talks to Postgres directly via DATABASE_URL.
+"""
+
+import logging
+from config import Config
+from repositories.base import Result, Store
+from repositories.users import UserRepository
+from repositories.accounts import AccountRepository
+from repositories.items import ItemRepository
+from repositories.otps import OtpRepository
+from repositories.tombstones import TombstoneRepository
+
+logger = logging.getLogger(__name__)
+
+def create_store(backend=None):
+    """
+    Create the store for a backend name (default: Config.DATA_BACKEND).
+    """
+    backend = backend or Config.DATA_BACKEND
+    if backend == 'sql':
+        from repositories.sql_store import SqlStore
+        logger.info("Using direct SQL data backend")
+        return SqlStore(Config.DATABASE_URL, Config.DATABASE_POOL_MIN_SIZE, Config.DATABASE_POOL_MAX_SIZE)
+    if backend == 'supabase':
+        from repositories.supabase_store import SupabaseStore
+        from supabase_client import supabase
+        return SupabaseStore(supabase)
+    raise ValueError(f'Unknown DATA_BACKEND: {backend}')
+
+# Mirror supabase_client: a failed backend logs and leaves an unready store
+# (reported by /health/ready) instead of crashing the import
+try:
+    store = create_store()
+except Exception as e:
+    logger.error("Failed to initialize %s data backend: %s", Config.DATA_BACKEND, e)
+    from repositories.supabase_store import SupabaseStore
+    store = SupabaseStore(None)
+
+user_repository = UserRepository(store)
+account_repository = AccountRepository(store)
+item_repository = ItemRepository(store)
+otp_repository = OtpRepository(store)
+tombstone_repository = TombstoneRepository(store)
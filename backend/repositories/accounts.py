@@ -0,0 +1,42 @@
+class AccountRepository:
+    """
+    Queries against the accounts table, always scoped to the owning user.
+    """
+    def __init__(self, store):
+        self._store = store
+
+    def list_for_user(self, user_id, columns='*', limit=None):
+        # A limited list is a page, so it needs a stable order
+        order = [('id', False)] if limit is not None else ()
+        return self._store.select('accounts', columns, [('user_id', 'eq', user_id)], order, limit)
+
+    def get_for_user(self, account_id, user_id, columns='*'):
+        return self._store.select('accounts', columns, [('id', 'eq', account_id), ('user_id', 'eq', user_id)])
+
+    def changed_since(self, user_id, since=None, columns='*', limit=None):
+        # Oldest change first, so a page ends at a usable watermark
+        filters = [('user_id', 'eq', user_id)]
+        if since is not None:
+            filters.append(('updated_at', 'gt', since))
+        return self._store.select('accounts', columns, filters, [('updated_at', False), ('id', False)], limit)
+
+    def page_for_user(self, user_id, after_id=0, columns='*', limit=1000):
+        # Keyset pagination: cheap at any depth, unlike offsets
+        return self._store.select('accounts', columns, [('user_id', 'eq', user_id), ('id', 'gt', after_id)], [('id', False)], limit, hedge=False)
+
+    def page_all(self, after_id=0, columns='*', limit=1000):
+        # Every user's rows, for the admin export (export_vault.py) only
+        return self._store.select('accounts', columns, [('id', 'gt', after_id)], [('id', False)], limit, hedge=False)
+
+    def with_images(self, images, columns='image'):
+        # Rows of every user that reference these images, for the upload sweeper only
+        return self._store.select('accounts', columns, [('image', 'in', images)], hedge=False)
+
+    def create(self, row):
+        return self._store.insert('accounts', row)
+
+    def update_for_user(self, account_id, user_id, values):
+        return self._store.update('accounts', values, [('id', 'eq', account_id), ('user_id', 'eq', user_id)])
+
+    def delete_for_user(self, account_id, user_id):
+        return self._store.delete('accounts', [('id', 'eq', account_id), ('user_id', 'eq', user_id)])
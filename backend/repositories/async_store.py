@@ -0,0 +1,56 @@
+import asyncio
+from config import Config
+from repositories.base import Result, Store
+from repositories.supabase_store import SupabaseStore
+
+class AsyncSupabaseStore(SupabaseStore):
+    """
+    SupabaseStore over the async Supabase client.
+
+    Query building is shared with the sync store; every method returns a
+    coroutine resolving to a Result, so the repositories work unchanged
+    (`await user_repository.get_by_id(...)`).
+    """
+    name = 'supabase-async'
+
+    @staticmethod
+    async def _result(pending):
+        response = await pending
+        return Result(response.data or [], getattr(response, 'error', None))
+
+class ThreadedStore(Store):
+    """
+    Async facade over a synchronous store, running each call on a worker thread.
+    """
+    def __init__(self, store):
+        self._store = store
+        self.name = f'{store.name}-threaded'
+
+    def is_ready(self):
+        return self._store.is_ready()
+
+    async def select(self, *args, **kwargs):
+        return await asyncio.to_thread(self._store.select, *args, **kwargs)
+
+    async def insert(self, *args, **kwargs):
+        return await asyncio.to_thread(self._store.insert, *args, **kwargs)
+
+    async def upsert(self, *args, **kwargs):
+        return await asyncio.to_thread(self._store.upsert, *args, **kwargs)
+
+    async def update(self, *args, **kwargs):
+        return await asyncio.to_thread(self._store.update, *args, **kwargs)
+
+    async def delete(self, *args, **kwargs):
+        return await asyncio.to_thread(self._store.delete, *args, **kwargs)
+
+def create_async_store(async_client, sync_store):
+    """
+    Pick the async store for Config.DATA_BACKEND.
+
+    The supabase backend uses the async client directly; the sql backend
+    runs its pooled, blocking driver on threads.
+    """
+    if Config.DATA_BACKEND == 'supabase':
+        return AsyncSupabaseStore(async_client)
+    return ThreadedStore(sync_store)
@@ -0,0 +1,50 @@
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+# Same shape as the PostgREST responses controllers already check
+Result = namedtuple('Result', ['data', 'error'])
+
+# Filter operators every store understands: (column, operator, value)
+OPERATORS = ('eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'in')
+
+class Store(ABC):
+    """
+    Minimal table interface the repositories are written against.
+
+    Every method returns a Result whose data is a list of row dicts;
+    errors from the database are raised, not returned.
+    Filters are (column, operator, value) tuples combined with AND;
+    order is a list of (column, descending) pairs. hedge=False keeps a
+    select out of hedged reads (bulk reads such as exports).
+    """
+    name = 'base'
+
+    @abstractmethod
+    def select(self, table, columns='*', filters=(), order=(), limit=None, hedge=True):
+        raise NotImplementedError
+
+    @abstractmethod
+    def insert(self, table, row):
+        raise NotImplementedError
+
+    @abstractmethod
+    def upsert(self, table, row, on_conflict):
+        raise NotImplementedError
+
+    @abstractmethod
+    def update(self, table, values, filters):
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, table, filters):
+        raise NotImplementedError
+
+    def is_ready(self):
+        return True
+
+    def ping(self, timeout=None):
+        """
+        Cheap round trip used by the readiness probe, giving up after
+        `timeout` seconds where the backend supports it.
+        """
+        return self.select('users', 'id', limit=1)
@@ -0,0 +1,33 @@
+class ItemRepository:
+    """
+    Queries against the items table, always scoped to the owning user.
+    """
+    def __init__(self, store):
+        self._store = store
+
+    def list_for_user(self, user_id, columns='*'):
+        return self._store.select('items', columns, [('user_id', 'eq', user_id)])
+
+    def changed_since(self, user_id, since=None, columns='*', limit=None):
+        # Oldest change first, so a page ends at a usable watermark
+        filters = [('user_id', 'eq', user_id)]
+        if since is not None:
+            filters.append(('updated_at', 'gt', since))
+        return self._store.select('items', columns, filters, [('updated_at', False), ('id', False)], limit)
+
+    def page_for_user(self, user_id, after_id=0, columns='*', limit=1000):
+        # Keyset pagination: cheap at any depth, unlike offsets
+        return self._store.select('items', columns, [('user_id', 'eq', user_id), ('id', 'gt', after_id)], [('id', False)], limit, hedge=False)
+
+    def page_all(self, after_id=0, columns='*', limit=1000):
+        # Every user's rows, for the admin export (export_vault.py) only
+        return self._store.select('items', columns, [('id', 'gt', after_id)], [('id', False)], limit, hedge=False)
+
+    def create(self, row):
+        return self._store.insert('items', row)
+
+    def update_for_user(self, item_id, user_id, values):
+        return self._store.update('items', values, [('id', 'eq', item_id), ('user_id', 'eq', user_id)])
+
+    def delete_for_user(self, item_id, user_id):
+        return self._store.delete('items', [('id', 'eq', item_id), ('user_id', 'eq', user_id)])
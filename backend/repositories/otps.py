@@ -0,0 +1,31 @@
+class OtpRepository:
+    """
+    Queries against the otps table (one row per email).
+    """
+    def __init__(self, store):
+        self._store = store
+
+    def upsert(self, row):
+        return self._store.upsert('otps', row, on_conflict='email')
+
+    def get_active(self, email, now, columns='*'):
+        return self._store.select('otps', columns, [('email', 'eq', email), ('expires_at', 'gt', now)], limit=1)
+
+    def update(self, otp_id, values):
+        return self._store.update('otps', values, [('id', 'eq', otp_id)])
+
+    def claim_attempt(self, otp_id, attempts):
+        """
+        Count one attempt, only if the row still has `attempts` attempts.
+        No rows back means another attempt got there first.
+        """
+        return self._store.update('otps', {'attempts': attempts + 1}, [('id', 'eq', otp_id), ('attempts', 'eq', attempts)])
+
+    def delete(self, otp_id):
+        return self._store.delete('otps', [('id', 'eq', otp_id)])
+
+    def list_expired_ids(self, now, limit):
+        return self._store.select('otps', 'id', [('expires_at', 'lt', now)], limit=limit)
+
+    def delete_many(self, otp_ids):
+        return self._store.delete('otps', [('id', 'in', otp_ids)])
@@ -0,0 +1,281 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+from config import Config
+from repositories.base import OPERATORS, Result, Store
+from utils.instrumentation import record_span
+from utils.metrics import counter, histogram
+from utils.resilience import BREAKERS
+
+logger = logging.getLogger(__name__)
+
+SQL_REQUESTS = counter(
+    'sql_queries_total',
+    'Direct SQL queries executed, by table, operation and outcome.',
+    labels=('table', 'operation', 'outcome')
+)
+SQL_DURATION = histogram(
+    'sql_query_duration_seconds',
+    'Direct SQL query latency, by table and operation.',
+    labels=('table', 'operation')
+)
+
+_IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+_COMPARISONS = {
+    'eq': '=',
+    'neq': '<>',
+    'gt': '>',
+    'gte': '>=',
+    'lt': '<',
+    'lte': '<='
+}
+
+def _quote(identifier):
+    # Table and column names come from code, but never interpolate anything unchecked
+    if not _IDENTIFIER.match(identifier):
+        raise ValueError(f'Invalid SQL identifier: {identifier!r}')
+    return f'"{identifier}"'
+
+def _columns_sql(columns):
+    if not columns or columns.strip() == '*':
+        return '*'
+    return ', '.join(_quote(column.strip()) for column in columns.split(','))
+
+def _operation_timeout(operation):
+    # Same budgets as PostgREST calls: reads fail sooner than writes
+    return Config.SUPABASE_READ_TIMEOUT if operation == 'select' else Config.SUPABASE_WRITE_TIMEOUT
+
+def _jsonable(value):
+    # PostgREST returns timestamps as ISO strings; keep responses identical
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+class _SqliteDriver:
+    """
+    Single shared SQLite connection, for development and tests.
+    """
+    dialect = 'sqlite'
+
+    def __init__(self, path):
+        # sqlite3 keeps compiled statements in a per-connection cache
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, cached_statements=256)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+    def execute(self, sql, params, timeout=None):
+        # In process: there is no server to wait on
+        with self._lock:
+            cursor = self._conn.execute(sql.replace('%s', '?'), params)
+            return [dict(row) for row in cursor.fetchall()] if cursor.description else []
+
+    def executescript(self, script):
+        with self._lock:
+            self._conn.executescript(script)
+
+class _PostgresDriver:
+    """
+    Pooled psycopg 3 connections with server-side prepared statements.
+    """
+    dialect = 'postgres'
+
+    def __init__(self, url, min_size, max_size):
+        try:
+            from psycopg.rows import dict_row
+            from psycopg_pool import ConnectionPool
+        except ImportError as err:
+            raise RuntimeError('DATA_BACKEND=sql with a Postgres URL requires: pip install "psycopg[binary,pool]"') from err
+
+        self._read_timeout = Config.SUPABASE_READ_TIMEOUT
+        self._open_pool = lambda: ConnectionPool(url, min_size=min_size, max_size=max_size, open=True, configure=self._configure, kwargs={
+            # prepare_threshold=0 prepares every statement on first use per connection;
+            # statement text is stable per query shape, so later calls skip parsing and planning
+            'autocommit': True,
+            'prepare_threshold': 0,
+            'row_factory': dict_row
+        })
+        self._pool = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self, timeout=None):
+        # Open lazily and per process: a pool created before a pre-forking
+        # server (gunicorn --preload) forks must not share its sockets
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pool = self._open_pool()
+                    self._pid = os.getpid()
+        return self._pool.connection(timeout=timeout)
+
+    def _configure(self, conn):
+        # Session default for every new connection, so reads need no extra round trip
+        conn.execute("SELECT set_config('statement_timeout', %s, false)", [f'{int(self._read_timeout * 1000)}ms'])
+
+    def execute(self, sql, params, timeout=None):
+        # The timeout also bounds the wait for a pooled connection
+        with self._connection(timeout) as conn:
+            if timeout is None or timeout == self._read_timeout:
+                cursor = conn.execute(sql, params)
+                return cursor.fetchall() if cursor.description else []
+            # Writes get their own budget for this transaction only
+            with conn.transaction():
+                conn.execute("SELECT set_config('statement_timeout', %s, true)", [f'{int(timeout * 1000)}ms'])
+                cursor = conn.execute(sql, params)
+                return cursor.fetchall() if cursor.description else []
+
+    def ping(self, timeout):
+        # Bounds both the wait for a pooled connection and the query itself;
+        # set_config(..., true) only lasts for this transaction
+        with self._connection(timeout) as conn, conn.transaction():
+            conn.execute("SELECT set_config('statement_timeout', %s, true)", [f'{int(timeout * 1000)}ms'])
+            conn.execute('SELECT 1')
+
+    def close(self):
+        if self._pool is not None and self._pid == os.getpid():
+            self._pool.close()
+
+class SqlStore(Store):
+    """
+    Store that talks to Postgres directly, skipping the PostgREST HTTP hop.
+
+    DATABASE_URL selects the driver: postgresql://... uses a psycopg pool,
+    sqlite:///path (or sqlite:///:memory:) uses the standard library driver,
+    which is handy for tests against the same SQL.
+    """
+    name = 'sql'
+
+    def __init__(self, url, min_size=1, max_size=10):
+        if not url:
+            raise RuntimeError('DATA_BACKEND=sql requires DATABASE_URL')
+        if url.startswith('sqlite:'):
+            path = url[len('sqlite:'):]
+            self._driver = _SqliteDriver(path[3:] if path.startswith('///') else path.lstrip('/'))
+        else:
+            self._driver = _PostgresDriver(url, min_size, max_size)
+        self._statements = {}
+
+    # Statement building (cached per query shape)
+
+    def _where(self, filters, params):
+        clauses = []
+        for column, operator, value in filters:
+            if operator not in OPERATORS:
+                raise ValueError(f'Unsupported filter operator: {operator}')
+            if operator != 'in':
+                clauses.append(f'{_quote(column)} {_COMPARISONS[operator]} %s')
+                params.append(value)
+                continue
+            values = list(value)
+            if self._driver.dialect == 'postgres':
+                # One statement for any list length, so it stays prepared
+                clauses.append(f'{_quote(column)} = ANY(%s)')
+                params.append(values)
+            elif values:
+                clauses.append(f'{_quote(column)} IN ({", ".join(["%s"] * len(values))})')
+                params.extend(values)
+            else:
+                clauses.append('1 = 0')
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else ''
+
+    def _statement(self, key, build):
+        sql = self._statements.get(key)
+        if sql is None:
+            sql = self._statements[key] = build()
+        return sql
+
+    @staticmethod
+    def _filter_shape(filters):
+        return tuple((column, operator, len(value) if operator == 'in' else None) for column, operator, value in filters)
+
+    # Execution
+
+    def _run(self, table, operation, sql, params):
+        # Database errors are raised, as SupabaseStore raises APIError, so
+        # outages trip the breaker, stale fallbacks and the auth 503 path
+        breaker = BREAKERS['database']
+        breaker.before_call()
+        outcome = 'error'
+        start = time.perf_counter()
+        try:
+            rows = self._driver.execute(sql, params, _operation_timeout(operation))
+            outcome = 'ok'
+        except Exception as err:
+            breaker.record_error(err)
+            logger.error("SQL %s on %s failed: %s", operation, table, err)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            record_span('db', f"{table}.{operation}", duration)
+            SQL_DURATION.observe(duration, table, operation)
+            SQL_REQUESTS.inc(table, operation, outcome)
+        breaker.record_success()
+        return Result([{key: _jsonable(value) for key, value in row.items()} for row in rows], None)
+
+    def ping(self, timeout=None):
+        if timeout is None or self._driver.dialect != 'postgres':
+            return super().ping(timeout)
+        self._driver.ping(timeout)
+        return Result([], None)
+
+    def select(self, table, columns='*', filters=(), order=(), limit=None, hedge=True):
+        params = []
+        where = self._where(filters, params)
+        if limit is not None:
+            params.append(limit)
+
+        def build():
+            sql = f'SELECT {_columns_sql(columns)} FROM {_quote(table)}{where}'
+            if order:
+                sql += ' ORDER BY ' + ', '.join(f'{_quote(column)} {"DESC" if descending else "ASC"}' for column, descending in order)
+            if limit is not None:
+                sql += ' LIMIT %s'
+            return sql
+
+        key = ('select', table, columns, self._filter_shape(filters), tuple(order), limit is not None)
+        return self._run(table, 'select', self._statement(key, build), params)
+
+    def insert(self, table, row):
+        names = sorted(row)
+
+        def build():
+            return (f'INSERT INTO {_quote(table)} ({", ".join(_quote(name) for name in names)}) '
+                    f'VALUES ({", ".join(["%s"] * len(names))}) RETURNING *')
+
+        sql = self._statement(('insert', table, tuple(names)), build)
+        return self._run(table, 'insert', sql, [row[name] for name in names])
+
+    def upsert(self, table, row, on_conflict):
+        names = sorted(row)
+
+        def build():
+            updates = ', '.join(f'{_quote(name)} = EXCLUDED.{_quote(name)}' for name in names if name != on_conflict)
+            return (f'INSERT INTO {_quote(table)} ({", ".join(_quote(name) for name in names)}) '
+                    f'VALUES ({", ".join(["%s"] * len(names))}) '
+                    f'ON CONFLICT ({_quote(on_conflict)}) DO UPDATE SET {updates} RETURNING *')
+
+        sql = self._statement(('upsert', table, tuple(names), on_conflict), build)
+        return self._run(table, 'upsert', sql, [row[name] for name in names])
+
+    def update(self, table, values, filters):
+        names = sorted(values)
+        params = [values[name] for name in names]
+        where = self._where(filters, params)
+
+        def build():
+            assignments = ', '.join(f'{_quote(name)} = %s' for name in names)
+            return f'UPDATE {_quote(table)} SET {assignments}{where} RETURNING *'
+
+        sql = self._statement(('update', table, tuple(names), self._filter_shape(filters)), build)
+        return self._run(table, 'update', sql, params)
+
+    def delete(self, table, filters):
+        params = []
+        where = self._where(filters, params)
+        sql = self._statement(('delete', table, self._filter_shape(filters)), lambda: f'DELETE FROM {_quote(table)}{where} RETURNING *')
+        return self._run(table, 'delete', sql, params)
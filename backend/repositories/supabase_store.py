@@ -0,0 +1,58 @@
+from repositories.base import Result, Store
+
+class SupabaseStore(Store):
+    """
+    Store backed by the (instrumented) Supabase client, i.e. PostgREST over HTTP.
+    """
+    name = 'supabase'
+
+    def __init__(self, client):
+        self._client = client
+
+    def is_ready(self):
+        return self._client is not None
+
+    def _table(self, table):
+        if self._client is None:
+            raise RuntimeError('Supabase client is not initialized')
+        return self._client.table(table)
+
+    @staticmethod
+    def _filter(query, filters):
+        for column, operator, value in filters:
+            query = query.in_(column, list(value)) if operator == 'in' else getattr(query, operator)(column, value)
+        return query
+
+    @staticmethod
+    def _result(response):
+        return Result(response.data or [], getattr(response, 'error', None))
+
+    def select(self, table, columns='*', filters=(), order=(), limit=None, hedge=True):
+        query = self._filter(self._table(table).select(columns), filters)
+        for column, descending in order:
+            query = query.order(column, desc=descending)
+        if limit is not None:
+            query = query.limit(limit)
+        # Only the instrumented client hedges
+        if not hedge and hasattr(query, 'unhedged'):
+            query = query.unhedged()
+        return self._result(query.execute())
+
+    def ping(self, timeout=None):
+        query = self._table('users').select('id').limit(1)
+        # Only the instrumented client takes a per-query timeout
+        if timeout is not None and hasattr(query, 'with_timeout'):
+            query = query.with_timeout(timeout)
+        return self._result(query.execute())
+
+    def insert(self, table, row):
+        return self._result(self._table(table).insert(row).execute())
+
+    def upsert(self, table, row, on_conflict):
+        return self._result(self._table(table).upsert(row, on_conflict=on_conflict).execute())
+
+    def update(self, table, values, filters):
+        return self._result(self._filter(self._table(table).update(values), filters).execute())
+
+    def delete(self, table, filters):
+        return self._result(self._filter(self._table(table).delete(), filters).execute())
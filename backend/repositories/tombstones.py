@@ -0,0 +1,12 @@
+class TombstoneRepository:
+    """
+    Queries against deleted_rows, the tombstones left by deleted accounts and items.
+    """
+    def __init__(self, store):
+        self._store = store
+
+    def deleted_since(self, table_name, user_id, since=None, limit=None):
+        filters = [('table_name', 'eq', table_name), ('user_id', 'eq', user_id)]
+        if since is not None:
+            filters.append(('deleted_at', 'gt', since))
+        return self._store.select('deleted_rows', 'row_id, deleted_at', filters, [('deleted_at', False), ('id', False)], limit)
@@ -0,0 +1,30 @@
+class UserRepository:
+    """
+    Queries against the users table.
+    """
+    def __init__(self, store):
+        self._store = store
+
+    def get_by_id(self, user_id, columns='*'):
+        return self._store.select('users', columns, [('id', 'eq', user_id)])
+
+    def get_by_email(self, email, columns='*'):
+        return self._store.select('users', columns, [('email', 'eq', email)])
+
+    def with_profile_pictures(self, pictures, columns='profilepicture'):
+        # Users that reference these pictures, for the upload sweeper only
+        return self._store.select('users', columns, [('profilepicture', 'in', pictures)], hedge=False)
+
+    def create(self, row):
+        return self._store.insert('users', row)
+
+    def update(self, user_id, values):
+        return self._store.update('users', values, [('id', 'eq', user_id)])
+
+    def update_bumping_token_version(self, user_id, values, token_version):
+        """
+        Write values and token_version + 1, only if the row still has
+        `token_version`. No rows back means a concurrent change bumped it first.
+        """
+        return self._store.update('users', dict(values, token_version=token_version + 1),
+                                  [('id', 'eq', user_id), ('token_version', 'eq', token_version)])
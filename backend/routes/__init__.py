@@ -1,4 +1,7 @@
 from .auth import auth_bp
 from .user import user_bp
 from .account import account_bp
-from .item import item_bp
\ No newline at end of file
+from .item import item_bp
+from .health import health_bp
+from .bootstrap import bootstrap_bp
+from .upload import upload_bp
\ No newline at end of file
@@ -5,6 +5,8 @@ from controllers.account_controller import (
     update_account,
     delete_account
 )
+from controllers.export_controller import export_accounts
+from controllers.sync_controller import get_account_changes
 from middleware.auth import authenticate_token
 
 # Create blueprint
@@ -21,6 +23,16 @@ def create_account_route():
 def get_accounts_route():
     return get_accounts()
 
+@account_bp.route('/accounts/changes', methods=['GET'])
+@authenticate_token
+def get_account_changes_route():
+    return get_account_changes()
+
+@account_bp.route('/accounts/export', methods=['GET'])
+@authenticate_token
+def export_accounts_route():
+    return export_accounts()
+
 @account_bp.route('/accounts/<int:account_id>', methods=['PUT'])
 @authenticate_token
 def update_account_route(account_id):
@@ -0,0 +1,14 @@
+from flask import Blueprint
+from controllers.bootstrap_controller import USER_COLUMNS, get_bootstrap
+from middleware.auth import authenticate_token
+from utils.current_user import user_columns
+
+# Create blueprint
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+# Define routes
+@bootstrap_bp.route('/bootstrap', methods=['GET'])
+@authenticate_token
+@user_columns(USER_COLUMNS)
+def bootstrap_route():
+    return get_bootstrap()
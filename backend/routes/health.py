@@ -0,0 +1,16 @@
+from flask import Blueprint, jsonify
+from utils.health import check_readiness
+
+# Create blueprint
+health_bp = Blueprint('health', __name__)
+
+# Define routes
+@health_bp.route('/health/live', methods=['GET'])
+def liveness_route():
+    return jsonify({'status': 'ok'})
+
+@health_bp.route('/health/ready', methods=['GET'])
+def readiness_route():
+    result = check_readiness()
+    status_code = 503 if result['status'] == 'unavailable' else 200
+    return jsonify(result), status_code
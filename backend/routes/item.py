@@ -5,6 +5,8 @@ from controllers.item_controller import (
     update_item,
     delete_item
 )
+from controllers.export_controller import export_items
+from controllers.sync_controller import get_item_changes
 from middleware.auth import authenticate_token
 
 # Create blueprint
@@ -21,6 +23,16 @@ def create_item_route():
 def read_items_route():
     return read_items()
 
+@item_bp.route('/items/changes', methods=['GET'])
+@authenticate_token
+def get_item_changes_route():
+    return get_item_changes()
+
+@item_bp.route('/items/export', methods=['GET'])
+@authenticate_token
+def export_items_route():
+    return export_items()
+
 @item_bp.route('/update', methods=['PUT'])
 @authenticate_token
 def update_item_route():
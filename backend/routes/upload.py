@@ -0,0 +1,19 @@
+from flask import Blueprint
+from controllers.upload_controller import sign_upload, finalize_upload
+from middleware.auth import authenticate_token
+from utils.current_user import user_columns
+
+# Create blueprint
+upload_bp = Blueprint('upload', __name__)
+
+# Define routes
+@upload_bp.route('/uploads/sign', methods=['POST'])
+@authenticate_token
+def sign_upload_route():
+    return sign_upload()
+
+@upload_bp.route('/uploads/finalize', methods=['POST'])
+@authenticate_token
+@user_columns('profilepicture')
+def finalize_upload_route():
+    return finalize_upload()
@@ -5,9 +5,11 @@ from controllers.user_controller import (
     upload_profile_picture,
     get_profile_picture,
     verify_current_password,
-    change_password
+    change_password,
+    USER_INFO_COLUMNS
 )
 from middleware.auth import authenticate_token
+from utils.current_user import user_columns
 
 # Create blueprint
 user_bp = Blueprint('user', __name__)
@@ -15,6 +17,7 @@ user_bp = Blueprint('user', __name__)
 # Define routes
 @user_bp.route('/user-info', methods=['GET'])
 @authenticate_token
+@user_columns(USER_INFO_COLUMNS)
 def user_info_route():
     return get_user_info()
 
@@ -25,20 +28,24 @@ def update_user_info_route(user_id):
 
 @user_bp.route('/upload-profile-picture', methods=['POST'])
 @authenticate_token
+@user_columns('profilepicture')
 def upload_profile_picture_route():
     return upload_profile_picture()
 
 @user_bp.route('/profile-picture', methods=['GET'])
 @authenticate_token
+@user_columns('profilepicture')
 def profile_picture_route():
     return get_profile_picture()
 
 @user_bp.route('/verify-current-password', methods=['POST'])
 @authenticate_token
+@user_columns('password')
 def verify_current_password_route():
     return verify_current_password()
 
 @user_bp.route('/change-password', methods=['POST'])
 @authenticate_token
+@user_columns('password, token_version')
 def change_password_route():
     return change_password()
\ No newline at end of file
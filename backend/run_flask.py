@@ -1,12 +1,16 @@
 """
 Script to run the Flask application.
+
+This uses the Flask development server. For production or benchmarking,
+use serve.py (gunicorn/waitress) instead.
 """
 
 if __name__ == "__main__":
     try:
+        from config import Config
         from flask_app import app
-        print("Starting Flask application...")
+        print("Starting Flask development server...")
         print("Access the application at: http://localhost:5000")
-        app.run(host='0.0.0.0', port=5000, debug=True)
+        app.run(host='0.0.0.0', port=5000, debug=Config.DEBUG, threaded=True)
     except Exception as e:
-        print(f"Error starting Flask application: {e}")
\ No newline at end of file
+        print(f"Error starting Flask application: {e}")
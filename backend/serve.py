@@ -0,0 +1,68 @@
+"""
+Production server launcher.
+
+Runs the app under gunicorn with gunicorn.conf.py where available (Linux,
+macOS), and under waitress otherwise (e.g. Windows). Use run_flask.py only
+for development: the Flask dev server is single-process and unsuitable
+for benchmarks.
+
+Usage:
+    python serve.py                                  # gunicorn, settings from Config
+    python serve.py --worker-class gevent --workers 4
+    python serve.py --server waitress --threads 16
+"""
+
+import argparse
+import os
+import shutil
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+from config import Config
+
+def serve_gunicorn(args):
+    # Pass overrides through the environment so gunicorn.conf.py derives the
+    # dependent settings (threads, preload) from the same values
+    overrides = {
+        'WSGI_BIND': args.bind,
+        'WEB_CONCURRENCY': args.workers,
+        'WSGI_WORKER_CLASS': args.worker_class,
+        'WSGI_THREADS': args.threads
+    }
+    for name, value in overrides.items():
+        if value:
+            os.environ[name] = str(value)
+
+    command = ['gunicorn', '-c', os.path.join(BACKEND_DIR, 'gunicorn.conf.py'), '--chdir', BACKEND_DIR, 'flask_app:app']
+    # Replace this process so signals (SIGHUP reload, SIGTERM) reach the gunicorn master
+    os.execvp(command[0], command)
+
+def serve_waitress(args):
+    from waitress import serve
+    from flask_app import app
+
+    host, _, port = (args.bind or Config.WSGI_BIND).rpartition(':')
+    serve(app, host=host or '0.0.0.0', port=int(port), threads=args.threads or Config.WSGI_THREADS)
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the backend with a production WSGI server.')
+    parser.add_argument('--server', choices=('gunicorn', 'waitress'), default=None, help='Default: gunicorn if installed, else waitress')
+    parser.add_argument('--bind', default=None, help=f'host:port (default {Config.WSGI_BIND})')
+    parser.add_argument('--workers', type=int, default=None, help='gunicorn worker processes')
+    parser.add_argument('--worker-class', default=None, choices=('sync', 'gthread', 'gevent'), help='gunicorn worker class')
+    parser.add_argument('--threads', type=int, default=None, help='Threads per worker')
+    args = parser.parse_args()
+
+    server = args.server or ('gunicorn' if shutil.which('gunicorn') else 'waitress')
+    if server == 'gunicorn':
+        serve_gunicorn(args)
+    else:
+        try:
+            serve_waitress(args)
+        except ImportError:
+            sys.exit('No production server found: pip install gunicorn (or waitress on Windows)')
+
+if __name__ == "__main__":
+    main()
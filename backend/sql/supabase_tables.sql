@@ -8,33 +8,112 @@ CREATE TABLE IF NOT EXISTS users (
   lastname VARCHAR(255),
   email VARCHAR(255) UNIQUE,
   password VARCHAR(255),
-  profilePicture VARCHAR(255) DEFAULT 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default-profile.png',
-  token TEXT
+  profilePicture VARCHAR(255), -- storage object key; NULL is the default picture
+  token TEXT, -- legacy: tokens are no longer stored, see token_version
+  token_version INTEGER NOT NULL DEFAULT 0
 );
 
+-- Existing deployments: JWTs carry token_version, bumping it revokes older tokens
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
+
 -- Accounts table
 CREATE TABLE IF NOT EXISTS accounts (
   id SERIAL PRIMARY KEY,
   site VARCHAR(255) NOT NULL,
   username VARCHAR(255) NOT NULL,
   password VARCHAR(255) NOT NULL,
-  image VARCHAR(255) DEFAULT 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/default.png',
+  image VARCHAR(255), -- storage object key; NULL is the default image
   user_id INTEGER REFERENCES users(id) ON DELETE CASCADE
 );
 
--- OTPs table
+-- Existing deployments: store object keys instead of public URLs (NULL is the default image)
+ALTER TABLE users ALTER COLUMN profilePicture DROP DEFAULT;
+ALTER TABLE accounts ALTER COLUMN image DROP DEFAULT;
+UPDATE users SET profilePicture = NULL WHERE profilePicture LIKE '%/storage/v1/object/public/images/default-profile.png%';
+UPDATE users SET profilePicture = split_part(substring(profilePicture from '/storage/v1/object/public/images/(.*)$'), '?', 1)
+  WHERE profilePicture LIKE '%/storage/v1/object/public/images/%';
+UPDATE accounts SET image = NULL WHERE image LIKE '%/storage/v1/object/public/images/default.png%';
+UPDATE accounts SET image = split_part(substring(image from '/storage/v1/object/public/images/(.*)$'), '?', 1)
+  WHERE image LIKE '%/storage/v1/object/public/images/%';
+
+-- OTPs table (only a salted hash of the code is stored)
 CREATE TABLE IF NOT EXISTS otps (
   id SERIAL PRIMARY KEY,
   email VARCHAR(255) NOT NULL UNIQUE,
-  otp_code VARCHAR(6) NOT NULL,
+  otp_code VARCHAR(6), -- legacy: superseded by otp_hash
+  otp_hash VARCHAR(64),
+  salt VARCHAR(32),
+  attempts INTEGER NOT NULL DEFAULT 0,
   created_at TIMESTAMP DEFAULT NOW(),
   expires_at TIMESTAMP NOT NULL
 );
 
+-- Existing deployments: hashed codes and attempt counters
+ALTER TABLE otps ALTER COLUMN otp_code DROP NOT NULL;
+ALTER TABLE otps ADD COLUMN IF NOT EXISTS otp_hash VARCHAR(64);
+ALTER TABLE otps ADD COLUMN IF NOT EXISTS salt VARCHAR(32);
+ALTER TABLE otps ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+
+-- Lets the expiry sweeper find expired rows without a full scan
+CREATE INDEX IF NOT EXISTS otps_expires_at_idx ON otps (expires_at);
+
 -- Items table
 CREATE TABLE IF NOT EXISTS items (
   id SERIAL PRIMARY KEY,
   name VARCHAR(255) NOT NULL,
   description TEXT,
   user_id INTEGER REFERENCES users(id) ON DELETE CASCADE
-);
\ No newline at end of file
+);
+-- Delta sync (/accounts/changes, /items/changes): every insert and update
+-- stamps updated_at, and every delete leaves a tombstone in deleted_rows.
+-- clock_timestamp() rather than now(), which is the transaction start time,
+-- keeps stamps close to commit time. It does not make them commit ordered:
+-- a transaction can still commit after a later-stamped one has been read.
+-- The API covers that by keeping watermarks SYNC_SAFETY_LAG_SECONDS behind
+-- the current time and re-reading the overlap, so keep writes to these
+-- tables shorter than that.
+ALTER TABLE accounts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp();
+ALTER TABLE items ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp();
+CREATE INDEX IF NOT EXISTS accounts_user_id_updated_at_idx ON accounts (user_id, updated_at, id);
+CREATE INDEX IF NOT EXISTS items_user_id_updated_at_idx ON items (user_id, updated_at, id);
+
+CREATE TABLE IF NOT EXISTS deleted_rows (
+  id BIGSERIAL PRIMARY KEY,
+  table_name VARCHAR(63) NOT NULL,
+  row_id INTEGER NOT NULL,
+  user_id INTEGER,
+  deleted_at TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+);
+CREATE INDEX IF NOT EXISTS deleted_rows_user_id_table_name_deleted_at_idx ON deleted_rows (user_id, table_name, deleted_at);
+
+CREATE OR REPLACE FUNCTION set_updated_at() RETURNS TRIGGER AS $$
+BEGIN
+  NEW.updated_at := clock_timestamp();
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION record_deleted_row() RETURNS TRIGGER AS $$
+BEGIN
+  INSERT INTO deleted_rows (table_name, row_id, user_id) VALUES (TG_TABLE_NAME, OLD.id, OLD.user_id);
+  RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS accounts_set_updated_at ON accounts;
+CREATE TRIGGER accounts_set_updated_at BEFORE INSERT OR UPDATE ON accounts
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+DROP TRIGGER IF EXISTS items_set_updated_at ON items;
+CREATE TRIGGER items_set_updated_at BEFORE INSERT OR UPDATE ON items
+  FOR EACH ROW EXECUTE FUNCTION set_updated_at();
+DROP TRIGGER IF EXISTS accounts_record_deleted_row ON accounts;
+CREATE TRIGGER accounts_record_deleted_row AFTER DELETE ON accounts
+  FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
+DROP TRIGGER IF EXISTS items_record_deleted_row ON items;
+CREATE TRIGGER items_record_deleted_row AFTER DELETE ON items
+  FOR EACH ROW EXECUTE FUNCTION record_deleted_row();
+
+-- Tombstones only need to outlive the longest gap between two syncs; clients
+-- whose watermark is older than SYNC_TOMBSTONE_RETENTION_DAYS get a full
+-- resync instead. Prune on a schedule (e.g. pg_cron) with the same window:
+--   DELETE FROM deleted_rows WHERE deleted_at < now() - interval '30 days';
@@ -1,12 +1,263 @@
+import copy
 import os
+import time
 import logging
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
 from config import Config
+from utils.instrumentation import record_span
+from utils.metrics import counter, histogram
+from utils.hedging import Hedger
+from utils.resilience import BREAKERS
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SUPABASE_REQUESTS = counter(
+    'supabase_requests_total',
+    'PostgREST queries executed, by table, operation and outcome.',
+    labels=('table', 'operation', 'outcome')
+)
+SUPABASE_DURATION = histogram(
+    'supabase_request_duration_seconds',
+    'PostgREST query latency, by table and operation.',
+    labels=('table', 'operation')
+)
+
+# Builder methods that determine the operation a query performs
+_OPERATIONS = ('select', 'insert', 'update', 'upsert', 'delete')
+
+# Storage calls that go over the network (get_public_url only builds a string)
+_STORAGE_CALLS = ('upload', 'update', 'remove', 'download', 'list', 'move', 'copy',
+                  'create_signed_url', 'create_signed_urls', 'create_signed_upload_url',
+                  'upload_to_signed_url', 'get_bucket', 'list_buckets')
+
+# Hedges slow selects when HEDGED_READS is on, and learns their latencies either way
+read_hedger = Hedger()
+
+def operation_timeout(operation):
+    """
+    Timeout in seconds for a PostgREST operation: reads fail sooner than writes.
+    """
+    return Config.SUPABASE_READ_TIMEOUT if operation == 'select' else Config.SUPABASE_WRITE_TIMEOUT
+
+class TimeoutSession:
+    """
+    Passes a timeout to every request of a query builder's HTTP session.
+
+    postgrest-py only has a client-wide timeout; each query gets its own
+    builder, so wrapping the builder's session sets a per-query timeout.
+    """
+    def __init__(self, session, timeout):
+        self._session = session
+        self._timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault('timeout', self._timeout)
+        return self._session.request(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+class InstrumentedQuery:
+    """
+    Wraps a PostgREST query builder so execute() is timed as a 'db' span,
+    counted in the Supabase metrics, bounded by the operation's timeout and
+    guarded by the PostgREST circuit breaker. Selects are idempotent, so
+    with HEDGED_READS on a slow one is raced against a second copy.
+
+    A select's hedge kind is its table and columns, so point lookups and
+    list reads of the same table each get a delay that fits them.
+    """
+    def __init__(self, builder, table_name, operation=None, kind=None):
+        self._builder = builder
+        self._table_name = table_name
+        self._operation = operation
+        self._kind = kind or table_name
+        self._timeout = None
+        self._hedge = True
+    
+    def unhedged(self):
+        """
+        Never hedge this query, e.g. for bulk reads whose latency says
+        nothing about a slow replica. Call it last, right before execute().
+        """
+        self._hedge = False
+        return self
+    
+    def with_timeout(self, timeout):
+        """
+        Use `timeout` seconds instead of the operation's timeout. Call it last,
+        right before execute().
+        """
+        self._timeout = timeout
+        return self
+    
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if not callable(attr):
+            return attr
+        
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, 'execute'):
+                operation = self._operation or (name if name in _OPERATIONS else None)
+                kind = self._kind
+                if name == 'select':
+                    columns = args[0] if args else kwargs.get('columns', '*')
+                    kind = f"{self._table_name}:{','.join(column.strip() for column in columns.split(','))}"
+                return type(self)(result, self._table_name, operation, kind)
+            return result
+        return call
+    
+    def _prepare(self):
+        timeout = self._timeout or operation_timeout(self._operation)
+        session = getattr(self._builder, 'session', None)
+        if session is not None:
+            self._builder.session = TimeoutSession(session, timeout)
+        else:
+            # The local stand-in reads the timeout from the builder
+            self._builder.timeout = timeout
+        BREAKERS['postgrest'].before_call()
+    
+    def _hedged(self):
+        return self._operation == 'select' and self._hedge and Config.HEDGED_READS
+    
+    def _attempt(self):
+        start = time.perf_counter()
+        response = None
+        try:
+            response = self._builder.execute()
+            return response
+        finally:
+            self._record(start, response)
+    
+    def execute(self):
+        self._prepare()
+        try:
+            if self._hedged():
+                response = read_hedger.call(self._kind, self._attempt)
+            else:
+                response = self._attempt()
+        except Exception as err:
+            BREAKERS['postgrest'].record_error(err)
+            raise
+        BREAKERS['postgrest'].record_success()
+        return response
+    
+    def _record(self, start, response):
+        operation = self._operation or 'query'
+        outcome = 'ok' if response is not None and not getattr(response, 'error', None) else 'error'
+        duration = time.perf_counter() - start
+        record_span('db', f"{self._table_name}.{operation}", duration)
+        SUPABASE_DURATION.observe(duration, self._table_name, operation)
+        SUPABASE_REQUESTS.inc(self._table_name, operation, outcome)
+        if operation == 'select' and outcome == 'ok' and self._hedge:
+            read_hedger.observe(self._kind, duration)
+
+class AsyncInstrumentedQuery(InstrumentedQuery):
+    """
+    InstrumentedQuery for the async client, whose execute() is awaitable.
+    """
+    async def _attempt(self):
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await self._builder.execute()
+            return response
+        finally:
+            self._record(start, response)
+    
+    async def execute(self):
+        self._prepare()
+        try:
+            if self._hedged():
+                response = await read_hedger.call_async(self._kind, self._attempt)
+            else:
+                response = await self._attempt()
+        except Exception as err:
+            BREAKERS['postgrest'].record_error(err)
+            raise
+        BREAKERS['postgrest'].record_success()
+        return response
+
+class GuardedStorage:
+    """
+    Wraps a storage client (or one of its buckets) so network calls go
+    through the Storage circuit breaker. Works for the sync and async clients.
+    """
+    def __init__(self, target):
+        self._target = target
+
+    def from_(self, bucket_name):
+        return GuardedStorage(self._target.from_(bucket_name))
+    
+    def download_head(self, path, length):
+        """
+        The first `length` bytes of an object (sync buckets only).
+        
+        storage3's download() cannot send headers, so the object endpoint is
+        requested through its _request with a Range header; Storage then
+        sends only those bytes. The local stand-in slices its copy.
+        """
+        target = self._target
+        if not hasattr(target, '_request'):
+            return BREAKERS['storage'].call(target.download_head, path, length)
+        response = BREAKERS['storage'].call(
+            target._request, 'GET', f'object/{target._get_final_path(path)}', headers={'Range': f'bytes=0-{length - 1}'}
+        )
+        return response.content[:length]
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name not in _STORAGE_CALLS:
+            return attr
+
+        def call(*args, **kwargs):
+            return BREAKERS['storage'].call(attr, *args, **kwargs)
+        return call
+
+class InstrumentedClient:
+    """
+    Wraps a Supabase client so table queries are instrumented.
+    
+    Storage calls go through the Storage circuit breaker; everything else
+    is passed through unchanged.
+    """
+    query_class = InstrumentedQuery
+    
+    def __init__(self, client):
+        self._client = client
+    
+    def table(self, table_name):
+        return self.query_class(self._client.table(table_name), table_name)
+    
+    def from_(self, table_name):
+        return self.table(table_name)
+    
+    @property
+    def storage(self):
+        return GuardedStorage(self._client.storage)
+    
+    def storage_with_timeout(self, timeout):
+        """
+        The storage client with its requests bounded by `timeout` seconds
+        rather than STORAGE_TIMEOUT, e.g. for the readiness probe.
+        """
+        storage = copy.copy(self._client.storage)
+        if hasattr(getattr(storage, '_client', None), 'request'):
+            # storage3 sends every request through its httpx session
+            storage._client = TimeoutSession(storage._client, timeout)
+        else:
+            # The local stand-in reads the timeout from the client
+            storage.timeout = timeout
+        return GuardedStorage(storage)
+    
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+class AsyncInstrumentedClient(InstrumentedClient):
+    query_class = AsyncInstrumentedQuery
+
 def get_supabase_client() -> Client:
     """
     Create and return a Supabase client instance.
@@ -14,9 +265,23 @@ def get_supabase_client() -> Client:
     supabase_url = Config.SUPABASE_URL
     supabase_key = Config.SUPABASE_KEY
     
+    # Use the SQLite/in-memory stand-in for local development and load tests
+    if Config.LOCAL_SUPABASE_DB:
+        from local_supabase import LocalFaults, LocalSupabaseClient
+        logger.info("Using local Supabase stand-in with database: %s", Config.LOCAL_SUPABASE_DB)
+        faults = LocalFaults(
+            latency=Config.LOCAL_SUPABASE_LATENCY_MS / 1000,
+            error_rate=Config.LOCAL_SUPABASE_ERROR_RATE,
+            slow_rate=Config.LOCAL_SUPABASE_SLOW_RATE,
+            slow_latency=Config.LOCAL_SUPABASE_SLOW_MS / 1000
+        )
+        client = LocalSupabaseClient(Config.LOCAL_SUPABASE_DB, faults=faults)
+        client.storage.timeout = Config.STORAGE_TIMEOUT
+        return InstrumentedClient(client)
+    
     logger.info("Initializing Supabase client")
-    logger.info(f"Supabase URL: {supabase_url}")
-    logger.info(f"Supabase Key exists: {bool(supabase_key)}")
+    logger.info("Supabase URL: %s", supabase_url)
+    logger.info("Supabase Key exists: %s", bool(supabase_key))
     
     # Check if Supabase credentials are available
     if not supabase_url or not supabase_key:
@@ -26,17 +291,51 @@ def get_supabase_client() -> Client:
     
     try:
         logger.info("Creating Supabase client with URL and Key")
-        supabase: Client = create_client(supabase_url, supabase_key)
+        # Per-query timeouts are set by InstrumentedQuery; this one bounds anything else
+        options = ClientOptions(
+            postgrest_client_timeout=max(Config.SUPABASE_READ_TIMEOUT, Config.SUPABASE_WRITE_TIMEOUT),
+            storage_client_timeout=Config.STORAGE_TIMEOUT
+        )
+        supabase: Client = create_client(supabase_url, supabase_key, options)
         logger.info("Supabase client created successfully")
-        return supabase
+        return InstrumentedClient(supabase)
     except Exception as error:
-        logger.error(f"Error creating Supabase client: {str(error)}")
+        logger.error("Error creating Supabase client: %s", error)
         # Return None to prevent crashing the application
         return None
 
+async def get_async_supabase_client():
+    """
+    Create an async Supabase client (for the ASGI entry point).
+    
+    The client is bound to the running event loop, so create it from within
+    that loop and reuse it. With LOCAL_SUPABASE_DB the async view shares the
+    tables of the global stand-in.
+    """
+    if Config.LOCAL_SUPABASE_DB:
+        from local_supabase import AsyncLocalSupabaseClient
+        if supabase is None:
+            return None
+        return AsyncInstrumentedClient(AsyncLocalSupabaseClient(supabase._client))
+    
+    if not Config.SUPABASE_URL or not Config.SUPABASE_KEY:
+        logger.warning("Supabase credentials not found; async client not created")
+        return None
+    
+    # supabase 2.4 only exposes the async factory from its _async package
+    from gotrue import AsyncMemoryStorage
+    from supabase._async.client import create_client as create_async_client
+    options = ClientOptions(
+        storage=AsyncMemoryStorage(),
+        postgrest_client_timeout=max(Config.SUPABASE_READ_TIMEOUT, Config.SUPABASE_WRITE_TIMEOUT),
+        storage_client_timeout=Config.STORAGE_TIMEOUT
+    )
+    client = await create_async_client(Config.SUPABASE_URL, Config.SUPABASE_KEY, options)
+    return AsyncInstrumentedClient(client)
+
 # Create a global instance
 try:
     supabase = get_supabase_client()
 except Exception as e:
-    logger.error(f"Failed to create Supabase client instance: {str(e)}")
+    logger.error("Failed to create Supabase client instance: %s", e)
     supabase = None
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+Script to delete expired OTPs from the otps table.
+
+Run once (e.g. from cron) or with --interval to keep sweeping:
+    python sweep_otps.py
+    python sweep_otps.py --interval 300 --batch-size 1000
+"""
+
+import argparse
+import time
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Delete expired OTPs.')
+    parser.add_argument('--batch-size', type=int, default=None, help='Rows deleted per round trip')
+    parser.add_argument('--interval', type=int, default=0, help='Keep sweeping every N seconds')
+    args = parser.parse_args()
+    
+    from logging_config import configure_logging
+    configure_logging()
+    
+    from utils.otp import sweep_expired_otps
+    
+    while True:
+        result = sweep_expired_otps(args.batch_size)
+        if result['error']:
+            print(f"Sweep failed after deleting {result['deleted']} OTPs: {result['error']}")
+        else:
+            print(f"Deleted {result['deleted']} expired OTPs")
+        
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,32 @@
+"""
+Script to delete direct uploads that were never finalized.
+
+Run once (e.g. from cron) or with --interval to keep sweeping:
+    python sweep_uploads.py
+    python sweep_uploads.py --interval 3600 --min-age 10800
+"""
+
+import argparse
+import time
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Delete abandoned direct uploads.')
+    parser.add_argument('--min-age', type=int, default=None, help='Seconds an unreferenced upload must have existed')
+    parser.add_argument('--interval', type=int, default=0, help='Keep sweeping every N seconds')
+    args = parser.parse_args()
+    
+    from logging_config import configure_logging
+    configure_logging()
+    
+    from utils.upload_sweeper import sweep_abandoned_uploads
+    
+    while True:
+        result = sweep_abandoned_uploads(args.min_age)
+        if result['error']:
+            print(f"Sweep failed after deleting {result['deleted']} uploads: {result['error']}")
+        else:
+            print(f"Deleted {result['deleted']} abandoned uploads")
+        
+        if args.interval <= 0:
+            break
+        time.sleep(args.interval)
@@ -0,0 +1,89 @@
+"""
+Test file to verify the ASGI entry point against the local Supabase stand-in
+"""
+
+import asyncio
+import json
+from local_supabase import AsyncLocalSupabaseClient, LocalSupabaseClient
+from loadtest import PNG_IMAGE, encode_multipart
+
+def call(app, method, path, headers=(), body=b''):
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': b'', 'headers': list(headers)}
+    sent = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent[0]['status'], json.loads(sent[1]['body'])
+
+def test_native_and_fallback_routes():
+    """Check native async routes and delegation to the Flask app"""
+    import asgi
+    from config import Config
+    from repositories import AccountRepository, ItemRepository, UserRepository
+    from repositories.async_store import AsyncSupabaseStore
+    from utils.tokens import cache_token_version, issue_token
+
+    client = AsyncLocalSupabaseClient(LocalSupabaseClient(':memory:'))
+    local = client._client
+    user = local.table('users').insert({'email': 'asgi@example.com'}).execute().data[0]
+    local.table('accounts').insert({'site': 'a.com', 'username': 'u', 'password': 'p', 'image': None, 'user_id': user['id']}).execute()
+
+    store = AsyncSupabaseStore(client)
+    asgi._backend.clear()
+    asgi._backend.update(client=client, store=store, users=UserRepository(store), accounts=AccountRepository(store), items=ItemRepository(store))
+    cache_token_version(user['id'], 0)
+    auth = (b'authorization', f"Bearer {issue_token(user['id'], user['email'], 0)}".encode())
+
+    status, payload = call(asgi.app, 'GET', '/accounts')
+    assert status == 401
+
+    status, payload = call(asgi.app, 'GET', '/accounts', [auth])
+    assert status == 200 and payload['accounts'][0]['site'] == 'a.com'
+    assert payload['accounts'][0]['image'].endswith('/images/default.png')
+
+    body, content_type = encode_multipart({}, {'profilePicture': ('me.png', PNG_IMAGE, 'image/png')})
+    status, payload = call(asgi.app, 'POST', '/upload-profile-picture', [auth, (b'content-type', content_type.encode())], body)
+    key = local.table('users').select('profilepicture').eq('id', user['id']).execute().data[0]['profilepicture']
+    assert key.startswith(f"profile-pictures/{user['id']}_") and key.endswith('.png')
+    assert status == 200 and payload['profilepicture'].endswith('/images/' + key)
+    assert local.storage.from_('images')._objects[key]['content_type'] == 'image/png'
+
+    # Anything but a sniffed raster image is refused, whatever its name says
+    body, content_type = encode_multipart({}, {'profilePicture': ('me.html', b'<script>alert(1)</script>', 'text/html')})
+    status, payload = call(asgi.app, 'POST', '/upload-profile-picture', [auth, (b'content-type', content_type.encode())], body)
+    assert status == 415 and not any(name.endswith('.html') for name in local.storage.from_('images')._objects)
+
+    # A failed update keeps the old picture, and removes the new upload
+    class FailingUpdates(UserRepository):
+        async def update(self, user_id, values):
+            raise ConnectionError('database went away')
+
+    users = asgi._backend['users']
+    asgi._backend['users'] = FailingUpdates(store)
+    body, content_type = encode_multipart({}, {'profilePicture': ('me.png', PNG_IMAGE, 'image/png')})
+    status, payload = call(asgi.app, 'POST', '/upload-profile-picture', [auth, (b'content-type', content_type.encode())], body)
+    asgi._backend['users'] = users
+    assert status == 500 and list(local.storage.from_('images')._objects) == [key]
+    assert local.table('users').select('profilepicture').eq('id', user['id']).execute().data[0]['profilepicture'] == key
+
+    local.table('accounts').insert({'site': 'b.com', 'username': 'u', 'password': 'p', 'image': None, 'user_id': user['id']}).execute()
+    local.table('items').insert({'name': 'n', 'description': 'd', 'user_id': user['id']}).execute()
+    Config.BOOTSTRAP_ACCOUNTS_PAGE_SIZE = 1
+    status, payload = call(asgi.app, 'GET', '/bootstrap', [auth])
+    Config.BOOTSTRAP_ACCOUNTS_PAGE_SIZE = 100
+    assert status == 200 and payload['user']['profilepicture'].endswith('/images/' + key)
+    assert [account['site'] for account in payload['accounts']] == ['a.com'] and payload['accountsHasMore']
+    assert [item['name'] for item in payload['items']] == ['n']
+
+    status, payload = call(asgi.app, 'GET', '/health')
+    assert status == 200 and payload['status'] == 'ok'
+    print("ASGI route test passed")
+    return True
+
+if __name__ == "__main__":
+    test_native_and_fallback_routes()
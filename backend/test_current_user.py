@@ -0,0 +1,69 @@
+"""
+Test file to verify that the current user's row is read once per request
+"""
+
+import bcrypt
+import utils.current_user as current_user
+import utils.tokens as tokens
+from local_supabase import LocalSupabaseClient
+from repositories import UserRepository
+from repositories.supabase_store import SupabaseStore
+
+class RecordingUserRepository(UserRepository):
+    """Records the columns of every user read"""
+    def __init__(self, store):
+        super().__init__(store)
+        self.reads = []
+
+    def get_by_id(self, user_id, columns='*'):
+        self.reads.append(columns)
+        return super().get_by_id(user_id, columns)
+
+def test_one_user_read_per_request():
+    """Check that the token-version lookup loads the route's columns and controllers reuse them"""
+    from flask_app import app
+
+    local = LocalSupabaseClient(':memory:')
+    repository = RecordingUserRepository(SupabaseStore(local))
+    saved = (current_user.user_repository, tokens.user_repository)
+    current_user.user_repository = tokens.user_repository = repository
+    try:
+        password = bcrypt.hashpw(b'secret', bcrypt.gensalt()).decode('utf-8')
+        user = local.table('users').insert({
+            'email': 'current@example.com', 'firstname': 'Ada', 'lastname': 'L', 'password': password, 'token_version': 0
+        }).execute().data[0]
+        headers = {'Authorization': f"Bearer {tokens.issue_token(user['id'], user['email'], 0)}"}
+        client = app.test_client()
+
+        # Token version not cached: one read serves the check and the controller
+        tokens.invalidate_token_version(user['id'])
+        response = client.get('/user-info', headers=headers)
+        assert response.status_code == 200 and response.get_json()['user']['firstname'] == 'Ada'
+        assert 'password' not in response.get_json()['user'] and 'token_version' not in response.get_json()['user']
+        assert repository.reads == ['token_version, id, firstname, middlename, lastname, email, profilepicture']
+
+        # Token version cached: the controller reads only its own columns
+        repository.reads.clear()
+        assert client.get('/profile-picture', headers=headers).status_code == 200
+        assert repository.reads == ['profilepicture']
+
+        repository.reads.clear()
+        tokens.invalidate_token_version(user['id'])
+        response = client.post('/verify-current-password', json={'currentPassword': 'secret'}, headers=headers)
+        assert response.status_code == 200 and repository.reads == ['token_version, password']
+
+        # Columns that were not loaded are fetched, and only those
+        with app.test_request_context():
+            current_user.remember_current_user(user['id'], {'email': 'current@example.com'}, 'email')
+            result = current_user.load_current_user(user['id'], 'email, firstname')
+            assert result.data == [{'email': 'current@example.com', 'firstname': 'Ada'}]
+            assert repository.reads[-1] == 'firstname'
+            assert current_user.load_current_user(user['id'], 'firstname').data == [{'firstname': 'Ada'}]
+            assert repository.reads[-1] == 'firstname' and len(repository.reads) == 2
+    finally:
+        current_user.user_repository, tokens.user_repository = saved
+    print("Current user loader test passed")
+    return True
+
+if __name__ == "__main__":
+    test_one_user_read_per_request()
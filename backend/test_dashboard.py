@@ -0,0 +1,87 @@
+"""
+Test file to verify the server-rendered dashboard and its static fallback
+"""
+
+import json
+import time
+import controllers.bootstrap_controller as bootstrap_controller
+import utils.current_user as current_user
+import utils.tokens as tokens
+from config import Config
+from local_supabase import LocalSupabaseClient
+from repositories import AccountRepository, ItemRepository, UserRepository
+from repositories.supabase_store import SupabaseStore
+
+def initial_data(response):
+    """The JSON embedded in a rendered dashboard, or None"""
+    html = response.get_data(as_text=True)
+    start = html.find('<script id="initial-data" type="application/json">')
+    if start == -1:
+        return None
+    start = html.index('>', start) + 1
+    return json.loads(html[start:html.index('</script>', start)])
+
+def test_server_rendered_dashboard():
+    """Check embedded data for bearer and session sign-ins, and the static page otherwise"""
+    from flask_app import app
+
+    local = LocalSupabaseClient(':memory:')
+    store = SupabaseStore(local)
+    saved = (bootstrap_controller.account_repository, bootstrap_controller.item_repository,
+             current_user.user_repository, tokens.user_repository)
+    bootstrap_controller.account_repository = AccountRepository(store)
+    bootstrap_controller.item_repository = ItemRepository(store)
+    current_user.user_repository = tokens.user_repository = UserRepository(store)
+    Config.DASHBOARD_SSR = True
+    try:
+        user = local.table('users').insert({'email': 'dash@example.com', 'firstname': 'Dee', 'token_version': 0}).execute().data[0]
+        local.table('accounts').insert({'site': '</script><b>x</b>', 'username': 'u', 'password': 'p', 'image': None, 'user_id': user['id']}).execute()
+        local.table('items').insert({'name': 'note', 'description': 'd', 'user_id': user['id']}).execute()
+        client = app.test_client()
+
+        # Not signed in: the static page, with nothing embedded
+        response = client.get('/dashboard')
+        assert response.status_code == 200 and initial_data(response) is None
+
+        tokens.invalidate_token_version(user['id'])
+        token = tokens.issue_token(user['id'], user['email'], 0)
+        response = client.get('/dashboard', headers={'Authorization': f'Bearer {token}'})
+        data = initial_data(response)
+        assert data['user']['firstname'] == 'Dee' and data['items'][0]['name'] == 'note'
+        # The account's site cannot end the script element early
+        assert data['accounts'][0]['site'] == '</script><b>x</b>' and '<b>x</b>' not in response.get_data(as_text=True)
+        assert response.headers['Cache-Control'] == 'no-store, private'
+
+        # A page navigation signed in through the login session
+        with client.session_transaction() as session:
+            session['user_id'] = user['id']
+            session['token_version'] = 0
+            session['issued_at'] = int(time.time())
+        assert initial_data(client.get('/dashboard.html'))['user']['email'] == 'dash@example.com'
+
+        # A session older than a JWT, or without an issue time, no longer counts
+        with client.session_transaction() as session:
+            session['issued_at'] = int(time.time()) - Config.JWT_EXPIRES_IN - 1
+        assert initial_data(client.get('/dashboard')) is None
+        with client.session_transaction() as session:
+            del session['issued_at']
+        assert initial_data(client.get('/dashboard')) is None
+        with client.session_transaction() as session:
+            session['issued_at'] = int(time.time())
+
+        # After a password change the session no longer counts
+        local.table('users').update({'token_version': 1}).eq('id', user['id']).execute()
+        tokens.invalidate_token_version(user['id'])
+        assert initial_data(client.get('/dashboard')) is None
+
+        Config.DASHBOARD_SSR = False
+        assert initial_data(client.get('/dashboard', headers={'Authorization': f'Bearer {token}'})) is None
+    finally:
+        Config.DASHBOARD_SSR = False
+        (bootstrap_controller.account_repository, bootstrap_controller.item_repository,
+         current_user.user_repository, tokens.user_repository) = saved
+    print("Server-rendered dashboard test passed")
+    return True
+
+if __name__ == "__main__":
+    test_server_rendered_dashboard()
@@ -0,0 +1,97 @@
+"""
+Test file to verify the streaming NDJSON/CSV exports against the local Supabase stand-in
+"""
+
+import asyncio
+import json
+import controllers.export_controller as export_controller
+from config import Config
+from local_supabase import LocalSupabaseClient
+from repositories import AccountRepository, ItemRepository
+from repositories.base import Result
+from repositories.supabase_store import SupabaseStore
+from utils.export import csv_chunks, iter_pages, ndjson_chunks
+
+def test_encoders():
+    """Check keyset paging and the NDJSON and CSV encodings"""
+    rows = [{'id': i, 'name': f'n{i}', 'description': 'a, "b"'} for i in range(1, 6)]
+    calls = []
+
+    def fetch_page(after_id, limit):
+        calls.append(after_id)
+        return Result([row for row in rows if row['id'] > after_id][:limit], None)
+
+    pages = list(iter_pages(fetch_page, 2))
+    assert [len(page) for page in pages] == [2, 2, 1] and calls == [0, 2, 4]
+
+    lines = b''.join(ndjson_chunks(pages)).decode().splitlines()
+    assert [json.loads(line)['id'] for line in lines] == [1, 2, 3, 4, 5]
+
+    text = b''.join(csv_chunks(pages, ('id', 'description'))).decode()
+    assert text.splitlines()[:2] == ['id,description', '1,"a, ""b"""']
+
+    try:
+        list(iter_pages(lambda after_id, limit: Result([], 'boom'), 2, 'items'))
+        assert False, 'expected a RuntimeError'
+    except RuntimeError as err:
+        assert 'items' in str(err)
+    print("Export encoder test passed")
+    return True
+
+def test_export_endpoints():
+    """Check streamed exports through the Flask app and the ASGI entry point"""
+    import asgi
+    from flask_app import app
+    from utils.tokens import cache_token_version, issue_token
+
+    local = LocalSupabaseClient(':memory:')
+    store = SupabaseStore(local)
+    repositories = (export_controller.account_repository, export_controller.item_repository)
+    export_controller.account_repository = AccountRepository(store)
+    export_controller.item_repository = ItemRepository(store)
+    Config.EXPORT_PAGE_SIZE = 2
+    try:
+        user = local.table('users').insert({'email': 'export@example.com'}).execute().data[0]
+        other = local.table('users').insert({'email': 'other@example.com'}).execute().data[0]
+        cache_token_version(user['id'], 0)
+        token = issue_token(user['id'], user['email'], 0)
+        for i in range(5):
+            local.table('accounts').insert({'site': f'{i}.com', 'username': 'u', 'password': 'p', 'image': None, 'user_id': user['id']}).execute()
+            local.table('items').insert({'name': f'n{i}', 'description': 'd', 'user_id': other['id'] if i == 2 else user['id']}).execute()
+
+        client = app.test_client()
+        response = client.get('/accounts/export', headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == 200 and response.is_streamed and response.mimetype == 'application/x-ndjson'
+        accounts = [json.loads(line) for line in response.get_data().splitlines()]
+        assert [a['site'] for a in accounts] == [f'{i}.com' for i in range(5)]
+        assert accounts[0]['image'].endswith('/images/default.png') and 'user_id' not in accounts[0]
+
+        response = client.get('/items/export', headers={'Authorization': f'Bearer {token}', 'Accept': 'text/csv'})
+        lines = response.get_data(as_text=True).splitlines()
+        assert response.mimetype == 'text/csv' and lines[0] == 'id,name,description,updated_at'
+        assert [line.split(',')[1] for line in lines[1:]] == ['n0', 'n1', 'n3', 'n4']
+        assert client.get('/items/export?format=xml', headers={'Authorization': f'Bearer {token}'}).status_code == 400
+
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': '/items/export', 'query_string': b'',
+                 'headers': [(b'authorization', f'Bearer {token}'.encode())]}
+        asyncio.run(asgi.app(scope, receive, send))
+        bodies = [message for message in sent if message['type'] == 'http.response.body']
+        assert sent[0]['status'] == 200 and len(bodies) > 2 and not bodies[-1].get('more_body')
+        assert len(b''.join(message['body'] for message in bodies).splitlines()) == 4
+    finally:
+        Config.EXPORT_PAGE_SIZE = 1000
+        export_controller.account_repository, export_controller.item_repository = repositories
+    print("Export endpoint test passed")
+    return True
+
+if __name__ == "__main__":
+    test_encoders()
+    test_export_endpoints()
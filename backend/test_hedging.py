@@ -0,0 +1,154 @@
+"""
+Test file to verify hedged reads: the slow-read delay, the hedge budget,
+the thread pool limit and the async variant
+"""
+
+import asyncio
+import itertools
+import threading
+import time
+from utils.hedging import HEDGED_REQUESTS, HedgeBudget, Hedger
+
+def slow_then_fast(slow=0.2, fast=0.001):
+    """An attempt whose first call is slow and later calls fast"""
+    calls = itertools.count()
+
+    def attempt():
+        number = next(calls)
+        time.sleep(slow if number == 0 else fast)
+        return number
+    return attempt
+
+def test_hedge_wins():
+    """Check that a slow read is hedged after the percentile delay and the hedge wins"""
+    hedger = Hedger(percentile=0.95, ratio=1.0, burst=1, min_delay=0.001, min_samples=2, threads=2)
+    attempt = slow_then_fast()
+    # Without samples no hedge is sent
+    assert hedger.delay('test_wins') is None
+    hedger.observe('test_wins', 0.01)
+    hedger.observe('test_wins', 0.01)
+    assert hedger.delay('test_wins') == 0.01
+
+    start = time.perf_counter()
+    assert hedger.call('test_wins', attempt) == 1
+    assert time.perf_counter() - start < 0.15
+    assert HEDGED_REQUESTS.value('test_wins', 'fired') == 1
+    assert HEDGED_REQUESTS.value('test_wins', 'won') == 1
+
+    # A fast read returns before the delay and is not hedged
+    assert hedger.call('test_wins', lambda: 'fast') == 'fast'
+    assert HEDGED_REQUESTS.value('test_wins', 'fired') == 1
+    print("Hedge win test passed")
+    return True
+
+def test_budget_and_errors():
+    """Check that hedges stop when the budget is spent and that errors propagate"""
+    budget = HedgeBudget(ratio=0.5, burst=1)
+    assert budget.spend() and not budget.spend()
+    budget.earn()
+    budget.earn()
+    assert budget.spend()
+
+    hedger = Hedger(percentile=0.5, ratio=0.0, burst=1, min_delay=0.001, min_samples=1, threads=2)
+    hedger.observe('test_budget', 0.001)
+    hedger.budget._tokens = 0
+    assert hedger.call('test_budget', slow_then_fast(slow=0.02)) == 0
+    assert HEDGED_REQUESTS.value('test_budget', 'over_budget') == 1
+    assert HEDGED_REQUESTS.value('test_budget', 'fired') == 0
+
+    hedger.budget._tokens = 1
+
+    def fail():
+        time.sleep(0.01)
+        raise ConnectionError('down')
+
+    try:
+        hedger.call('test_budget', fail)
+        assert False, 'expected ConnectionError'
+    except ConnectionError:
+        assert HEDGED_REQUESTS.value('test_budget', 'fired') == 1
+    print("Hedge budget test passed")
+    return True
+
+def test_saturated_pool():
+    """Check that reads never queue for the hedge pool: without an idle thread they run inline, unhedged"""
+    hedger = Hedger(percentile=0.5, ratio=1.0, burst=10, min_delay=0.001, min_samples=1, threads=2)
+    hedger.observe('test_saturated', 0.5)
+    results = []
+
+    def read():
+        results.append(hedger.call('test_saturated', lambda: time.sleep(0.2) or 'ok'))
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == ['ok'] * 8 and time.perf_counter() - start < 0.4
+    assert HEDGED_REQUESTS.value('test_saturated', 'saturated') == 6
+
+    # The primary gets the last idle thread, so the slow read's hedge is not
+    # sent and its budget token is kept
+    hedger = Hedger(percentile=0.5, ratio=0.0, burst=1, min_delay=0.001, min_samples=1, threads=2)
+    hedger.observe('test_saturated_hedge', 0.001)
+    blocker = hedger._submit(lambda: time.sleep(0.1))
+    assert hedger.call('test_saturated_hedge', slow_then_fast(slow=0.02)) == 0
+    assert HEDGED_REQUESTS.value('test_saturated_hedge', 'saturated') == 1
+    assert HEDGED_REQUESTS.value('test_saturated_hedge', 'fired') == 0
+    assert hedger.budget._tokens == 1
+    blocker.result()
+    print("Saturated pool test passed")
+    return True
+
+def test_query_kinds():
+    """Check that selects are tracked per table and columns, and that export pages are not hedged"""
+    from local_supabase import LocalSupabaseClient
+    from repositories import AccountRepository
+    from repositories.supabase_store import SupabaseStore
+    from supabase_client import InstrumentedClient, read_hedger
+
+    client = InstrumentedClient(LocalSupabaseClient(':memory:'))
+    client.table('kinds').select('id, site').execute()
+    client.table('kinds').select('*').execute()
+    assert len(read_hedger.tracker._kinds['kinds:id,site'][0]) == 1
+    assert len(read_hedger.tracker._kinds['kinds:*'][0]) == 1
+
+    before = len(read_hedger.tracker._kinds.get('accounts:id', [()])[0])
+    AccountRepository(SupabaseStore(client)).page_for_user(1, 0, 'id', 10)
+    assert len(read_hedger.tracker._kinds.get('accounts:id', [()])[0]) == before
+    print("Query kind test passed")
+    return True
+
+def test_async_hedge():
+    """Check that the async variant hedges and cancels the losing attempt"""
+    hedger = Hedger(percentile=0.95, ratio=1.0, burst=1, min_delay=0.001, min_samples=1)
+    hedger.observe('test_async', 0.01)
+    calls = itertools.count()
+    cancelled = []
+
+    async def attempt():
+        number = next(calls)
+        try:
+            await asyncio.sleep(0.5 if number == 0 else 0.001)
+        except asyncio.CancelledError:
+            cancelled.append(number)
+            raise
+        return number
+
+    async def main():
+        result = await hedger.call_async('test_async', attempt)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(main()) == 1 and cancelled == [0]
+    assert HEDGED_REQUESTS.value('test_async', 'won') == 1
+    print("Async hedge test passed")
+    return True
+
+if __name__ == "__main__":
+    test_hedge_wins()
+    test_budget_and_errors()
+    test_saturated_pool()
+    test_query_kinds()
+    test_async_hedge()
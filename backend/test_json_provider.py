@@ -0,0 +1,47 @@
+"""
+Test file to verify the response JSON provider
+"""
+
+import os
+os.environ.setdefault('LOCAL_SUPABASE_DB', ':memory:')
+
+import decimal
+import json
+from datetime import datetime, timezone
+from flask import jsonify
+from flask_app import app
+from utils.json_provider import FastJSONProvider, orjson
+
+PAYLOAD = {
+    'success': True,
+    'items': [{'id': 1, 'name': 'Café', 'created_at': datetime(2024, 1, 2, 3, 4, 5, 600000, tzinfo=timezone.utc)}],
+    'total': decimal.Decimal('1.50')
+}
+
+def test_backends_agree():
+    """Check that orjson and the stdlib fallback produce identical output"""
+    stdlib = FastJSONProvider(app, use_orjson=False)
+    expected = '{"success":true,"items":[{"id":1,"name":"Café","created_at":"2024-01-02T03:04:05.600000+00:00"}],"total":"1.50"}'
+    assert stdlib.dumps(PAYLOAD) == expected
+    if orjson:
+        fast = FastJSONProvider(app, use_orjson=True)
+        assert fast.dumps(PAYLOAD) == expected
+        assert fast.dumps_bytes(PAYLOAD) == expected.encode()
+        assert fast.dumps(PAYLOAD, indent=2) == stdlib.dumps(PAYLOAD, indent=2)
+        # Options orjson cannot honor fall back to the standard library
+        assert fast.dumps({'a': 1}, separators=(', ', ': ')) == '{"a": 1}'
+    print("Backend agreement test passed")
+    return True
+
+def test_jsonify():
+    """Check that jsonify goes through the provider"""
+    with app.app_context():
+        response = jsonify(PAYLOAD)
+    assert response.mimetype == 'application/json'
+    assert json.loads(response.get_data())['items'][0]['created_at'] == '2024-01-02T03:04:05.600000+00:00'
+    print("jsonify test passed")
+    return True
+
+if __name__ == "__main__":
+    test_backends_agree()
+    test_jsonify()
@@ -0,0 +1,46 @@
+"""
+Test file to verify the local Supabase stand-in used for load testing
+"""
+
+from local_supabase import LocalSupabaseClient
+
+def test_table_queries():
+    """Check insert/select/update/delete, filters and unique constraints"""
+    client = LocalSupabaseClient(':memory:')
+    
+    user = client.table('users').insert({'email': 'a@example.com', 'name': 'A'}).execute().data[0]
+    assert user['token_version'] == 0
+    assert client.table('users').insert({'email': 'a@example.com'}).execute().error
+    
+    for site in ('b.com', 'a.com', 'c.com'):
+        client.table('accounts').insert({'site': site, 'username': 'u', 'password': 'p', 'user_id': user['id']}).execute()
+    
+    response = client.table('accounts').select('id, site').eq('user_id', user['id']).order('site').limit(2).execute()
+    assert [row['site'] for row in response.data] == ['a.com', 'b.com']
+    assert set(response.data[0]) == {'id', 'site'}
+    
+    updated = client.table('accounts').update({'username': 'v'}).eq('site', 'c.com').execute().data
+    assert len(updated) == 1 and updated[0]['username'] == 'v'
+    
+    deleted = client.table('accounts').delete().in_('site', ['a.com', 'b.com']).execute().data
+    assert len(deleted) == 2
+    assert len(client.table('accounts').select('*').execute().data) == 1
+    print("Table query test passed")
+    return True
+
+def test_storage():
+    """Check upload, duplicate detection, public URL and remove"""
+    client = LocalSupabaseClient(':memory:')
+    bucket = client.storage.from_('images')
+    
+    assert bucket.upload(file=b'png', path='accounts/1_a.png', file_options={'content-type': 'image/png'}).status_code == 200
+    assert bucket.upload(file=b'png', path='accounts/1_a.png').status_code == 400
+    assert bucket.get_public_url('accounts/1_a.png').endswith('/storage/v1/object/public/images/accounts/1_a.png')
+    assert bucket.remove(['accounts/1_a.png']).status_code == 200
+    assert bucket.list('accounts') == []
+    print("Storage test passed")
+    return True
+
+if __name__ == "__main__":
+    test_table_queries()
+    test_storage()
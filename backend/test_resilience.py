@@ -0,0 +1,147 @@
+"""
+Test file to verify timeouts, circuit breakers and stale fallbacks against
+the local Supabase stand-in with injected faults
+"""
+
+import time
+import controllers.account_controller as account_controller
+from config import Config
+from local_supabase import LocalFaults, LocalSupabaseClient
+from repositories import AccountRepository, UserRepository
+from repositories.supabase_store import SupabaseStore
+from supabase_client import InstrumentedClient
+from utils.resilience import BREAKERS, CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, is_dependency_failure, is_request_error
+
+def test_circuit_breaker():
+    """Check opening after consecutive failures, failing fast and the half-open trial"""
+    breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=0.05)
+
+    def fail():
+        raise ConnectionError('down')
+
+    for _ in range(2):
+        try:
+            breaker.call(fail)
+        except ConnectionError:
+            pass
+    assert breaker.state == OPEN
+    try:
+        breaker.call(lambda: 'never called')
+        assert False, 'expected CircuitOpenError'
+    except CircuitOpenError as err:
+        assert err.dependency == 'test'
+
+    time.sleep(0.06)
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    # Only one trial call at a time
+    try:
+        breaker.before_call()
+        assert False, 'expected CircuitOpenError'
+    except CircuitOpenError:
+        pass
+    breaker.record_success()
+    assert breaker.state == CLOSED and breaker.call(lambda: 'ok') == 'ok'
+    print("Circuit breaker test passed")
+    return True
+
+def test_failure_classification():
+    """Check which errors count as the dependency being down"""
+    from postgrest.exceptions import APIError
+    from storage3.utils import StorageException
+
+    unavailable = (
+        APIError({'code': 503, 'message': 'JSON could not be generated'}),
+        APIError({'code': 'PGRST000', 'message': 'Could not connect to database'}),
+        APIError({'code': '57014', 'message': 'canceling statement due to statement timeout'}),
+        APIError({'message': 'An invalid response was received from the upstream server'}),
+        StorageException({'statusCode': 429}),
+        TimeoutError('timed out'),
+        ConnectionError('reset')
+    )
+    refused = (
+        APIError({'code': '23505', 'message': 'duplicate key value'}),
+        APIError({'code': 'PGRST116', 'message': 'no rows'}),
+        StorageException({'statusCode': 404, 'error': 'not_found'})
+    )
+    assert all(is_dependency_failure(err) and not is_request_error(err) for err in unavailable)
+    assert all(is_request_error(err) and not is_dependency_failure(err) for err in refused)
+    # A bug on our side says nothing about the dependency
+    assert not is_dependency_failure(KeyError('id')) and not is_request_error(KeyError('id'))
+
+    breaker = CircuitBreaker('test_classification', failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        breaker.record_error(APIError({'code': 503}))
+    assert breaker.state == OPEN
+    breaker = CircuitBreaker('test_classification', failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        breaker.record_error(TypeError('bug'))
+    assert breaker.state == CLOSED
+    print("Failure classification test passed")
+    return True
+
+def test_timeouts_and_stale_fallback():
+    """Check read timeouts and that /accounts serves its last good result while PostgREST is down"""
+    from flask_app import app
+    import utils.tokens as tokens
+    from utils.tokens import cache_token_version, invalidate_token_version, issue_token
+
+    faults = LocalFaults()
+    local = LocalSupabaseClient(':memory:', faults=faults)
+    client = InstrumentedClient(local)
+    breaker = BREAKERS['postgrest']
+    repository = account_controller.account_repository
+    user_repository = tokens.user_repository
+    BREAKERS['postgrest'] = CircuitBreaker('postgrest', failure_threshold=2, reset_timeout=60)
+    account_controller.account_repository = AccountRepository(SupabaseStore(client))
+    read_timeout = Config.SUPABASE_READ_TIMEOUT
+    Config.SUPABASE_READ_TIMEOUT = 0.05
+    try:
+        user = local.table('users').insert({'email': 'resilience@example.com'}).execute().data[0]
+        local.table('accounts').insert({'site': 'a.com', 'username': 'u', 'password': 'p', 'image': None, 'user_id': user['id']}).execute()
+        cache_token_version(user['id'], 0)
+        headers = {'Authorization': f"Bearer {issue_token(user['id'], user['email'], 0)}"}
+        http = app.test_client()
+
+        fresh = http.get('/accounts', headers=headers)
+        assert fresh.status_code == 200 and 'Warning' not in fresh.headers
+
+        # A slow PostgREST gives up after the read timeout
+        faults.latency = 1.0
+        start = time.perf_counter()
+        try:
+            client.table('accounts').select('id').execute()
+            assert False, 'expected TimeoutError'
+        except TimeoutError:
+            assert time.perf_counter() - start < 0.5
+        faults.latency = 0.0
+
+        faults.error_rate = 1.0
+        stale = http.get('/accounts', headers=headers)
+        assert stale.status_code == 200 and stale.headers['Warning'].startswith('110')
+        assert stale.get_json()['accounts'] == fresh.get_json()['accounts']
+        assert BREAKERS['postgrest'].state == OPEN
+
+        # Open breaker: no call is made, the stale result is still served
+        stale = http.get('/accounts', headers=headers)
+        assert stale.status_code == 200 and 'Age' in stale.headers
+
+        account_controller.account_list_fallback._entries.clear()
+        assert http.get('/accounts', headers=headers).status_code == 503
+
+        # A token version that cannot be read is never taken from a stale copy
+        invalidate_token_version(user['id'])
+        tokens.user_repository = UserRepository(SupabaseStore(client))
+        assert http.get('/accounts', headers=headers).status_code == 503
+    finally:
+        Config.SUPABASE_READ_TIMEOUT = read_timeout
+        BREAKERS['postgrest'] = breaker
+        account_controller.account_repository = repository
+        tokens.user_repository = user_repository
+    print("Timeout and stale fallback test passed")
+    return True
+
+if __name__ == "__main__":
+    test_circuit_breaker()
+    test_failure_classification()
+    test_timeouts_and_stale_fallback()
@@ -0,0 +1,64 @@
+"""
+Test file to verify compact account serialization and content negotiation
+"""
+
+import json
+from utils.storage_paths import public_base_url
+from utils.serialization import (
+    COLUMNAR_JSON,
+    DEFAULT_ACCOUNT_IMAGE,
+    JSON,
+    MSGPACK,
+    columnar_accounts,
+    encode_compact_accounts,
+    msgpack,
+    negotiate_accounts_format
+)
+
+BASE = public_base_url()
+
+def test_negotiation():
+    """Check that JSON stays the default and compact formats are opt-in"""
+    assert negotiate_accounts_format(None) == JSON
+    assert negotiate_accounts_format('*/*') == JSON
+    assert negotiate_accounts_format('application/json, text/plain, */*') == JSON
+    assert negotiate_accounts_format(COLUMNAR_JSON) == COLUMNAR_JSON
+    assert negotiate_accounts_format(f'{COLUMNAR_JSON}, application/json;q=0.5') == COLUMNAR_JSON
+    assert negotiate_accounts_format(MSGPACK) == (MSGPACK if msgpack else JSON)
+    assert negotiate_accounts_format('application/x-msgpack') == (MSGPACK if msgpack else JSON)
+    # The alias is weighed like any other type, not ahead of them
+    assert negotiate_accounts_format('application/json, application/x-msgpack;q=0.1') == JSON
+    print("Negotiation test passed")
+    return True
+
+def test_columnar_round_trip():
+    """Check default elision, shared base URL and decoding back to objects"""
+    accounts = [
+        {'id': 1, 'site': 'a.com', 'username': 'u', 'password': 'p', 'image': DEFAULT_ACCOUNT_IMAGE},
+        {'id': 2, 'site': 'b.com', 'username': 'u', 'password': 'p', 'image': BASE + 'accounts/2_b.png'},
+        {'id': 3, 'site': 'c.com', 'username': 'u', 'password': 'p', 'image': 'https://cdn.example.com/c.png'}
+    ]
+    payload = columnar_accounts(accounts)
+    assert payload['image_base_url'] == BASE
+    assert [row[4] for row in payload['rows']] == [None, 'accounts/2_b.png', 'https://cdn.example.com/c.png']
+
+    body, content_type = encode_compact_accounts(accounts, COLUMNAR_JSON, json.dumps)
+    decoded = json.loads(body)
+    assert content_type == COLUMNAR_JSON
+    restored = []
+    for row in decoded['rows']:
+        account = dict(zip(decoded['columns'], row))
+        image = account['image']
+        account['image'] = decoded['default_image'] if image is None else (image if image.startswith('http') else decoded['image_base_url'] + image)
+        restored.append(account)
+    assert restored == accounts
+
+    if msgpack:
+        body, content_type = encode_compact_accounts(accounts, MSGPACK, json.dumps)
+        assert content_type == MSGPACK and msgpack.unpackb(body)['rows'] == decoded['rows']
+    print("Columnar round trip test passed")
+    return True
+
+if __name__ == "__main__":
+    test_negotiation()
+    test_columnar_round_trip()
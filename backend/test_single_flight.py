@@ -0,0 +1,75 @@
+"""
+Test file to verify single-flight coalescing of concurrent identical reads
+"""
+
+import asyncio
+import threading
+import time
+from repositories.base import Result
+from utils.metrics import SINGLE_FLIGHT_REQUESTS
+from utils.single_flight import SingleFlight, copy_rows
+
+def test_threads_share_one_call():
+    """Check that concurrent callers share the leader's call and get their own rows"""
+    group = SingleFlight('test_threads', share=copy_rows)
+    calls = []
+    results = []
+
+    def read(user_id):
+        calls.append(user_id)
+        time.sleep(0.05)
+        return Result([{'id': user_id, 'image': None}], None)
+
+    def worker():
+        result = group.do(7, read, 7)
+        result.data[0]['image'] = 'changed'
+        results.append(result)
+
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls == [7] and len(results) == 5
+    assert len({id(result.data[0]) for result in results}) == 5
+    assert SINGLE_FLIGHT_REQUESTS.value('test_threads', 'leader') == 1
+    assert SINGLE_FLIGHT_REQUESTS.value('test_threads', 'coalesced') == 4
+
+    # Nothing is cached once the call has returned
+    group.do(7, read, 7)
+    assert calls == [7, 7]
+    print("Thread single-flight test passed")
+    return True
+
+def test_errors_and_async():
+    """Check that errors reach every caller and that async calls coalesce per loop"""
+    group = SingleFlight('test_async')
+
+    def fail():
+        raise RuntimeError('boom')
+
+    try:
+        group.do('k', fail)
+        assert False, 'expected a RuntimeError'
+    except RuntimeError as err:
+        assert str(err) == 'boom'
+
+    calls = []
+
+    async def read(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    async def main():
+        return await asyncio.gather(*(group.do_async('a', read, 'a') for _ in range(3)), group.do_async('b', read, 'b'))
+
+    assert asyncio.run(main()) == ['A', 'A', 'A', 'B'] and sorted(calls) == ['a', 'b']
+    assert SINGLE_FLIGHT_REQUESTS.value('test_async', 'coalesced') == 2
+    print("Async single-flight test passed")
+    return True
+
+if __name__ == "__main__":
+    test_threads_share_one_call()
+    test_errors_and_async()
@@ -0,0 +1,127 @@
+"""
+Test file to verify the direct SQL repository backend against SQLite
+"""
+
+import sqlite3
+from repositories import AccountRepository, OtpRepository, UserRepository
+from repositories.base import Store
+from repositories.sql_store import SqlStore
+from utils.resilience import is_dependency_failure, is_request_error
+
+SCHEMA = """
+CREATE TABLE users (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  email TEXT UNIQUE,
+  password TEXT,
+  profilepicture TEXT,
+  token_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE accounts (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  site TEXT NOT NULL,
+  username TEXT NOT NULL,
+  password TEXT NOT NULL,
+  image TEXT,
+  user_id INTEGER REFERENCES users(id) ON DELETE CASCADE
+);
+CREATE TABLE otps (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  email TEXT NOT NULL UNIQUE,
+  otp_hash TEXT,
+  salt TEXT,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  expires_at TEXT NOT NULL
+);
+"""
+
+def make_store():
+    store = SqlStore('sqlite:///:memory:')
+    store._driver.executescript(SCHEMA)
+    return store
+
+def test_user_and_account_repositories():
+    """Check CRUD, owner scoping, column projection and constraint errors"""
+    store = make_store()
+    users = UserRepository(store)
+    accounts = AccountRepository(store)
+
+    user = users.create({'email': 'a@example.com', 'password': 'x'}).data[0]
+    assert user['token_version'] == 0
+    # Database errors are raised, as SupabaseStore raises APIError; a
+    # constraint violation shows the database is up
+    try:
+        users.create({'email': 'a@example.com', 'password': 'y'})
+        assert False, 'duplicate email was inserted'
+    except sqlite3.IntegrityError as err:
+        assert is_request_error(err) and not is_dependency_failure(err)
+    assert users.get_by_email('a@example.com').data[0]['id'] == user['id']
+    assert users.update(user['id'], {'token_version': 1}).data[0]['token_version'] == 1
+    assert users.get_by_id(user['id'], 'token_version').data == [{'token_version': 1}]
+
+    # The token-version bump only applies to the version that was read
+    assert users.update_bumping_token_version(user['id'], {'password': 'z'}, 0).data == []
+    assert users.update_bumping_token_version(user['id'], {'password': 'z'}, 1).data[0]['token_version'] == 2
+
+    # A stale read re-reads and bumps past the concurrent change
+    import utils.tokens as tokens
+    saved = tokens.user_repository
+    tokens.user_repository = users
+    try:
+        assert tokens.bump_token_version(user['id'], {'password': 'w'}, 0) == {'token_version': 3, 'error': None}
+        assert tokens.cached_token_version(user['id']) == 3
+        assert tokens.bump_token_version(user['id'] + 100, {}, 0) == {'token_version': None, 'error': None}
+    finally:
+        tokens.user_repository = saved
+
+    created = accounts.create({'site': 'a.com', 'username': 'u', 'password': 'p', 'image': None, 'user_id': user['id']}).data[0]
+    assert accounts.list_for_user(user['id'], 'id, site').data == [{'id': created['id'], 'site': 'a.com'}]
+
+    # Another user's id never matches
+    assert accounts.update_for_user(created['id'], user['id'] + 1, {'site': 'b.com'}).data == []
+    assert accounts.update_for_user(created['id'], user['id'], {'site': 'b.com'}).data[0]['site'] == 'b.com'
+    assert accounts.get_for_user(created['id'], user['id'], 'image').data == [{'image': None}]
+    assert len(accounts.delete_for_user(created['id'], user['id']).data) == 1
+    assert accounts.list_for_user(user['id']).data == []
+    print("User and account repository test passed")
+    return True
+
+def test_otp_repository():
+    """Check upsert on email, expiry filtering, attempt counting and batch deletes"""
+    otps = OtpRepository(make_store())
+
+    first = otps.upsert({'email': 'a@example.com', 'otp_hash': 'h1', 'salt': 's', 'attempts': 0, 'expires_at': '2030-01-01T00:00:00+00:00'}).data[0]
+    second = otps.upsert({'email': 'a@example.com', 'otp_hash': 'h2', 'salt': 's', 'attempts': 0, 'expires_at': '2030-01-01T00:00:00+00:00'}).data[0]
+    assert first['id'] == second['id'] and second['otp_hash'] == 'h2'
+    assert otps.get_active('a@example.com', '2029-01-01T00:00:00+00:00', 'otp_hash').data == [{'otp_hash': 'h2'}]
+    assert otps.get_active('a@example.com', '2031-01-01T00:00:00+00:00').data == []
+
+    # An attempt is counted only against the count that was read
+    assert otps.claim_attempt(first['id'], 0).data[0]['attempts'] == 1
+    assert otps.claim_attempt(first['id'], 0).data == []
+
+    otps.upsert({'email': 'b@example.com', 'otp_hash': 'h', 'salt': 's', 'attempts': 0, 'expires_at': '2020-01-01T00:00:00+00:00'})
+    expired = [row['id'] for row in otps.list_expired_ids('2025-01-01T00:00:00+00:00', 10).data]
+    assert len(expired) == 1
+    assert len(otps.delete_many(expired).data) == 1
+    assert otps.delete_many([]).data == []
+    print("OTP repository test passed")
+    return True
+
+def test_store_interface():
+    """Check that a store missing a method fails when it is created"""
+    class PartialStore(Store):
+        def select(self, table, columns='*', filters=(), order=(), limit=None, hedge=True):
+            return None
+
+    try:
+        PartialStore()
+        assert False, 'incomplete store was created'
+    except TypeError:
+        pass
+    print("Store interface test passed")
+    return True
+
+if __name__ == "__main__":
+    test_user_and_account_repositories()
+    test_otp_repository()
+    test_store_interface()
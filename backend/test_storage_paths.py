@@ -0,0 +1,97 @@
+"""
+Test file to verify storage object keys and public URL building
+"""
+
+import supabase_client
+from config import Config
+from local_supabase import LocalSupabaseClient
+from utils.metrics import CACHE_REQUESTS
+from utils.supabase_storage import detect_content_type
+from utils.storage_paths import (
+    ACCOUNT_IMAGE_PREFIX,
+    DEFAULT_ACCOUNT_IMAGE,
+    DEFAULT_PROFILE_PICTURE,
+    normalize_many,
+    object_key,
+    public_base_url,
+    public_url,
+    upload_key
+)
+
+LEGACY = 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/'
+
+def test_object_key():
+    """Check key extraction from keys, legacy URLs and default images"""
+    assert object_key('accounts/1_a.png') == 'accounts/1_a.png'
+    assert object_key(LEGACY + 'accounts/1_a.png?') == 'accounts/1_a.png'
+    assert object_key(LEGACY + 'profile-pictures/2_b.png') == 'profile-pictures/2_b.png'
+    for value in (None, '', 'images/default.png', DEFAULT_ACCOUNT_IMAGE, DEFAULT_PROFILE_PICTURE):
+        assert object_key(value) is None
+    assert object_key('https://cdn.example.com/a.png') is None
+    assert object_key('images/local.png') is None
+    print("Object key test passed")
+    return True
+
+def test_public_urls():
+    """Check URL building for single values and lists"""
+    base = public_base_url()
+    assert base.endswith('/storage/v1/object/public/images/')
+    assert public_url(None, DEFAULT_PROFILE_PICTURE) == DEFAULT_PROFILE_PICTURE
+    assert public_url('profile-pictures/1_a.png', DEFAULT_PROFILE_PICTURE) == base + 'profile-pictures/1_a.png'
+    assert public_url(LEGACY + 'accounts/1_a.png', DEFAULT_ACCOUNT_IMAGE) == LEGACY + 'accounts/1_a.png'
+    assert public_url('images\\local.png', DEFAULT_ACCOUNT_IMAGE) == 'images/local.png'
+
+    rows = [{'image': None}, {'image': 'accounts/1_a.png'}, {'image': DEFAULT_ACCOUNT_IMAGE}, {'image': 'https://cdn.example.com/a.png'}]
+    assert [row['image'] for row in normalize_many(rows, 'image', DEFAULT_ACCOUNT_IMAGE)] == [
+        DEFAULT_ACCOUNT_IMAGE, base + 'accounts/1_a.png', DEFAULT_ACCOUNT_IMAGE, 'https://cdn.example.com/a.png'
+    ]
+    print("Public URL test passed")
+    return True
+
+def test_upload_keys():
+    """Check content type detection and fresh keys per upload"""
+    assert detect_content_type(b'\x89PNG\r\n\x1a\n....') == 'image/png'
+    assert detect_content_type(b'\xff\xd8\xff\xe0....') == 'image/jpeg'
+    assert detect_content_type(b'RIFF\x00\x00\x00\x00WEBPVP8 ') == 'image/webp'
+    # Only sniffed raster images; SVG and HTML could run scripts from the bucket
+    assert detect_content_type(b'<svg/>') is None
+    assert detect_content_type(b'<html><script>') is None
+
+    first = upload_key(ACCOUNT_IMAGE_PREFIX, 7, 'image/jpeg')
+    second = upload_key(ACCOUNT_IMAGE_PREFIX, 7, 'image/jpeg')
+    assert first.startswith('accounts/7_') and first.endswith('.jpg') and first != second
+    assert upload_key(ACCOUNT_IMAGE_PREFIX, 7, 'image/x-icon').endswith('.ico')
+    for content_type in ('text/html', 'image/svg+xml', 'application/octet-stream', None):
+        try:
+            upload_key(ACCOUNT_IMAGE_PREFIX, 7, content_type)
+            assert False, 'expected ValueError'
+        except ValueError:
+            pass
+    print("Upload key test passed")
+    return True
+
+def test_signed_urls():
+    """Check that signatures are fetched in a batch and reused from the cache"""
+    client = supabase_client.supabase
+    supabase_client.supabase = LocalSupabaseClient(':memory:')
+    Config.STORAGE_SIGNED_URLS = True
+    try:
+        rows = [{'image': 'accounts/1_a.png'}, {'image': None}, {'image': 'accounts/1_b.png'}]
+        first = [row['image'] for row in normalize_many([dict(row) for row in rows], 'image', DEFAULT_ACCOUNT_IMAGE)]
+        assert '/object/sign/images/accounts/1_a.png?token=' in first[0] and first[1] == DEFAULT_ACCOUNT_IMAGE
+
+        hits = CACHE_REQUESTS.value('signed_url', 'hit')
+        second = [row['image'] for row in normalize_many([dict(row) for row in rows], 'image', DEFAULT_ACCOUNT_IMAGE)]
+        assert second == first and CACHE_REQUESTS.value('signed_url', 'hit') == hits + 2
+        assert public_url('accounts/1_a.png', DEFAULT_ACCOUNT_IMAGE) == first[0]
+    finally:
+        Config.STORAGE_SIGNED_URLS = False
+        supabase_client.supabase = client
+    print("Signed URL test passed")
+    return True
+
+if __name__ == "__main__":
+    test_object_key()
+    test_public_urls()
+    test_upload_keys()
+    test_signed_urls()
@@ -0,0 +1,87 @@
+"""
+Test file to verify the delta sync endpoints against the local Supabase stand-in
+"""
+
+import controllers.sync_controller as sync_controller
+from config import Config
+from local_supabase import LocalSupabaseClient
+from repositories import AccountRepository, ItemRepository, TombstoneRepository
+from repositories.supabase_store import SupabaseStore
+
+def test_changes_page():
+    """Check that a page stops before the oldest timestamp a full stream cuts off"""
+    rows = [{'id': i, 'updated_at': f'2024-01-01T00:00:0{i}+00:00'} for i in (1, 2, 3)]
+    tombstones = [{'row_id': 9, 'deleted_at': '2024-01-01T00:00:02.5Z'}]
+
+    changed, deleted, newest, has_more = sync_controller.build_changes_page(rows, tombstones, 2)
+    # Row 2 shares the cut-off timestamp of the full rows stream, so it waits for the next page
+    assert [row['id'] for row in changed] == [1] and deleted == [] and has_more
+    assert sync_controller.format_watermark(newest) == '2024-01-01T00:00:01.000000+00:00'
+
+    changed, deleted, newest, has_more = sync_controller.build_changes_page(rows, tombstones, 5)
+    assert [row['id'] for row in changed] == [1, 2, 3] and deleted == [9] and not has_more
+    assert newest == sync_controller.parse_timestamp('2024-01-01 00:00:03')
+    assert sync_controller.parse_timestamp('2024-01-01T00:00:00.12 00:00').microsecond == 120000
+    print("Changes page test passed")
+    return True
+
+def test_changes_endpoints():
+    """Check full sync, empty deltas, updates and deletions"""
+    from flask_app import app
+    from utils.tokens import cache_token_version, issue_token
+
+    local = LocalSupabaseClient(':memory:')
+    store = SupabaseStore(local)
+    repositories = (sync_controller.account_repository, sync_controller.item_repository, sync_controller.tombstone_repository)
+    sync_controller.account_repository = AccountRepository(store)
+    sync_controller.item_repository = ItemRepository(store)
+    sync_controller.tombstone_repository = TombstoneRepository(store)
+    try:
+        user = local.table('users').insert({'email': 'sync@example.com'}).execute().data[0]
+        cache_token_version(user['id'], 0)
+        headers = {'Authorization': f"Bearer {issue_token(user['id'], user['email'], 0)}"}
+        kept, removed = (local.table('accounts').insert({'site': site, 'username': 'u', 'password': 'p', 'image': None, 'user_id': user['id']}).execute().data[0]
+                         for site in ('a.com', 'b.com'))
+        client = app.test_client()
+        Config.SYNC_SAFETY_LAG_SECONDS = 0
+
+        full = client.get('/accounts/changes', headers=headers).get_json()
+        assert full['reset'] and not full['hasMore'] and [a['site'] for a in full['accounts']] == ['a.com', 'b.com']
+        assert full['accounts'][0]['image'].endswith('/images/default.png')
+
+        empty = client.get('/accounts/changes', headers=headers, query_string={'since': full['watermark']}).get_json()
+        assert empty['accounts'] == [] and empty['deleted'] == [] and not empty['reset']
+        assert empty['watermark'] == full['watermark']
+
+        local.table('accounts').update({'site': 'c.com'}).eq('id', kept['id']).execute()
+        local.table('accounts').delete().eq('id', removed['id']).execute()
+        delta = client.get('/accounts/changes', headers=headers, query_string={'since': full['watermark']}).get_json()
+        assert [a['site'] for a in delta['accounts']] == ['c.com'] and delta['deleted'] == [removed['id']]
+        assert delta['watermark'] > full['watermark']
+
+        Config.SYNC_PAGE_SIZE = 1
+        items = [local.table('items').insert({'name': n, 'description': 'd', 'user_id': user['id']}).execute() for n in ('x', 'y')]
+        page = client.get('/items/changes', headers=headers).get_json()
+        rest = client.get('/items/changes', headers=headers, query_string={'since': page['watermark']}).get_json()
+        assert len(items) == 2 and page['hasMore'] and [i['name'] for i in page['items'] + rest['items']] == ['x', 'y']
+
+        assert client.get('/items/changes', headers=headers, query_string={'since': 'yesterday'}).status_code == 400
+
+        # A change newer than the safety lag is returned, but the watermark
+        # stays behind it, so a write committing late is still picked up
+        Config.SYNC_SAFETY_LAG_SECONDS = 60
+        local.table('accounts').update({'site': 'd.com'}).eq('id', kept['id']).execute()
+        recent = client.get('/accounts/changes', headers=headers, query_string={'since': delta['watermark']}).get_json()
+        again = client.get('/accounts/changes', headers=headers, query_string={'since': recent['watermark']}).get_json()
+        assert [a['site'] for a in recent['accounts']] == [a['site'] for a in again['accounts']] == ['d.com']
+        assert recent['watermark'] == delta['watermark'] and not recent['hasMore']
+    finally:
+        Config.SYNC_PAGE_SIZE = 500
+        Config.SYNC_SAFETY_LAG_SECONDS = 10.0
+        sync_controller.account_repository, sync_controller.item_repository, sync_controller.tombstone_repository = repositories
+    print("Changes endpoint test passed")
+    return True
+
+if __name__ == "__main__":
+    test_changes_page()
+    test_changes_endpoints()
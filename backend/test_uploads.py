@@ -0,0 +1,142 @@
+"""
+Test file to verify direct-to-storage uploads through /uploads/sign and
+/uploads/finalize against the local Supabase stand-in
+"""
+
+import controllers.upload_controller as upload_controller
+import utils.current_user as current_user
+import utils.supabase_storage as supabase_storage
+from config import Config
+from local_supabase import LocalSupabaseClient
+from repositories import AccountRepository, UserRepository
+from repositories.supabase_store import SupabaseStore
+from supabase_client import InstrumentedClient
+
+# A 1x1 transparent PNG
+PNG_IMAGE = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082'
+)
+
+def test_sign_and_finalize():
+    """Check the sign, upload and finalize flow, and that bad uploads are rejected and deleted"""
+    from flask_app import app
+    from utils.tokens import cache_token_version, issue_token
+
+    local = LocalSupabaseClient(':memory:')
+    store = SupabaseStore(local)
+    bucket = local.storage.from_('images')
+    saved = (supabase_storage.supabase, upload_controller.account_repository, upload_controller.user_repository, current_user.user_repository)
+    supabase_storage.supabase = InstrumentedClient(local)
+    upload_controller.account_repository = AccountRepository(store)
+    upload_controller.user_repository = current_user.user_repository = UserRepository(store)
+    try:
+        user = local.table('users').insert({'email': 'upload@example.com', 'profilepicture': None}).execute().data[0]
+        other = local.table('users').insert({'email': 'other-upload@example.com'}).execute().data[0]
+        account = local.table('accounts').insert({'site': 'a.com', 'username': 'u', 'password': 'p', 'image': 'accounts/old.png', 'user_id': user['id']}).execute().data[0]
+        bucket.upload(b'old', 'accounts/old.png')
+        cache_token_version(user['id'], 0)
+        headers = {'Authorization': f"Bearer {issue_token(user['id'], user['email'], 0)}"}
+        client = app.test_client()
+
+        assert client.post('/uploads/sign', json={'kind': 'account', 'contentType': 'image/svg+xml'}, headers=headers).status_code == 415
+        assert client.post('/uploads/sign', json={'kind': 'other', 'contentType': 'image/png'}, headers=headers).status_code == 400
+
+        signed = client.post('/uploads/sign', json={'kind': 'account', 'contentType': 'image/png'}, headers=headers).get_json()
+        key = signed['key']
+        assert key.startswith(f"accounts/{user['id']}_") and key.endswith('.png') and signed['uploadUrl']
+
+        # Finalizing before the upload, or another user's key, fails
+        finalize = {'key': key, 'accountId': account['id']}
+        assert client.post('/uploads/finalize', json=finalize, headers=headers).status_code == 404
+        assert client.post('/uploads/finalize', json={'key': f"accounts/{other['id']}_0123456789abcdef.png", 'accountId': account['id']}, headers=headers).status_code == 400
+
+        # The browser's direct upload
+        assert bucket.upload_to_signed_url(key, 'wrong', PNG_IMAGE).status_code != 200
+        assert bucket.upload_to_signed_url(key, signed['token'], PNG_IMAGE, {'content-type': 'image/png'}).status_code == 200
+
+        response = client.post('/uploads/finalize', json=finalize, headers=headers)
+        assert response.status_code == 200 and response.get_json()['image'].endswith(key)
+        assert local.table('accounts').select('image').eq('id', account['id']).execute().data[0]['image'] == key
+        assert 'accounts/old.png' not in bucket._objects
+
+        # An upload that is too large is rejected and deleted
+        signed = client.post('/uploads/sign', json={'kind': 'profile', 'contentType': 'image/png'}, headers=headers).get_json()
+        bucket.upload_to_signed_url(signed['key'], signed['token'], PNG_IMAGE, {'content-type': 'image/png'})
+        Config.UPLOAD_MAX_BYTES = 10
+        assert client.post('/uploads/finalize', json={'key': signed['key']}, headers=headers).status_code == 413
+        assert signed['key'] not in bucket._objects
+        Config.UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+
+        # A profile picture whose stored content type is not an image
+        signed = client.post('/uploads/sign', json={'kind': 'profile', 'contentType': 'image/png'}, headers=headers).get_json()
+        bucket.upload_to_signed_url(signed['key'], signed['token'], b'<html>', {'content-type': 'text/html'})
+        assert client.post('/uploads/finalize', json={'key': signed['key']}, headers=headers).status_code == 415
+        assert signed['key'] not in bucket._objects
+
+        # The stored type and the bytes must agree: a PNG served as HTML, and HTML labelled as PNG
+        for body, content_type in ((PNG_IMAGE, 'text/html'), (b'<html><script>', 'image/png')):
+            signed = client.post('/uploads/sign', json={'kind': 'profile', 'contentType': 'image/png'}, headers=headers).get_json()
+            bucket.upload_to_signed_url(signed['key'], signed['token'], body, {'content-type': content_type})
+            assert client.post('/uploads/finalize', json={'key': signed['key']}, headers=headers).status_code == 415
+            assert signed['key'] not in bucket._objects
+
+        signed = client.post('/uploads/sign', json={'kind': 'profile', 'contentType': 'image/png'}, headers=headers).get_json()
+        bucket.upload_to_signed_url(signed['key'], signed['token'], PNG_IMAGE, {'content-type': 'image/png'})
+        response = client.post('/uploads/finalize', json={'key': signed['key']}, headers=headers)
+        assert response.status_code == 200 and response.get_json()['profilepicture'].endswith(signed['key'])
+    finally:
+        Config.UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+        supabase_storage.supabase, upload_controller.account_repository, upload_controller.user_repository, current_user.user_repository = saved
+    print("Direct upload test passed")
+    return True
+
+def test_sweep_abandoned_uploads():
+    """Check that old unreferenced uploads are deleted and everything else is kept"""
+    from utils import upload_sweeper
+
+    local = LocalSupabaseClient(':memory:')
+    store = SupabaseStore(local)
+    bucket = local.storage.from_('images')
+    saved = (supabase_storage.supabase, upload_sweeper.account_repository, upload_sweeper.user_repository)
+    supabase_storage.supabase = InstrumentedClient(local)
+    upload_sweeper.account_repository = AccountRepository(store)
+    upload_sweeper.user_repository = UserRepository(store)
+    try:
+        user = local.table('users').insert({'email': 'sweep@example.com', 'profilepicture': 'profile-pictures/1_00000000000000aa.png'}).execute().data[0]
+        local.table('accounts').insert({'site': 'a.com', 'username': 'u', 'password': 'p', 'image': 'accounts/1_00000000000000bb.png', 'user_id': user['id']}).execute()
+
+        keys = (
+            'profile-pictures/1_00000000000000aa.png',  # referenced
+            'profile-pictures/1_00000000000000cc.png',  # abandoned
+            'accounts/1_00000000000000bb.png',          # referenced
+            'accounts/1_00000000000000dd.jpg',          # abandoned
+            'accounts/1_logo.png',                      # not an upload key
+        )
+        for key in keys:
+            bucket.upload(PNG_IMAGE, key)
+            bucket._objects[key]['created_at'] = '2020-01-01T00:00:00+00:00'
+        bucket.upload(PNG_IMAGE, 'accounts/1_00000000000000ee.png')  # still within the signing window
+
+        # References are checked in chunks
+        upload_sweeper._REFERENCE_CHUNK_SIZE = 1
+        result = upload_sweeper.sweep_abandoned_uploads()
+        assert result == {'deleted': 2, 'error': None}
+        assert set(bucket._objects) == {
+            'profile-pictures/1_00000000000000aa.png',
+            'accounts/1_00000000000000bb.png',
+            'accounts/1_logo.png',
+            'accounts/1_00000000000000ee.png'
+        }
+
+        # With no minimum age the fresh upload goes too
+        assert upload_sweeper.sweep_abandoned_uploads(0)['deleted'] == 1
+    finally:
+        upload_sweeper._REFERENCE_CHUNK_SIZE = 100
+        supabase_storage.supabase, upload_sweeper.account_repository, upload_sweeper.user_repository = saved
+    print("Abandoned upload sweep test passed")
+    return True
+
+if __name__ == "__main__":
+    test_sign_and_finalize()
+    test_sweep_abandoned_uploads()
@@ -26,5 +26,46 @@ def test_handler():
         print(f"Handler test failed: {e}")
         return False
 
+def test_create_wsgi_environ():
+    """Check base64 bodies, query arrays, header casing and X-Forwarded-* handling"""
+    import base64
+    from vercel_wrapper import create_wsgi_environ, handler
+
+    image = bytes(range(256)) * 4
+    environ = create_wsgi_environ({
+        'method': 'post',
+        'path': '/accounts',
+        'queryString': {'fields': ['id', 'site'], 'limit': '10'},
+        'headers': {
+            'Content-Type': 'multipart/form-data; boundary=x',
+            'Content-Length': '1',
+            'X-Forwarded-Proto': 'https',
+            'X-Forwarded-For': '203.0.113.7, 10.0.0.1',
+            'Host': 'app.example.com',
+            'Cookie': ['a=1', 'b=2']
+        },
+        'body': base64.b64encode(image).decode('ascii'),
+        'isBase64Encoded': True
+    }, None)
+    assert environ['REQUEST_METHOD'] == 'POST'
+    assert environ['QUERY_STRING'] == 'fields=id&fields=site&limit=10'
+    assert environ['CONTENT_TYPE'] == 'multipart/form-data; boundary=x' and 'HTTP_CONTENT_TYPE' not in environ
+    assert environ['CONTENT_LENGTH'] == str(len(image)) and 'HTTP_CONTENT_LENGTH' not in environ
+    assert environ['wsgi.input'].read() == image
+    assert environ['wsgi.url_scheme'] == 'https' and environ['REMOTE_ADDR'] == '203.0.113.7'
+    assert (environ['SERVER_NAME'], environ['SERVER_PORT']) == ('app.example.com', '443')
+    assert environ['HTTP_COOKIE'] == 'a=1; b=2'
+
+    # A query string in the path, and a memoryview slice as the body
+    environ = create_wsgi_environ({'path': '/read?id=1', 'body': memoryview(b'xx{}yy')[2:4]}, None)
+    assert environ['PATH_INFO'] == '/read' and environ['QUERY_STRING'] == 'id=1'
+    assert environ['CONTENT_LENGTH'] == '2' and environ['wsgi.input'].read() == b'{}'
+
+    result = handler({'method': 'POST', 'path': '/login', 'headers': {}, 'body': 'abc', 'isBase64Encoded': True}, None)
+    assert result['statusCode'] == 400
+    print("WSGI environ test passed")
+    return True
+
 if __name__ == "__main__":
-    test_handler()
\ No newline at end of file
+    test_handler()
+    test_create_wsgi_environ()
\ No newline at end of file
@@ -0,0 +1,78 @@
+"""
+The authenticated user's row, read at most once per request.
+
+A route declares the user columns its controller needs with user_columns.
+authenticate_token widens its token-version lookup with those columns when
+it has to query the database, and keeps the row on flask.g. Controllers
+read the row through load_current_user, which serves the columns already
+loaded and queries only the ones that are not. Nothing outlives the
+request, so there is nothing to invalidate.
+"""
+
+from flask import g, has_app_context
+from repositories import user_repository
+from repositories.base import Result
+from utils.metrics import CACHE_REQUESTS
+
+def parse_columns(columns):
+    """
+    Column names of a PostgREST select list, e.g. 'id, email' -> ('id', 'email').
+    """
+    return tuple(column.strip() for column in columns.split(',') if column.strip())
+
+def user_columns(columns):
+    """
+    Declare the user columns a route's controller reads, so authenticate_token
+    can load them with its own query. Apply below @authenticate_token.
+    """
+    def decorator(f):
+        f.user_columns = columns
+        return f
+    return decorator
+
+def remember_current_user(user_id, row, columns):
+    """
+    Keep columns of the current user's row (None if the user does not
+    exist) for the rest of the request.
+    """
+    if not has_app_context():
+        return
+    state = g.get('_current_user')
+    if state is None or state['id'] != user_id:
+        state = g._current_user = {'id': user_id, 'row': {}, 'columns': set(), 'found': True}
+    if row is None:
+        state['found'] = False
+    else:
+        state['row'].update(row)
+    state['columns'].update(parse_columns(columns))
+
+def load_current_user(user_id, columns):
+    """
+    Columns of the current user's row, querying only those not loaded yet
+    in this request.
+
+    Returns:
+        Result: data is [row] with exactly the requested columns, or [] if
+        the user does not exist
+    """
+    if not has_app_context():
+        return user_repository.get_by_id(user_id, columns)
+
+    wanted = parse_columns(columns)
+    state = g.get('_current_user')
+    loaded = state['columns'] if state is not None and state['id'] == user_id else set()
+    missing = [column for column in wanted if column not in loaded]
+    if not missing or (state is not None and not state['found'] and state['id'] == user_id):
+        CACHE_REQUESTS.inc('current_user', 'hit')
+    else:
+        CACHE_REQUESTS.inc('current_user', 'miss')
+        response = user_repository.get_by_id(user_id, ', '.join(missing))
+        if response.error:
+            return response
+        remember_current_user(user_id, response.data[0] if response.data else None, ', '.join(missing))
+        state = g._current_user
+
+    if not state['found']:
+        return Result([], None)
+    # A copy, so callers can reshape it (e.g. profile picture URLs) freely
+    return Result([{column: state['row'].get(column) for column in wanted}], None)
@@ -0,0 +1,85 @@
+"""
+Streaming exports of accounts and items as NDJSON or CSV.
+
+Rows are read in fixed-size pages with keyset pagination (id > last id,
+ordered by id) and encoded one page at a time, so memory use depends on
+the page size and not on the number of rows. The same generators feed the
+chunked responses of /accounts/export and /items/export and the
+export_vault.py command line tool.
+"""
+
+import csv
+import io
+import json
+
+NDJSON = 'application/x-ndjson'
+CSV = 'text/csv'
+
+FORMATS = {
+    'ndjson': NDJSON,
+    'csv': CSV
+}
+
+# Columns exported per table, in CSV column order
+EXPORT_COLUMNS = {
+    'accounts': ('id', 'site', 'username', 'password', 'image', 'updated_at'),
+    'items': ('id', 'name', 'description', 'updated_at')
+}
+
+def iter_pages(fetch_page, page_size, label='rows'):
+    """
+    Read every page of a keyset-paginated query.
+
+    Args:
+        fetch_page: Callable (after_id, limit) -> Result, ordered by id
+        page_size: Rows per query
+        label: Name used in error messages
+
+    Yields:
+        list: Non-empty lists of row dicts
+
+    Raises:
+        RuntimeError: If a page read fails. A response that has started
+        streaming cannot change its status any more, so the error aborts it.
+    """
+    after_id = 0
+    while True:
+        result = fetch_page(after_id, page_size)
+        if result.error:
+            raise RuntimeError(f"Error reading {label}: {result.error}")
+        if result.data:
+            yield result.data
+        if len(result.data) < page_size:
+            return
+        after_id = result.data[-1]['id']
+
+def ndjson_chunks(pages, dumps_bytes=None):
+    """
+    Encode pages as newline-delimited JSON, one chunk per page.
+    """
+    dumps_bytes = dumps_bytes or (lambda row: json.dumps(row, default=str, separators=(',', ':')).encode())
+    for page in pages:
+        yield b''.join([dumps_bytes(row) + b'\n' for row in page])
+
+def csv_chunks(pages, columns):
+    """
+    Encode pages as CSV with a header row, one chunk per page.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    header = buffer.getvalue().encode()
+    yield header
+    for page in pages:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(page)
+        yield buffer.getvalue().encode()
+
+def encode_pages(pages, export_format, columns, dumps_bytes=None):
+    """
+    Encode pages in an export format ('ndjson' or 'csv').
+    """
+    if export_format == 'csv':
+        return csv_chunks(pages, columns)
+    return ndjson_chunks(pages, dumps_bytes)
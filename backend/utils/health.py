@@ -0,0 +1,118 @@
+import logging
+import smtplib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime, timezone
+from config import Config
+from repositories import store
+from supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix='health-probe')
+_cache = {'result': None, 'expires_at': 0.0}
+_cache_lock = threading.Lock()
+
+# The probes' own timeouts bound how long they hold a pool thread; waiting
+# on a future would only stop the wait, not the probe
+def _probe_database():
+    if not store.is_ready():
+        raise RuntimeError('Data backend is not initialized')
+    response = store.ping(timeout=Config.HEALTH_PROBE_TIMEOUT)
+    if response.error:
+        raise RuntimeError(str(response.error))
+
+def _probe_storage():
+    if supabase is None:
+        raise RuntimeError('Supabase client is not initialized')
+    supabase.storage_with_timeout(Config.HEALTH_PROBE_TIMEOUT).get_bucket('images')
+
+def _probe_smtp():
+    server = smtplib.SMTP(Config.EMAIL_HOST, Config.EMAIL_PORT, timeout=Config.HEALTH_PROBE_TIMEOUT)
+    server.quit()
+
+# name -> (probe, critical); a failing non-critical probe only degrades readiness
+PROBES = {
+    'database': (_probe_database, True),
+    'storage': (_probe_storage, True),
+    'smtp': (_probe_smtp, False)
+}
+
+# name -> (future, start) of a probe that has not finished yet, and the last
+# check reported for each probe
+_pending = {}
+_last_checks = {}
+
+def _run_probes():
+    started = {}
+    futures = {}
+    for name, (probe, _) in PROBES.items():
+        if name in _pending and not _pending[name][0].done():
+            # Still running from an earlier check: do not tie up another thread
+            continue
+        started[name] = time.perf_counter()
+        futures[name] = _executor.submit(probe)
+        _pending[name] = (futures[name], started[name])
+
+    checks = {}
+    deadline = time.perf_counter() + Config.HEALTH_PROBE_TIMEOUT
+    for name in PROBES:
+        if name not in futures:
+            check = dict(_last_checks.get(name) or {'status': 'fail', 'critical': PROBES[name][1], 'error': 'timed out'})
+            check['pending_s'] = round(time.perf_counter() - _pending[name][1], 1)
+            checks[name] = check
+            continue
+        check = {'status': 'ok', 'critical': PROBES[name][1]}
+        try:
+            futures[name].result(timeout=max(0.0, deadline - time.perf_counter()))
+        except FutureTimeoutError:
+            check['status'] = 'fail'
+            check['error'] = 'timed out'
+        except Exception as err:
+            check['status'] = 'fail'
+            check['error'] = str(err)
+        check['latency_ms'] = round((time.perf_counter() - started[name]) * 1000, 1)
+        if check['status'] == 'fail':
+            logger.warning("Health probe %s failed: %s", name, check['error'])
+        checks[name] = _last_checks[name] = check
+
+    if any(c['status'] == 'fail' and c['critical'] for c in checks.values()):
+        status = 'unavailable'
+    elif any(c['status'] == 'fail' for c in checks.values()):
+        status = 'degraded'
+    else:
+        status = 'ok'
+
+    return {
+        'status': status,
+        'checks': checks,
+        'checked_at': datetime.now(timezone.utc).isoformat()
+    }
+
+def check_readiness():
+    """
+    Probe Supabase, Storage and SMTP, caching the result for HEALTH_CACHE_TTL seconds.
+
+    Probes run concurrently with a shared HEALTH_PROBE_TIMEOUT, and each
+    probe's own calls time out after it too. A probe still running from an
+    earlier check is not started again; its last result is reported. Concurrent
+    callers wait for a single probe run instead of starting their own, so
+    load-balancer polling does not multiply into dependency traffic.
+
+    Returns:
+        dict: {'status': 'ok' | 'degraded' | 'unavailable', 'checks': {...},
+               'checked_at': str, 'cached': bool}
+    """
+    if _cache['expires_at'] > time.monotonic():
+        return dict(_cache['result'], cached=True)
+
+    with _cache_lock:
+        # Another request may have refreshed the cache while we waited
+        if _cache['expires_at'] > time.monotonic():
+            return dict(_cache['result'], cached=True)
+        result = _run_probes()
+        _cache['result'] = result
+        _cache['expires_at'] = time.monotonic() + Config.HEALTH_CACHE_TTL
+
+    return dict(result, cached=False)
@@ -0,0 +1,213 @@
+"""
+Hedged reads: trimming tail latency by racing a second copy of a slow read.
+
+A read that has not returned within the recent p95 latency of its kind
+(HEDGE_PERCENTILE) is sent again, and whichever copy returns first wins.
+Only idempotent reads may be hedged. The delay makes only the slowest few
+percent of reads candidates, and a budget caps the extra load: every read
+earns HEDGE_BUDGET of a hedge (5% by default), at most HEDGE_BURST are
+saved up, and a hedge is only sent when one is available.
+
+Hedging is opt-in (HEDGED_READS=true) and waits for HEDGE_MIN_SAMPLES
+latencies of a kind before its first hedge, so the delay reflects real
+traffic.
+
+Sync attempts run on a pool of HEDGE_THREADS threads, but only on idle
+ones: a read that finds none runs on the caller's thread without a hedge,
+and a hedge that finds none is not sent. Reads therefore never queue for
+the pool, whatever the server's own thread count, and losing attempts
+still running can only cost hedges, not throughput.
+"""
+
+import asyncio
+import contextvars
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from config import Config
+from utils.metrics import counter
+
+HEDGED_REQUESTS = counter(
+    'hedged_requests_total',
+    'Hedged reads by kind and outcome (fired: second copy sent, won: it returned first, '
+    'over_budget / saturated: not sent for lack of budget / idle threads).',
+    labels=('kind', 'outcome')
+)
+
+class LatencyTracker:
+    """
+    Recent latencies per kind of read, with a cached percentile.
+    """
+    def __init__(self, percentile, window=200, min_samples=20):
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        # kind -> [samples deque, observations since the percentile was computed, cached percentile]
+        self._kinds = {}
+        self._lock = threading.Lock()
+
+    def observe(self, kind, seconds):
+        entry = self._kinds.get(kind)
+        if entry is None:
+            with self._lock:
+                entry = self._kinds.setdefault(kind, [deque(maxlen=self.window), 0, None])
+        entry[0].append(seconds)
+        # No lock: a lost increment only delays the next recomputation
+        entry[1] += 1
+
+    def value(self, kind):
+        """
+        The percentile of kind's recent latencies, or None with too few samples.
+
+        Recomputed after a tenth of a window of new samples, so the sort is
+        spread over many reads.
+        """
+        entry = self._kinds.get(kind)
+        if entry is None or len(entry[0]) < self.min_samples:
+            return None
+        if entry[2] is None or entry[1] >= self.window // 10:
+            ordered = sorted(entry[0])
+            entry[2] = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))]
+            entry[1] = 0
+        return entry[2]
+
+class HedgeBudget:
+    """
+    Token bucket limiting hedges to a share of reads.
+    """
+    def __init__(self, ratio, burst):
+        self.ratio = ratio
+        self.burst = burst
+        self._tokens = float(burst)
+        self._lock = threading.Lock()
+
+    def earn(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + self.ratio)
+
+    def spend(self):
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def refund(self):
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+class Hedger:
+    """
+    Runs reads with a hedge after the kind's percentile latency.
+    """
+    def __init__(self, percentile=None, ratio=None, burst=None, min_delay=None, min_samples=None, threads=None):
+        self.tracker = LatencyTracker(percentile or Config.HEDGE_PERCENTILE, min_samples=min_samples or Config.HEDGE_MIN_SAMPLES)
+        self.budget = HedgeBudget(Config.HEDGE_BUDGET if ratio is None else ratio, burst or Config.HEDGE_BURST)
+        self.min_delay = Config.HEDGE_MIN_DELAY_MS / 1000 if min_delay is None else min_delay
+        self._threads = threads or Config.HEDGE_THREADS
+        # Idle pool threads; an attempt is only submitted when it can start at once
+        self._idle = threading.Semaphore(self._threads)
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def observe(self, kind, seconds):
+        self.tracker.observe(kind, seconds)
+
+    def delay(self, kind):
+        value = self.tracker.value(kind)
+        return None if value is None else max(value, self.min_delay)
+
+    def _submit(self, fn):
+        """
+        Start fn on an idle pool thread, or return None if there is none.
+        """
+        if not self._idle.acquire(blocking=False):
+            return None
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._threads, thread_name_prefix='hedge')
+
+        def run():
+            try:
+                return fn()
+            finally:
+                self._idle.release()
+        # A copy of the caller's context keeps spans in its Server-Timing header
+        return self._executor.submit(contextvars.copy_context().run, run)
+
+    def call(self, kind, attempt):
+        """
+        Return attempt()'s result, racing a second attempt() if the first is slow.
+
+        The first successful attempt wins; if both fail, the first error is raised.
+        """
+        self.budget.earn()
+        delay = self.delay(kind)
+        if delay is None:
+            return attempt()
+
+        primary = self._submit(attempt)
+        if primary is None:
+            HEDGED_REQUESTS.inc(kind, 'saturated')
+            return attempt()
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+        if not self.budget.spend():
+            HEDGED_REQUESTS.inc(kind, 'over_budget')
+            return primary.result()
+
+        hedge = self._submit(attempt)
+        if hedge is None:
+            HEDGED_REQUESTS.inc(kind, 'saturated')
+            self.budget.refund()
+            return primary.result()
+        HEDGED_REQUESTS.inc(kind, 'fired')
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        HEDGED_REQUESTS.inc(kind, 'won')
+                    # The slower attempt finishes in the background; its result is dropped
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    async def call_async(self, kind, attempt):
+        """
+        Async counterpart of call(); attempt is a coroutine function and the
+        losing attempt is cancelled.
+        """
+        self.budget.earn()
+        delay = self.delay(kind)
+        if delay is None:
+            return await attempt()
+
+        primary = asyncio.ensure_future(attempt())
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        if not self.budget.spend():
+            HEDGED_REQUESTS.inc(kind, 'over_budget')
+            return await primary
+
+        HEDGED_REQUESTS.inc(kind, 'fired')
+        hedge = asyncio.ensure_future(attempt())
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            HEDGED_REQUESTS.inc(kind, 'won')
+                        return task.result()
+                    error = error or task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
@@ -0,0 +1,116 @@
+import time
+from contextlib import contextmanager
+from functools import wraps
+from flask import g, has_request_context, request, Response
+from utils.json_provider import FastJSONProvider
+from utils.metrics import counter, histogram, render_metrics
+
+REQUESTS = counter(
+    'http_requests_total',
+    'HTTP requests handled, by route and status code.',
+    labels=('method', 'route', 'status')
+)
+REQUEST_DURATION = histogram(
+    'http_request_duration_seconds',
+    'Time spent handling HTTP requests.',
+    labels=('method', 'route')
+)
+SPAN_DURATION = histogram(
+    'span_duration_seconds',
+    'Time spent in instrumented spans (JWT decode, database, storage, JSON).',
+    labels=('span',)
+)
+
+# Cap on Server-Timing entries so a chatty request cannot bloat the header
+_MAX_SERVER_TIMING_ENTRIES = 20
+
+@contextmanager
+def span(name, description=None):
+    """
+    Time a block of code as a named span.
+
+    The duration is always added to the span histogram. Inside a request it
+    is also recorded on flask.g and reported in the Server-Timing header.
+
+    Args:
+        name: Short span name, e.g. 'db' or 'storage'
+        description: Optional detail, e.g. 'accounts.select'
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, description, time.perf_counter() - start)
+
+def record_span(name, description, duration):
+    """
+    Record an already-measured span (see span()).
+    """
+    SPAN_DURATION.observe(duration, name)
+    if has_request_context():
+        spans = g.setdefault('spans', [])
+        spans.append((name, description, duration))
+
+def timed(name, description=None):
+    """
+    Decorator form of span().
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            with span(name, description or f.__name__):
+                return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+def _server_timing(spans, total):
+    entries = []
+    for name, description, duration in spans[:_MAX_SERVER_TIMING_ENTRIES]:
+        entry = f'{name};dur={duration * 1000:.1f}'
+        if description:
+            entry += f';desc="{description}"'
+        entries.append(entry)
+    entries.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(entries)
+
+class TimedJSONProvider(FastJSONProvider):
+    """
+    JSON provider that records serialization time as a 'json' span.
+    """
+    def dumps(self, obj, **kwargs):
+        with span('json'):
+            return super().dumps(obj, **kwargs)
+
+    def dumps_bytes(self, obj, **kwargs):
+        with span('json'):
+            return super().dumps_bytes(obj, **kwargs)
+
+def init_instrumentation(app):
+    """
+    Install per-request timing on a Flask app.
+
+    Adds before/after request hooks that time every request, emit a
+    Server-Timing header with the recorded spans, feed the per-route latency
+    histogram and serve all metrics at /metrics.
+    """
+    app.json = TimedJSONProvider(app, use_orjson=app.config.get('JSON_PROVIDER') != 'stdlib')
+
+    @app.before_request
+    def start_request_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_timing(response):
+        start = g.get('request_start')
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_DURATION.observe(total, request.method, route)
+        REQUESTS.inc(request.method, route, response.status_code)
+        response.headers['Server-Timing'] = _server_timing(g.get('spans', []), total)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,113 @@
+"""
+Fast JSON provider for the Flask app (app.json, used by jsonify).
+
+Responses are encoded with orjson when it is installed (pip install orjson),
+and with the standard library otherwise. Both produce the same JSON:
+compact, UTF-8, keys in insertion order, and dates and datetimes as ISO 8601
+strings (the format Supabase returns them in) instead of Flask's HTTP dates.
+
+JSON_PROVIDER=stdlib forces the standard library encoder.
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: pip install orjson
+    orjson = None
+
+# dumps() keyword arguments orjson can honor; anything else uses the stdlib
+_ORJSON_KWARGS = frozenset(('separators', 'indent', 'sort_keys', 'default', 'ensure_ascii'))
+
+def _default(o):
+    """
+    Encode the types Flask's provider supports, with ISO 8601 dates.
+    """
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson, falling back to the standard library.
+    """
+    default = staticmethod(_default)
+    ensure_ascii = False
+    # Sorting costs time on every response and clients do not depend on key order
+    sort_keys = False
+
+    def __init__(self, app, use_orjson=None):
+        super().__init__(app)
+        self.use_orjson = orjson is not None if use_orjson is None else use_orjson and orjson is not None
+
+    @property
+    def backend(self):
+        return 'orjson' if self.use_orjson else 'stdlib'
+
+    def _orjson_options(self, indent, sort_keys):
+        options = orjson.OPT_NON_STR_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        if sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def _orjson_compatible(self, kwargs):
+        indent = kwargs.get('indent')
+        # orjson always writes compact UTF-8, or indents by two spaces
+        return (self.use_orjson and _ORJSON_KWARGS.issuperset(kwargs) and
+                indent in (None, 0, 2) and not kwargs.get('ensure_ascii') and
+                tuple(kwargs.get('separators') or (',', ':')) == (',', ':'))
+
+    def _orjson_dumps(self, obj, kwargs):
+        options = self._orjson_options(kwargs.get('indent'), kwargs.get('sort_keys', self.sort_keys))
+        return orjson.dumps(obj, default=kwargs.get('default', self.default), option=options)
+
+    def _stdlib_dumps(self, obj, kwargs):
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        if not kwargs.get('indent'):
+            kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def dumps_bytes(self, obj, **kwargs):
+        """
+        Serialize obj to UTF-8 encoded JSON bytes.
+        """
+        if self._orjson_compatible(kwargs):
+            return self._orjson_dumps(obj, kwargs)
+        return self._stdlib_dumps(obj, kwargs).encode()
+
+    def dumps(self, obj, **kwargs):
+        if self._orjson_compatible(kwargs):
+            return self._orjson_dumps(obj, kwargs).decode()
+        return self._stdlib_dumps(obj, kwargs)
+
+    def loads(self, s, **kwargs):
+        if self.use_orjson and not kwargs:
+            return orjson.loads(s)
+        return super().loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        """
+        Build a JSON response, encoding straight to bytes.
+
+        Pretty-printed in debug mode (or with compact = False), like Flask's.
+        """
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = 2 if (self.compact is None and self._app.debug) or self.compact is False else None
+        body = self.dumps_bytes(obj, indent=indent) + b'\n'
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -3,41 +3,80 @@ import os
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from config import Config
+from utils.instrumentation import span
+from utils.metrics import histogram
+from utils.resilience import BREAKERS
 import logging
+import time
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SMTP_DURATION = histogram(
+    'smtp_send_duration_seconds',
+    'Time to deliver an email over SMTP, by outcome.',
+    labels=('outcome',)
+)
+
+def build_message(email, subject, body):
+    """
+    Build a plain-text email from the configured sender.
+    """
+    msg = MIMEMultipart()
+    msg['From'] = f'"Leirad Noznag" <{Config.EMAIL_USER}>'
+    msg['To'] = email
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    return msg
+
+def _send_message(email, msg):
+    """
+    Deliver a message over a new SMTP session, recording its latency.
+    
+    Each socket operation is bounded by SMTP_TIMEOUT, and the session goes
+    through the SMTP circuit breaker, so a dead mail server fails fast.
+    """
+    breaker = BREAKERS['smtp']
+    breaker.before_call()
+    outcome = 'error'
+    start = time.perf_counter()
+    try:
+        with span('smtp'):
+            # Create SMTP session
+            server = smtplib.SMTP(Config.EMAIL_HOST, Config.EMAIL_PORT, timeout=Config.SMTP_TIMEOUT)
+            server.starttls()  # Enable security
+            server.login(Config.EMAIL_USER, Config.EMAIL_PASS)
+            
+            # Send email
+            text = msg.as_string()
+            server.sendmail(Config.EMAIL_USER, email, text)
+            server.quit()
+        outcome = 'ok'
+    except (smtplib.SMTPAuthenticationError, smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused):
+        # The server answered: it is up, it refused this message
+        breaker.record_success()
+        raise
+    except Exception:
+        breaker.record_failure()
+        raise
+    finally:
+        SMTP_DURATION.observe(time.perf_counter() - start, outcome)
+    breaker.record_success()
+
 def send_otp_email(email, otp):
     """
     Send OTP email to the user.
     """
     try:
         # Create message
-        msg = MIMEMultipart()
-        msg['From'] = f'"Leirad Noznag" <{Config.EMAIL_USER}>'
-        msg['To'] = email
-        msg['Subject'] = 'Your OTP for Registration'
-        
-        # Email body
-        body = f'Your One-Time Password (OTP) is: {otp}. It is valid for 5 minutes. Do not share this with anyone.'
-        msg.attach(MIMEText(body, 'plain'))
+        body = f'Your One-Time Password (OTP) is: {otp}. It is valid for {Config.OTP_TTL_SECONDS // 60} minutes. Do not share this with anyone.'
+        msg = build_message(email, 'Your OTP for Registration', body)
         
-        # Create SMTP session
-        server = smtplib.SMTP(Config.EMAIL_HOST, Config.EMAIL_PORT)
-        server.starttls()  # Enable security
-        server.login(Config.EMAIL_USER, Config.EMAIL_PASS)
+        _send_message(email, msg)
         
-        # Send email
-        text = msg.as_string()
-        server.sendmail(Config.EMAIL_USER, email, text)
-        server.quit()
-        
-        logger.info(f"OTP email sent successfully to: {email}")
+        logger.info("OTP email sent successfully to: %s", email)
         return True
     except Exception as e:
-        logger.error(f"Error sending OTP email to {email}: {str(e)}")
+        logger.error("Error sending OTP email to %s: %s", email, e)
         return False
 
 def send_password_reset_email(email, otp):
@@ -46,27 +85,13 @@ def send_password_reset_email(email, otp):
     """
     try:
         # Create message
-        msg = MIMEMultipart()
-        msg['From'] = f'"Leirad Noznag" <{Config.EMAIL_USER}>'
-        msg['To'] = email
-        msg['Subject'] = 'Password Reset OTP'
-        
-        # Email body
-        body = f'Your One-Time Password (OTP) for password reset is: {otp}. It is valid for 5 minutes. Do not share this with anyone.'
-        msg.attach(MIMEText(body, 'plain'))
-        
-        # Create SMTP session
-        server = smtplib.SMTP(Config.EMAIL_HOST, Config.EMAIL_PORT)
-        server.starttls()  # Enable security
-        server.login(Config.EMAIL_USER, Config.EMAIL_PASS)
+        body = f'Your One-Time Password (OTP) for password reset is: {otp}. It is valid for {Config.OTP_TTL_SECONDS // 60} minutes. Do not share this with anyone.'
+        msg = build_message(email, 'Password Reset OTP', body)
         
-        # Send email
-        text = msg.as_string()
-        server.sendmail(Config.EMAIL_USER, email, text)
-        server.quit()
+        _send_message(email, msg)
         
-        logger.info(f"Password reset email sent successfully to: {email}")
+        logger.info("Password reset email sent successfully to: %s", email)
         return True
     except Exception as e:
-        logger.error(f"Error sending password reset email to {email}: {str(e)}")
+        logger.error("Error sending password reset email to %s: %s", email, e)
         return False
\ No newline at end of file
@@ -0,0 +1,223 @@
+import bisect
+import gc
+import os
+import threading
+import time
+
+# Latency buckets in seconds, shared by every duration histogram
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+_registry_lock = threading.Lock()
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join('%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"')) for name, value in pairs) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _HistogramChild:
+    """
+    One labeled histogram series with fixed, pre-computed buckets.
+    """
+    __slots__ = ('buckets', 'counts', 'sum')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        # No lock: a lost update under contention is acceptable for metrics
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+class Histogram:
+    """
+    A Prometheus-style histogram with optional labels.
+    """
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, _HistogramChild(self.buckets))
+        return child
+
+    def observe(self, value, *label_values):
+        self.labels(*label_values).observe(value)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, values, ("le", _format_value(bound)))} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.label_names, values)} {_format_value(child.sum)}')
+            lines.append(f'{self.name}_count{_format_labels(self.label_names, values)} {cumulative}')
+        return lines
+
+class _CounterChild:
+    """
+    One labeled counter series.
+    """
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        # No lock: a lost update under contention is acceptable for metrics
+        self.value += amount
+
+class Counter:
+    """
+    A Prometheus-style monotonically increasing counter with optional labels.
+    """
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, _CounterChild())
+        return child
+
+    def inc(self, *label_values, amount=1):
+        self.labels(*label_values).inc(amount)
+
+    def value(self, *label_values):
+        child = self._children.get(label_values)
+        return child.value if child else 0
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for values, child in list(self._children.items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, values)} {_format_value(child.value)}')
+        return lines
+
+class GaugeCallback:
+    """
+    A gauge (or counter) whose samples are computed when metrics are rendered.
+
+    The callback returns a list of (label_values, value) tuples.
+    """
+    def __init__(self, name, documentation, callback, labels=(), metric_type='gauge'):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.callback = callback
+        self.metric_type = metric_type
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.metric_type}']
+        for values, value in self.callback():
+            lines.append(f'{self.name}{_format_labels(self.label_names, values)} {_format_value(value)}')
+        return lines
+
+def _register(metric):
+    with _registry_lock:
+        _registry.append(metric)
+    return metric
+
+def counter(name, documentation, labels=()):
+    """
+    Create and register a counter.
+    """
+    return _register(Counter(name, documentation, labels))
+
+def gauge_callback(name, documentation, callback, labels=(), metric_type='gauge'):
+    """
+    Register a gauge whose value is computed at render time.
+    """
+    return _register(GaugeCallback(name, documentation, callback, labels, metric_type))
+
+def histogram(name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+    """
+    Create and register a histogram.
+    """
+    return _register(Histogram(name, documentation, labels, buckets))
+
+def render_metrics():
+    """
+    Render every registered metric in the Prometheus text exposition format.
+    """
+    lines = []
+    for metric in list(_registry):
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+# Cache lookups across in-process caches; the hit ratio is hits / (hits + misses)
+CACHE_REQUESTS = counter(
+    'cache_requests_total',
+    'In-process cache lookups by cache and result (hit or miss).',
+    labels=('cache', 'result')
+)
+
+# Reads sharing an in-flight query (utils/single_flight.py); coalesced calls never reached the database
+SINGLE_FLIGHT_REQUESTS = counter(
+    'single_flight_requests_total',
+    'Single-flight reads by group and role (leader ran the query, coalesced shared it).',
+    labels=('group', 'role')
+)
+
+_PROCESS_START = time.time()
+
+def _resident_memory_bytes():
+    try:
+        # Current RSS on Linux: second field of statm, in pages
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        # Peak RSS as a fallback (kilobytes on Linux, bytes on macOS)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        return 0
+
+gauge_callback(
+    'process_resident_memory_bytes',
+    'Resident memory size in bytes.',
+    lambda: [((), _resident_memory_bytes())]
+)
+gauge_callback(
+    'process_start_time_seconds',
+    'Start time of the process since the epoch in seconds.',
+    lambda: [((), _PROCESS_START)]
+)
+gauge_callback(
+    'python_gc_collections_total',
+    'Garbage collections per generation.',
+    lambda: [((generation,), stats['collections']) for generation, stats in enumerate(gc.get_stats())],
+    labels=('generation',),
+    metric_type='counter'
+)
+gauge_callback(
+    'python_gc_objects_collected_total',
+    'Objects collected by the garbage collector per generation.',
+    lambda: [((generation,), stats['collected']) for generation, stats in enumerate(gc.get_stats())],
+    labels=('generation',),
+    metric_type='counter'
+)
@@ -0,0 +1,211 @@
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+from datetime import datetime, timedelta, timezone
+from config import Config
+from repositories import otp_repository
+
+logger = logging.getLogger(__name__)
+
+_sweeper_thread = None
+_sweeper_stop = threading.Event()
+_sweeper_lock = threading.Lock()
+
+# Re-reads allowed when parallel attempts keep winning the attempt count
+_CLAIM_RETRIES = 5
+
+def _utcnow_iso(offset_seconds=0):
+    return (datetime.now(timezone.utc) + timedelta(seconds=offset_seconds)).isoformat()
+
+def _hash_otp(otp, salt):
+    return hashlib.sha256((otp + salt).encode()).hexdigest()
+
+def generate_otp():
+    """
+    Generate a random 6-digit OTP.
+    """
+    return f"{secrets.randbelow(1000000):06d}"
+
+def issue_otp(email):
+    """
+    Create a new OTP for an email, replacing any previous one.
+    
+    Only a salted hash of the code is stored; the row expires after OTP_TTL_SECONDS.
+    
+    Args:
+        email: The email the OTP is issued for
+    
+    Returns:
+        dict: {'otp': str or None, 'error': str or None}
+    """
+    try:
+        otp = generate_otp()
+        salt = secrets.token_hex(16)
+        
+        response = otp_repository.upsert({
+            'email': email,
+            'otp_hash': _hash_otp(otp, salt),
+            'salt': salt,
+            'attempts': 0,
+            'created_at': _utcnow_iso(),
+            'expires_at': _utcnow_iso(Config.OTP_TTL_SECONDS)
+        })
+        
+        if response.error:
+            error_msg = f"Error storing OTP: {response.error}"
+            logger.error(error_msg)
+            return {'otp': None, 'error': error_msg}
+        
+        return {'otp': otp, 'error': None}
+        
+    except Exception as err:
+        error_msg = f"Unexpected error issuing OTP: {str(err)}"
+        logger.error(error_msg)
+        return {'otp': None, 'error': error_msg}
+
+def verify_otp(email, otp, consume=True):
+    """
+    Verify an OTP for an email.
+    
+    Expired rows are filtered out by the query itself. Every attempt is
+    counted before the code is compared, with a conditional update on the
+    count that was read, so parallel guesses cannot share one attempt. The
+    OTP is discarded once OTP_MAX_ATTEMPTS is reached.
+    
+    Args:
+        email: The email the OTP was issued for
+        otp: The code supplied by the user
+        consume: Delete the OTP after a successful verification (default: True)
+    
+    Returns:
+        dict: {'valid': bool, 'error': str or None}
+    """
+    try:
+        for _ in range(_CLAIM_RETRIES):
+            response = otp_repository.get_active(email, _utcnow_iso(), 'id, otp_hash, salt, attempts')
+            
+            if response.error:
+                error_msg = f"Error fetching OTP: {response.error}"
+                logger.error(error_msg)
+                return {'valid': False, 'error': error_msg}
+            
+            if not response.data:
+                return {'valid': False, 'error': None}
+            
+            record = response.data[0]
+            attempts = record.get('attempts') or 0
+            
+            if attempts >= Config.OTP_MAX_ATTEMPTS:
+                otp_repository.delete(record['id'])
+                return {'valid': False, 'error': None}
+            
+            claim = otp_repository.claim_attempt(record['id'], attempts)
+            
+            if claim.error:
+                error_msg = f"Error counting OTP attempt: {claim.error}"
+                logger.error(error_msg)
+                return {'valid': False, 'error': error_msg}
+            
+            # No row matched: a parallel attempt took this count, so read again
+            if claim.data:
+                break
+        else:
+            return {'valid': False, 'error': None}
+        
+        # Constant-time comparison so response timing does not leak the hash
+        if not hmac.compare_digest(record['otp_hash'], _hash_otp(str(otp), record['salt'])):
+            return {'valid': False, 'error': None}
+        
+        if consume:
+            otp_repository.delete(record['id'])
+        
+        return {'valid': True, 'error': None}
+        
+    except Exception as err:
+        error_msg = f"Unexpected error verifying OTP: {str(err)}"
+        logger.error(error_msg)
+        return {'valid': False, 'error': error_msg}
+
+def sweep_expired_otps(batch_size=None):
+    """
+    Delete expired OTPs in batches.
+    
+    Args:
+        batch_size: Rows deleted per round trip (default: OTP_SWEEP_BATCH_SIZE)
+    
+    Returns:
+        dict: {'deleted': int, 'error': str or None}
+    """
+    batch_size = batch_size or Config.OTP_SWEEP_BATCH_SIZE
+    deleted = 0
+    
+    try:
+        now = _utcnow_iso()
+        while True:
+            response = otp_repository.list_expired_ids(now, batch_size)
+            
+            if response.error:
+                error_msg = f"Error selecting expired OTPs: {response.error}"
+                logger.error(error_msg)
+                return {'deleted': deleted, 'error': error_msg}
+            
+            ids = [row['id'] for row in response.data]
+            if not ids:
+                break
+            
+            delete_response = otp_repository.delete_many(ids)
+            
+            if delete_response.error:
+                error_msg = f"Error deleting expired OTPs: {delete_response.error}"
+                logger.error(error_msg)
+                return {'deleted': deleted, 'error': error_msg}
+            
+            deleted += len(ids)
+            if len(ids) < batch_size:
+                break
+        
+        if deleted:
+            logger.info("Swept %s expired OTPs", deleted)
+        return {'deleted': deleted, 'error': None}
+        
+    except Exception as err:
+        error_msg = f"Unexpected error sweeping expired OTPs: {str(err)}"
+        logger.error(error_msg)
+        return {'deleted': deleted, 'error': error_msg}
+
+def start_otp_sweeper(interval=None):
+    """
+    Start a daemon thread that sweeps expired OTPs every `interval` seconds.
+    
+    Only one sweeper runs per process; later calls return the running thread.
+    
+    Args:
+        interval: Seconds between sweeps (default: OTP_SWEEP_INTERVAL)
+    
+    Returns:
+        threading.Thread: The sweeper thread
+    """
+    global _sweeper_thread
+    interval = interval or Config.OTP_SWEEP_INTERVAL
+    
+    with _sweeper_lock:
+        if _sweeper_thread is not None and _sweeper_thread.is_alive():
+            return _sweeper_thread
+        
+        def run():
+            while not _sweeper_stop.wait(interval):
+                sweep_expired_otps()
+        
+        _sweeper_stop.clear()
+        _sweeper_thread = threading.Thread(target=run, name='otp-sweeper', daemon=True)
+        _sweeper_thread.start()
+        logger.info("OTP sweeper started, interval: %ss", interval)
+        return _sweeper_thread
+
+def stop_otp_sweeper():
+    """
+    Signal the sweeper thread to exit after its current sweep.
+    """
+    _sweeper_stop.set()
@@ -0,0 +1,314 @@
+"""
+Failure handling for calls to PostgREST, Storage and SMTP.
+
+Each dependency has a circuit breaker. After CIRCUIT_FAILURE_THRESHOLD
+consecutive failures it opens, and calls fail at once with
+CircuitOpenError instead of waiting on a dependency that is down. After
+CIRCUIT_RESET_TIMEOUT seconds one trial call is let through: success
+closes the breaker, failure opens it again.
+
+Failures are timeouts, connection errors, and answers that say the service
+is unavailable: HTTP 5xx, 408 and 429, PostgREST's PGRST000-PGRST003
+(no database connection) and Postgres connection and resource errors,
+whether PostgREST reports them or the direct SQL store raises them.
+Other errors the dependency returns about the request itself (a constraint
+violation, a missing object) show that it is up. Any other exception is a
+bug on our side and says nothing about the dependency.
+
+StaleFallback keeps the last good result of a read per key and serves it,
+for up to STALE_MAX_AGE seconds, when a fresh read fails because the
+dependency is unavailable.
+"""
+
+import inspect
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from config import Config
+from utils.metrics import counter, gauge_callback
+
+try:
+    from postgrest.exceptions import APIError
+except ImportError:  # not installed with the direct SQL backend only
+    APIError = None
+
+try:
+    from storage3.utils import StorageException
+except ImportError:
+    StorageException = None
+
+try:
+    from httpx import TransportError
+except ImportError:
+    TransportError = None
+
+try:
+    import psycopg
+except ImportError:  # only installed with the direct SQL backend
+    psycopg = None
+
+logger = logging.getLogger(__name__)
+
+CIRCUIT_REJECTIONS = counter(
+    'circuit_breaker_rejections_total',
+    'Calls failed fast because the dependency\'s circuit breaker was open.',
+    labels=('dependency',)
+)
+CIRCUIT_TRANSITIONS = counter(
+    'circuit_breaker_transitions_total',
+    'Circuit breaker state changes, by dependency and new state.',
+    labels=('dependency', 'state')
+)
+STALE_RESPONSES = counter(
+    'stale_responses_total',
+    'Reads answered from the last good result because the dependency was unavailable.',
+    labels=('read',)
+)
+
+# Errors raised by a dependency that answered, unavailable or not
+_ANSWERED_ERRORS = tuple(cls for cls in (APIError, StorageException, getattr(psycopg, 'Error', None), sqlite3.Error) if cls is not None)
+# Errors raised when no answer came back: timeouts, refused or reset connections
+_TRANSPORT_ERRORS = tuple(cls for cls in (OSError, TransportError) if cls is not None)
+
+# HTTP statuses that mean "try again later" rather than "bad request"
+_RETRYABLE_STATUSES = frozenset((408, 429))
+# PostgREST could not reach or get a connection to the database
+_UNAVAILABLE_POSTGREST_CODES = frozenset(('PGRST000', 'PGRST001', 'PGRST002', 'PGRST003'))
+# Postgres SQLSTATE classes: connection exception, insufficient resources,
+# operator intervention (shutdown, statement timeout)
+_UNAVAILABLE_SQLSTATE_CLASSES = ('08', '53', '57')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_STATE_VALUES = {CLOSED: 0, OPEN: 1, HALF_OPEN: 2}
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling a dependency whose circuit breaker is open.
+    """
+    def __init__(self, dependency):
+        super().__init__(f"{dependency} is unavailable (circuit breaker open)")
+        self.dependency = dependency
+
+def _unavailable_status(status):
+    try:
+        status = int(status)
+    except (TypeError, ValueError):
+        return False
+    return status >= 500 or status in _RETRYABLE_STATUSES
+
+def _is_unavailable_answer(err):
+    if APIError is not None and isinstance(err, APIError):
+        code = err.code
+        if not code:
+            # PostgREST always sends a code; a bare body came from the gateway
+            return True
+        if isinstance(code, int) or (str(code).isdigit() and len(str(code)) == 3):
+            # postgrest-py puts the HTTP status here when the body was not JSON
+            return _unavailable_status(code)
+        code = str(code)
+        return code in _UNAVAILABLE_POSTGREST_CODES or code.startswith(_UNAVAILABLE_SQLSTATE_CLASSES)
+    if psycopg is not None and isinstance(err, psycopg.Error):
+        if err.sqlstate is None:
+            # Raised by the client: the connection failed or the pool had none to give
+            return isinstance(err, (psycopg.OperationalError, psycopg.InterfaceError))
+        return err.sqlstate.startswith(_UNAVAILABLE_SQLSTATE_CLASSES)
+    details = err.args[0] if err.args else None
+    return isinstance(details, dict) and _unavailable_status(details.get('statusCode'))
+
+def is_dependency_failure(err):
+    """
+    Whether an exception means the dependency is unavailable, as opposed to
+    it refusing this particular request or a bug in the caller.
+    """
+    if isinstance(err, _ANSWERED_ERRORS):
+        return _is_unavailable_answer(err)
+    return isinstance(err, _TRANSPORT_ERRORS)
+
+def is_request_error(err):
+    """
+    Whether an exception is the dependency refusing this particular
+    request, which shows it is up.
+    """
+    return isinstance(err, _ANSWERED_ERRORS) and not _is_unavailable_answer(err)
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one dependency.
+    """
+    def __init__(self, name, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.failure_threshold = failure_threshold or Config.CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = Config.CIRCUIT_RESET_TIMEOUT if reset_timeout is None else reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def _transition(self, state):
+        if state != self.state:
+            self.state = state
+            CIRCUIT_TRANSITIONS.inc(self.name, state)
+            log = logger.warning if state == OPEN else logger.info
+            log("Circuit breaker for %s is now %s", self.name, state)
+
+    def before_call(self):
+        """
+        Claim permission for a call.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half open with its
+            trial call already running
+        """
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._transition(HALF_OPEN)
+                self._trial_running = False
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+        CIRCUIT_REJECTIONS.inc(self.name)
+        raise CircuitOpenError(self.name)
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._trial_running = False
+            self._transition(CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._transition(OPEN)
+
+    def record_error(self, err):
+        if is_dependency_failure(err):
+            self.record_failure()
+        elif is_request_error(err):
+            self.record_success()
+        else:
+            # Neither up nor down; only free a half-open trial slot
+            with self._lock:
+                self._trial_running = False
+
+    def call(self, fn, *args, **kwargs):
+        """
+        Call fn through the breaker. Awaitable results are wrapped, so the
+        outcome is recorded when they complete.
+        """
+        self.before_call()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as err:
+            self.record_error(err)
+            raise
+        if inspect.isawaitable(result):
+            return self._await(result)
+        self.record_success()
+        return result
+
+    async def _await(self, awaitable):
+        try:
+            result = await awaitable
+        except Exception as err:
+            self.record_error(err)
+            raise
+        self.record_success()
+        return result
+
+# One breaker per dependency, shared by every caller in the process
+BREAKERS = {name: CircuitBreaker(name) for name in ('postgrest', 'database', 'storage', 'smtp')}
+
+gauge_callback(
+    'circuit_breaker_state',
+    'Circuit breaker state per dependency (0 closed, 1 open, 2 half open).',
+    lambda: [((name, ), _STATE_VALUES[breaker.state]) for name, breaker in BREAKERS.items()],
+    labels=('dependency',)
+)
+
+class StaleFallback:
+    """
+    The last good result of a read, per key, served when a fresh read fails
+    because its dependency is unavailable.
+    """
+    def __init__(self, name, share=None, max_age=None, max_entries=None):
+        """
+        Args:
+            name: Read name used in stale_responses_total
+            share: Applied to every result handed out (see single_flight.copy_rows)
+            max_age: Seconds a result may be served after it was read
+            max_entries: Keys kept; the least recently refreshed are dropped
+        """
+        self.name = name
+        self._share = share or (lambda result: result)
+        self.max_age = Config.STALE_MAX_AGE if max_age is None else max_age
+        self.max_entries = max_entries or Config.STALE_MAX_ENTRIES
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, key, result):
+        if getattr(result, 'error', None):
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (result, time.monotonic())
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _fallback(self, key, err):
+        if not is_dependency_failure(err) and not isinstance(err, CircuitOpenError):
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.max_age:
+            return None
+        STALE_RESPONSES.inc(self.name)
+        logger.warning("Serving stale %s for %s after: %s", self.name, key, err)
+        return entry
+
+    def get(self, key, fn, *args):
+        """
+        Call fn(*args), falling back to the last good result for key.
+
+        Returns:
+            tuple: (result, age in seconds if it is stale, else None)
+        """
+        try:
+            result = fn(*args)
+        except Exception as err:
+            entry = self._fallback(key, err)
+            if entry is None:
+                raise
+            return self._share(entry[0]), time.monotonic() - entry[1]
+        self._store(key, result)
+        return self._share(result), None
+
+    async def get_async(self, key, fn, *args):
+        """
+        Async counterpart of get() for coroutine functions.
+        """
+        try:
+            result = await fn(*args)
+        except Exception as err:
+            entry = self._fallback(key, err)
+            if entry is None:
+                raise
+            return self._share(entry[0]), time.monotonic() - entry[1]
+        self._store(key, result)
+        return self._share(result), None
+
+def stale_headers(age):
+    """
+    Response headers marking a stale result (RFC 7234 Age and Warning 110).
+    """
+    return {'Age': str(int(age)), 'Warning': '110 - "Response is Stale"'}
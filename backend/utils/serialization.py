@@ -0,0 +1,98 @@
+"""
+Compact representations of account lists, selected by content negotiation.
+
+    Accept: application/json                          list of objects (default)
+    Accept: application/vnd.accounts.columnar+json    columnar JSON
+    Accept: application/msgpack                       columnar MessagePack
+
+The columnar shape lists the keys once and stores each account as a row:
+
+    {"success": true, "message": "...",
+     "columns": ["id", "site", "username", "password", "image"],
+     "rows": [[1, "https://example.com/", "user", "secret", null], ...],
+     "image_base_url": "https://<project>.supabase.co/storage/v1/object/public/images/",
+     "default_image": "https://<project>.supabase.co/storage/v1/object/public/images/default.png"}
+
+A null image is the default image. Relative images are relative to
+image_base_url. Images that start with http are absolute.
+"""
+
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import parse_accept_header
+
+from utils.storage_paths import DEFAULT_ACCOUNT_IMAGE, public_base_url
+
+try:
+    import msgpack
+except ImportError:  # optional: pip install msgpack
+    msgpack = None
+
+JSON = 'application/json'
+COLUMNAR_JSON = 'application/vnd.accounts.columnar+json'
+MSGPACK = 'application/msgpack'
+# The older, unregistered name for MessagePack, served as MSGPACK
+X_MSGPACK = 'application/x-msgpack'
+
+ACCOUNT_COLUMNS = ('id', 'site', 'username', 'password', 'image')
+
+def supported_account_formats():
+    formats = [JSON, COLUMNAR_JSON]
+    if msgpack is not None:
+        formats.append(MSGPACK)
+    return formats
+
+def negotiate_accounts_format(accept_header):
+    """
+    Pick the response format for an Accept header value.
+
+    JSON is listed first, so '*/*' and a missing header keep the original
+    list-of-objects response. MessagePack is only offered when installed.
+    """
+    if not accept_header:
+        return JSON
+    accept = parse_accept_header(accept_header, MIMEAccept)
+    offers = supported_account_formats()
+    if msgpack is not None:
+        offers.append(X_MSGPACK)
+    match = accept.best_match(offers, default=JSON)
+    return MSGPACK if match == X_MSGPACK else match
+
+def columnar_accounts(accounts, message='Accounts retrieved successfully!'):
+    """
+    Convert normalized account dicts into the columnar payload.
+    """
+    base_url = public_base_url()
+    rows = []
+    for account in accounts:
+        image = account.get('image')
+        if not image or image == DEFAULT_ACCOUNT_IMAGE:
+            image = None
+        elif image.startswith(base_url):
+            image = image[len(base_url):]
+        rows.append([account.get('id'), account.get('site'), account.get('username'), account.get('password'), image])
+
+    return {
+        'success': True,
+        'message': message,
+        'columns': list(ACCOUNT_COLUMNS),
+        'rows': rows,
+        'image_base_url': base_url,
+        'default_image': DEFAULT_ACCOUNT_IMAGE
+    }
+
+def encode_compact_accounts(accounts, media_type, json_dumps):
+    """
+    Encode normalized accounts in a compact format.
+
+    Args:
+        accounts: Account dicts as returned by normalize_account_images
+        media_type: COLUMNAR_JSON or MSGPACK
+        json_dumps: JSON encoder to use (the app's, so spans and settings apply)
+
+    Returns:
+        tuple: (body bytes, content type)
+    """
+    payload = columnar_accounts(accounts)
+    if media_type == MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True), MSGPACK
+    return json_dumps(payload, separators=(',', ':')).encode(), COLUMNAR_JSON
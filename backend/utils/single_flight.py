@@ -0,0 +1,111 @@
+"""
+Single-flight coalescing of identical concurrent reads.
+
+When several requests in one worker ask for the same data at the same time
+(a user with several tabs open, a double-fired request, every client
+reloading after a deploy), only the first one, the leader, runs the query.
+The others wait for it and share its result. Nothing is cached: once the
+query returns, the next call runs it again.
+
+A read joined mid-flight can miss a write that committed after the leader's
+query started, which is no staler than if it had arrived a moment earlier.
+Only pure reads go through a group, never writes.
+
+SINGLE_FLIGHT=false turns coalescing off.
+"""
+
+import asyncio
+import threading
+from config import Config
+from utils.metrics import SINGLE_FLIGHT_REQUESTS
+
+def copy_rows(result):
+    """
+    Give each caller its own row dicts, for results that callers modify
+    (e.g. normalize_account_images rewrites image in place).
+    """
+    return result._replace(data=[dict(row) for row in result.data])
+
+class _Call:
+    """
+    One in-flight call that concurrent callers wait on.
+    """
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    A group of reads coalesced by key.
+
+    Keys must identify the query completely, e.g. (user_id, columns); the
+    group name identifies the kind of read and labels the metrics.
+    """
+    def __init__(self, name, share=None):
+        """
+        Args:
+            name: Group name used in single_flight_requests_total
+            share: Applied to the result for every caller, so callers that
+                modify results do not see each other's changes (see copy_rows)
+        """
+        self.name = name
+        self._share = share or (lambda result: result)
+        self._calls = {}
+        self._tasks = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args):
+        """
+        Call fn(*args), or wait for the identical call already in flight.
+
+        Exceptions raised by the leader's call are raised in every caller.
+        """
+        if not Config.SINGLE_FLIGHT:
+            return self._share(fn(*args))
+
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if leader:
+            SINGLE_FLIGHT_REQUESTS.inc(self.name, 'leader')
+            try:
+                call.result = fn(*args)
+            except Exception as err:
+                call.error = err
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.done.set()
+        else:
+            SINGLE_FLIGHT_REQUESTS.inc(self.name, 'coalesced')
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return self._share(call.result)
+
+    async def do_async(self, key, fn, *args):
+        """
+        Async counterpart of do() for coroutine functions, coalescing calls
+        made on the same event loop.
+        """
+        if not Config.SINGLE_FLIGHT:
+            return self._share(await fn(*args))
+
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        task = self._tasks.get(task_key)
+        if task is None:
+            SINGLE_FLIGHT_REQUESTS.inc(self.name, 'leader')
+            task = self._tasks[task_key] = loop.create_task(fn(*args))
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+        else:
+            SINGLE_FLIGHT_REQUESTS.inc(self.name, 'coalesced')
+        # Shielded: one caller being cancelled must not cancel the others' query
+        return self._share(await asyncio.shield(task))
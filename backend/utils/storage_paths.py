@@ -0,0 +1,241 @@
+"""
+Storage object keys and the public URLs built from them.
+
+The database stores object keys such as 'accounts/12_logo.png', not full
+public URLs, and NULL stands for the default image. Public URLs are built
+by prefixing the bucket's public base URL, which is computed once per
+bucket. Rows written before keys were stored still hold full URLs; they
+are served as-is and reduced to keys when their objects are replaced or
+deleted.
+
+Every upload gets a new key (upload_key), so an object never changes
+after it is written and can be cached as immutable. With
+STORAGE_SIGNED_URLS enabled, keys are served as signed URLs instead; each
+signature is cached in process and reused until most of its lifetime has
+passed, so browsers and the CDN see the same URL across requests.
+"""
+
+import logging
+import re
+import secrets
+import threading
+import time
+from functools import lru_cache
+from config import Config
+from utils.instrumentation import span
+from utils.metrics import CACHE_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKET = 'images'
+
+ACCOUNT_IMAGE_PREFIX = 'accounts/'
+PROFILE_PICTURE_PREFIX = 'profile-pictures/'
+
+# Default images live in the original project's public bucket
+_DEFAULT_IMAGE_BASE_URL = 'https://nttadnyxpbuwuhgtpvjh.supabase.co/storage/v1/object/public/images/'
+DEFAULT_ACCOUNT_IMAGE = _DEFAULT_IMAGE_BASE_URL + 'default.png'
+DEFAULT_PROFILE_PICTURE = _DEFAULT_IMAGE_BASE_URL + 'default-profile.png'
+
+# Stored values that mean "use the default image"
+_DEFAULT_VALUES = frozenset((
+    '',
+    'default.png',
+    'default-profile.png',
+    'images/default.png',
+    'images/default-profile.png',
+    DEFAULT_ACCOUNT_IMAGE,
+    DEFAULT_PROFILE_PICTURE
+))
+
+_PUBLIC_OBJECT_MARKER = '/storage/v1/object/public/'
+
+# The image types uploads may have, and the extension their keys get. Only
+# raster formats: SVG and HTML can carry scripts, so they are never stored
+IMAGE_EXTENSIONS = {
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/gif': '.gif',
+    'image/bmp': '.bmp',
+    'image/x-icon': '.ico',
+    'image/webp': '.webp',
+    'image/avif': '.avif'
+}
+
+# Keys made by upload_key: prefix, user id, 16 hex digits, image extension
+_UPLOAD_KEY = re.compile(r'(%s|%s)(\d+)_[0-9a-f]{16}(?:%s)\Z' % (
+    re.escape(ACCOUNT_IMAGE_PREFIX), re.escape(PROFILE_PICTURE_PREFIX),
+    '|'.join(re.escape(extension) for extension in IMAGE_EXTENSIONS.values())
+))
+
+# (bucket, key) -> (signed URL, refresh_at)
+_signed_url_cache = {}
+_signed_url_lock = threading.Lock()
+_SIGNED_URL_CACHE_MAX_ENTRIES = 10000
+# Re-sign once this share of a signature's lifetime has passed, so a URL
+# handed out from the cache is still valid for a good while
+_SIGNED_URL_REFRESH_AFTER = 0.8
+
+@lru_cache(maxsize=None)
+def public_base_url(bucket_name=DEFAULT_BUCKET):
+    """
+    Public URL prefix of a bucket, ending in '/'.
+    """
+    from supabase_client import supabase
+
+    if supabase is None:
+        return _DEFAULT_IMAGE_BASE_URL
+    # get_public_url appends a query string ('?'), which is not part of the base
+    return supabase.storage.from_(bucket_name).get_public_url('').split('?', 1)[0]
+
+def upload_key(prefix, user_id, content_type):
+    """
+    New object key for an upload, e.g. 'accounts/12_9f86d081884c7d65.png'.
+
+    Keys are never reused, so stored objects are immutable. The extension
+    comes from the image type, never from the client's file name.
+
+    Raises:
+        ValueError: content_type is not one of IMAGE_EXTENSIONS
+    """
+    extension = IMAGE_EXTENSIONS.get(content_type)
+    if extension is None:
+        raise ValueError(f'Not an accepted image type: {content_type!r}')
+    return f"{prefix}{user_id}_{secrets.token_hex(8)}{extension}"
+
+def is_upload_key(key):
+    """
+    Whether key has the form upload_key gives keys, for any user.
+    """
+    return _UPLOAD_KEY.match(key or '') is not None
+
+def upload_key_prefix(key, user_id):
+    """
+    The prefix of a key made by upload_key for user_id, or None if the key
+    was not made for that user (another user's key, a path outside the
+    upload prefixes, or not an upload key at all).
+    """
+    match = _UPLOAD_KEY.match(key or '')
+    if match is None or match.group(2) != str(user_id):
+        return None
+    return match.group(1)
+
+def signed_urls(keys, bucket_name=DEFAULT_BUCKET):
+    """
+    Signed URLs for object keys, reusing cached signatures until near expiry.
+
+    Misses are signed in one batch request. Keys that could not be signed
+    are left out of the result.
+
+    Returns:
+        dict: key -> signed URL
+    """
+    from supabase_client import supabase
+
+    urls = {}
+    missing = []
+    now = time.monotonic()
+    with _signed_url_lock:
+        for key in keys:
+            entry = _signed_url_cache.get((bucket_name, key))
+            if entry and entry[1] > now:
+                urls[key] = entry[0]
+            else:
+                missing.append(key)
+    missing = list(dict.fromkeys(missing))
+    if urls:
+        CACHE_REQUESTS.inc('signed_url', 'hit', amount=len(urls))
+    if not missing:
+        return urls
+    CACHE_REQUESTS.inc('signed_url', 'miss', amount=len(missing))
+
+    if supabase is None:
+        return urls
+    ttl = Config.STORAGE_SIGNED_URL_TTL
+    try:
+        with span('storage', 'sign'):
+            signed = supabase.storage.from_(bucket_name).create_signed_urls(missing, ttl)
+    except Exception as err:
+        logger.error("Error signing storage URLs: %s", err)
+        return urls
+
+    refresh_at = time.monotonic() + ttl * _SIGNED_URL_REFRESH_AFTER
+    with _signed_url_lock:
+        for item in signed:
+            if item.get('error') or not item.get('signedURL'):
+                continue
+            if len(_signed_url_cache) >= _SIGNED_URL_CACHE_MAX_ENTRIES:
+                # Evict the oldest entry (dicts keep insertion order)
+                _signed_url_cache.pop(next(iter(_signed_url_cache)))
+            _signed_url_cache[(bucket_name, item['path'])] = (item['signedURL'], refresh_at)
+            urls[item['path']] = item['signedURL']
+    return urls
+
+def is_default_image(value):
+    return value is None or value in _DEFAULT_VALUES
+
+def object_key(value, bucket_name=DEFAULT_BUCKET):
+    """
+    Object key for a stored image value.
+
+    Args:
+        value: A stored object key, or a legacy public URL
+
+    Returns:
+        str: The key within the bucket, or None for default images and
+        for URLs that do not point into the bucket
+    """
+    if is_default_image(value):
+        return None
+    if not value.startswith('http'):
+        return value if value.startswith((ACCOUNT_IMAGE_PREFIX, PROFILE_PICTURE_PREFIX)) else None
+    marker = f'{_PUBLIC_OBJECT_MARKER}{bucket_name}/'
+    index = value.find(marker)
+    if index == -1:
+        return None
+    return value[index + len(marker):].split('?', 1)[0] or None
+
+def public_url(value, default_url, bucket_name=DEFAULT_BUCKET):
+    """
+    Public URL for a stored image value.
+
+    Object keys are prefixed with the bucket's public base URL, NULL gives
+    default_url, full URLs are returned unchanged and other relative paths
+    (local frontend images) get forward slashes.
+    """
+    if not value or value in _DEFAULT_VALUES:
+        return default_url
+    if value.startswith('http'):
+        return value
+    if value.startswith((ACCOUNT_IMAGE_PREFIX, PROFILE_PICTURE_PREFIX)):
+        if Config.STORAGE_SIGNED_URLS:
+            signed = signed_urls([value], bucket_name).get(value)
+            if signed:
+                return signed
+        return public_base_url(bucket_name) + value
+    return value.replace('\\', '/')
+
+def normalize_many(rows, field, default_url, bucket_name=DEFAULT_BUCKET):
+    """
+    Replace the stored image value of every row with its public URL, in place.
+
+    The base URL and lookups are bound once, so the per-row cost is a couple
+    of string checks and one concatenation. Signed URLs, when enabled, are
+    fetched for all rows in one batch.
+    """
+    base = public_base_url(bucket_name)
+    defaults = _DEFAULT_VALUES
+    key_prefixes = (ACCOUNT_IMAGE_PREFIX, PROFILE_PICTURE_PREFIX)
+    signed = {}
+    if Config.STORAGE_SIGNED_URLS:
+        keys = [row.get(field) for row in rows]
+        signed = signed_urls([key for key in keys if key and key.startswith(key_prefixes)], bucket_name)
+    for row in rows:
+        value = row.get(field)
+        if not value or value in defaults:
+            row[field] = default_url
+        elif value.startswith(key_prefixes):
+            row[field] = signed.get(value) or base + value
+        elif not value.startswith('http'):
+            row[field] = value.replace('\\', '/')
+    return rows
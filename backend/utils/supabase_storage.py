@@ -1,11 +1,70 @@
+import time
 import logging
+from config import Config
 from supabase_client import supabase
+from utils.instrumentation import span
+from utils.metrics import counter, histogram
+from utils.storage_paths import IMAGE_EXTENSIONS, object_key
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def upload_file_to_supabase(file_buffer, file_name, bucket_name='images'):
+STORAGE_DURATION = histogram(
+    'storage_request_duration_seconds',
+    'Supabase Storage request latency, by operation.',
+    labels=('operation',)
+)
+STORAGE_UPLOAD_BYTES = counter(
+    'storage_upload_bytes_total',
+    'Bytes uploaded to Supabase Storage.'
+)
+
+# Leading bytes of the image formats browsers display
+_IMAGE_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'\x00\x00\x01\x00', 'image/x-icon')
+)
+
+# Image types accepted for uploads: the ones detect_content_type recognizes
+IMAGE_CONTENT_TYPES = frozenset(IMAGE_EXTENSIONS)
+
+IMAGE_TYPES_MESSAGE = 'Only PNG, JPEG, GIF, BMP, ICO, WebP and AVIF images can be uploaded.'
+
+def detect_content_type(file_buffer):
+    """
+    Detect an image's MIME type from its leading bytes.
+    
+    The client's file name and declared type are never used: anything that
+    is not a recognized raster image could be served as HTML or SVG from
+    the public bucket.
+    
+    Returns:
+        str: one of IMAGE_CONTENT_TYPES, or None if the bytes are not one
+    """
+    if isinstance(file_buffer, (bytes, bytearray, memoryview)):
+        head = bytes(file_buffer[:16])
+        for signature, content_type in _IMAGE_SIGNATURES:
+            if head.startswith(signature):
+                return content_type
+        if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+            return 'image/webp'
+        if head[4:12] in (b'ftypavif', b'ftypavis'):
+            return 'image/avif'
+    return None
+
+def upload_options(file_buffer, content_type=None):
+    """
+    Storage file options: the detected content type and a long cache lifetime.
+    """
+    return {
+        'content-type': content_type or detect_content_type(file_buffer) or 'application/octet-stream',
+        'cache-control': Config.STORAGE_CACHE_CONTROL
+    }
+
+def upload_file_to_supabase(file_buffer, file_name, bucket_name='images', content_type=None):
     """
     Upload a file to Supabase Storage.
     
@@ -13,19 +72,25 @@ def upload_file_to_supabase(file_buffer, file_name, bucket_name='images'):
         file_buffer: The file buffer or file object
         file_name: The name to save the file as
         bucket_name: The storage bucket name (default: 'images')
+        content_type: MIME type (default: detected from the content)
     
     Returns:
         dict: {'public_url': str, 'error': str or None}
     """
     try:
-        logger.info(f"Uploading file to Supabase Storage: {file_name} in bucket: {bucket_name}")
+        logger.info("Uploading file to Supabase Storage: %s in bucket: %s", file_name, bucket_name)
         
         # Upload the file to Supabase Storage
-        response = supabase.storage.from_(bucket_name).upload(
-            file=file_buffer,
-            path=file_name,
-            file_options={"content-type": "image/*"}
-        )
+        start = time.perf_counter()
+        with span('storage', 'upload'):
+            response = supabase.storage.from_(bucket_name).upload(
+                file=file_buffer,
+                path=file_name,
+                file_options=upload_options(file_buffer, content_type)
+            )
+        STORAGE_DURATION.observe(time.perf_counter() - start, 'upload')
+        if isinstance(file_buffer, (bytes, bytearray, memoryview)):
+            STORAGE_UPLOAD_BYTES.inc(amount=len(file_buffer))
         
         if response.status_code != 200:
             error_msg = f"Error uploading file to Supabase Storage: {response.json()}"
@@ -36,7 +101,7 @@ def upload_file_to_supabase(file_buffer, file_name, bucket_name='images'):
         
         # Get the public URL for the uploaded file
         public_url = supabase.storage.from_(bucket_name).get_public_url(file_name)
-        logger.info(f"Public URL generated: {public_url}")
+        logger.info("Public URL generated: %s", public_url)
         
         return {'public_url': public_url, 'error': None}
         
@@ -57,10 +122,13 @@ def delete_file_from_supabase(file_name, bucket_name='images'):
         dict: {'error': str or None}
     """
     try:
-        logger.info(f"Deleting file from Supabase Storage: {file_name} in bucket: {bucket_name}")
+        logger.info("Deleting file from Supabase Storage: %s in bucket: %s", file_name, bucket_name)
         
         # Delete the file from Supabase Storage
-        response = supabase.storage.from_(bucket_name).remove([file_name])
+        start = time.perf_counter()
+        with span('storage', 'remove'):
+            response = supabase.storage.from_(bucket_name).remove([file_name])
+        STORAGE_DURATION.observe(time.perf_counter() - start, 'remove')
         
         if response.status_code != 200:
             error_msg = f"Error deleting file from Supabase Storage: {response.json()}"
@@ -75,6 +143,103 @@ def delete_file_from_supabase(file_name, bucket_name='images'):
         logger.error(error_msg)
         return {'error': error_msg}
 
+def create_signed_upload(file_name, bucket_name='images'):
+    """
+    Create a signed URL the browser can upload one object to directly.
+    
+    Args:
+        file_name: The object key the upload will be stored under
+        bucket_name: The storage bucket name (default: 'images')
+    
+    Returns:
+        dict: {'signed_url': str, 'token': str, 'error': str or None}
+    """
+    try:
+        logger.info("Signing direct upload: %s in bucket: %s", file_name, bucket_name)
+        start = time.perf_counter()
+        with span('storage', 'sign_upload'):
+            signed = supabase.storage.from_(bucket_name).create_signed_upload_url(file_name)
+        STORAGE_DURATION.observe(time.perf_counter() - start, 'sign_upload')
+        return {'signed_url': signed['signed_url'], 'token': signed['token'], 'error': None}
+        
+    except Exception as err:
+        error_msg = f"Unexpected error signing Supabase Storage upload: {str(err)}"
+        logger.error(error_msg)
+        return {'signed_url': None, 'token': None, 'error': error_msg}
+
+def get_file_metadata(file_name, bucket_name='images'):
+    """
+    Size and content type of a stored object, read from its listing rather
+    than by downloading it.
+    
+    Returns:
+        dict: {'size': int, 'content_type': str, 'error': str or None};
+        size and content_type are None if the object does not exist
+    """
+    try:
+        folder, _, name = file_name.rpartition('/')
+        start = time.perf_counter()
+        with span('storage', 'list'):
+            entries = supabase.storage.from_(bucket_name).list(folder, {'search': name, 'limit': 100})
+        STORAGE_DURATION.observe(time.perf_counter() - start, 'list')
+        
+        for entry in entries:
+            if entry.get('name') == name:
+                metadata = entry.get('metadata') or {}
+                return {'size': metadata.get('size'), 'content_type': metadata.get('mimetype'), 'error': None}
+        return {'size': None, 'content_type': None, 'error': None}
+        
+    except Exception as err:
+        error_msg = f"Unexpected error reading Supabase Storage metadata: {str(err)}"
+        logger.error(error_msg)
+        return {'size': None, 'content_type': None, 'error': error_msg}
+
+def download_file_head(file_name, bucket_name='images', length=16):
+    """
+    The first bytes of a stored object, to check what it really contains.
+    
+    Only those bytes are transferred (a ranged request), not the whole
+    object.
+    
+    Returns:
+        dict: {'head': bytes, 'error': str or None}
+    """
+    try:
+        start = time.perf_counter()
+        with span('storage', 'download'):
+            content = supabase.storage.from_(bucket_name).download_head(file_name, length)
+        STORAGE_DURATION.observe(time.perf_counter() - start, 'download')
+        return {'head': bytes(content), 'error': None}
+        
+    except Exception as err:
+        error_msg = f"Unexpected error downloading from Supabase Storage: {str(err)}"
+        logger.error(error_msg)
+        return {'head': None, 'error': error_msg}
+
+def list_files(folder, bucket_name='images', limit=1000, offset=0):
+    """
+    One page of the objects in a folder, oldest first.
+    
+    Returns:
+        dict: {'files': [{'name': str, 'created_at': str, ...}], 'error': str or None};
+        names are relative to the folder
+    """
+    try:
+        start = time.perf_counter()
+        with span('storage', 'list'):
+            files = supabase.storage.from_(bucket_name).list(folder, {
+                'limit': limit,
+                'offset': offset,
+                'sortBy': {'column': 'created_at', 'order': 'asc'}
+            })
+        STORAGE_DURATION.observe(time.perf_counter() - start, 'list')
+        return {'files': files, 'error': None}
+        
+    except Exception as err:
+        error_msg = f"Unexpected error listing Supabase Storage folder: {str(err)}"
+        logger.error(error_msg)
+        return {'files': [], 'error': error_msg}
+
 def get_public_url_from_supabase(file_name, bucket_name='images'):
     """
     Get the public URL for a file in Supabase Storage.
@@ -87,10 +252,77 @@ def get_public_url_from_supabase(file_name, bucket_name='images'):
         str: The public URL of the file
     """
     try:
-        logger.info(f"Getting public URL for file: {file_name} in bucket: {bucket_name}")
+        logger.debug("Getting public URL for file: %s in bucket: %s", file_name, bucket_name)
         public_url = supabase.storage.from_(bucket_name).get_public_url(file_name)
-        logger.info(f"Public URL retrieved: {public_url}")
+        logger.debug("Public URL retrieved: %s", public_url)
         return public_url
     except Exception as err:
-        logger.error(f"Error getting public URL from Supabase Storage: {str(err)}")
-        return None
\ No newline at end of file
+        logger.error("Error getting public URL from Supabase Storage: %s", err)
+        return None
+
+def delete_stored_image(value, bucket_name='images'):
+    """
+    Delete the object behind a stored image value (object key or legacy URL).
+    
+    Default images and URLs outside the bucket are left alone.
+    
+    Returns:
+        dict: {'error': str or None}
+    """
+    key = object_key(value, bucket_name)
+    if key is None:
+        return {'error': None}
+    logger.info("Deleting stored image: %s", key)
+    return delete_file_from_supabase(key, bucket_name)
+
+async def upload_file_to_supabase_async(client, file_buffer, file_name, bucket_name='images', content_type=None):
+    """
+    Async variant of upload_file_to_supabase for the async Supabase client.
+    
+    Returns:
+        dict: {'public_url': str, 'error': str or None}
+    """
+    try:
+        bucket = client.storage.from_(bucket_name)
+        start = time.perf_counter()
+        response = await bucket.upload(path=file_name, file=file_buffer, file_options=upload_options(file_buffer, content_type))
+        STORAGE_DURATION.observe(time.perf_counter() - start, 'upload')
+        if isinstance(file_buffer, (bytes, bytearray, memoryview)):
+            STORAGE_UPLOAD_BYTES.inc(amount=len(file_buffer))
+        
+        if response.status_code != 200:
+            error_msg = f"Error uploading file to Supabase Storage: {response.json()}"
+            logger.error(error_msg)
+            return {'public_url': None, 'error': error_msg}
+        
+        return {'public_url': await bucket.get_public_url(file_name), 'error': None}
+        
+    except Exception as err:
+        error_msg = f"Unexpected error uploading file to Supabase Storage: {str(err)}"
+        logger.error(error_msg)
+        return {'public_url': None, 'error': error_msg}
+
+async def delete_file_from_supabase_async(client, file_name, bucket_name='images'):
+    """
+    Async variant of delete_file_from_supabase for the async Supabase client.
+    
+    Returns:
+        dict: {'error': str or None}
+    """
+    try:
+        start = time.perf_counter()
+        response = await client.storage.from_(bucket_name).remove([file_name])
+        STORAGE_DURATION.observe(time.perf_counter() - start, 'remove')
+        
+        # The async storage client returns the parsed body rather than a response
+        if getattr(response, 'status_code', 200) != 200:
+            error_msg = f"Error deleting file from Supabase Storage: {response.json()}"
+            logger.error(error_msg)
+            return {'error': error_msg}
+        
+        return {'error': None}
+        
+    except Exception as err:
+        error_msg = f"Unexpected error deleting file from Supabase Storage: {str(err)}"
+        logger.error(error_msg)
+        return {'error': error_msg}
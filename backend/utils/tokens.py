@@ -0,0 +1,150 @@
+import time
+import threading
+import logging
+import jwt
+from config import Config
+from repositories import user_repository
+from utils.metrics import CACHE_REQUESTS
+from utils.single_flight import SingleFlight
+from utils.current_user import parse_columns, remember_current_user
+
+logger = logging.getLogger(__name__)
+
+# In-process cache of user_id -> (token_version, expires_at)
+_version_cache = {}
+_cache_lock = threading.Lock()
+_CACHE_MAX_ENTRIES = 10000
+
+# Cache misses for one user at the same time share a single lookup. There is
+# no stale fallback: a version that cannot be read is not trusted, since a
+# password change or reset may have revoked the token
+token_version_reads = SingleFlight('token_version')
+
+# Re-reads allowed when concurrent changes keep bumping the version first
+_BUMP_RETRIES = 5
+
+def issue_token(user_id, email, token_version=0):
+    """
+    Issue a signed JWT for a user.
+    
+    Args:
+        user_id: The user's ID
+        email: The user's email
+        token_version: The user's current token version
+    
+    Returns:
+        str: The encoded JWT
+    """
+    now = int(time.time())
+    token_payload = {
+        'id': user_id,
+        'email': email,
+        'token_version': token_version or 0,
+        'iat': now,
+        'exp': now + Config.JWT_EXPIRES_IN
+    }
+    return jwt.encode(token_payload, Config.JWT_SECRET, algorithm='HS256')
+
+def cache_token_version(user_id, token_version):
+    """
+    Store a user's token version in the in-process cache.
+    """
+    expires_at = time.monotonic() + Config.TOKEN_VERSION_CACHE_TTL
+    with _cache_lock:
+        _version_cache.pop(user_id, None)
+        if len(_version_cache) >= _CACHE_MAX_ENTRIES:
+            # Evict the oldest entry (dicts keep insertion order)
+            _version_cache.pop(next(iter(_version_cache)))
+        _version_cache[user_id] = (token_version or 0, expires_at)
+
+def invalidate_token_version(user_id):
+    """
+    Drop a user's cached token version so the next lookup hits the database.
+    """
+    with _cache_lock:
+        _version_cache.pop(user_id, None)
+
+def cached_token_version(user_id):
+    """
+    Get a user's token version from the in-process cache only.
+    
+    Returns:
+        int or None: The cached version, or None on a miss or expired entry
+    """
+    with _cache_lock:
+        entry = _version_cache.get(user_id)
+    if entry and entry[1] > time.monotonic():
+        CACHE_REQUESTS.inc('token_version', 'hit')
+        return entry[0]
+    CACHE_REQUESTS.inc('token_version', 'miss')
+    return None
+
+def get_token_version(user_id, columns=None):
+    """
+    Get a user's current token version, served from the in-process cache when fresh.
+    
+    Raises the dependency's error when the database cannot be reached.
+    
+    Args:
+        user_id: The user's ID
+        columns: Other user columns the request will need; when the
+                 database is queried they are read along with the version
+                 and kept for load_current_user
+    
+    Returns:
+        dict: {'token_version': int or None, 'error': str or None}
+              token_version is None if the user does not exist
+    """
+    token_version = cached_token_version(user_id)
+    if token_version is not None:
+        return {'token_version': token_version, 'error': None}
+    
+    columns = ', '.join(dict.fromkeys(('token_version',) + parse_columns(columns or '')))
+    response = token_version_reads.do((user_id, columns), user_repository.get_by_id, user_id, columns)
+    
+    if response.error:
+        return {'token_version': None, 'error': str(response.error)}
+    
+    remember_current_user(user_id, dict(response.data[0]) if response.data else None, columns)
+    
+    if not response.data:
+        return {'token_version': None, 'error': None}
+    
+    token_version = response.data[0].get('token_version') or 0
+    cache_token_version(user_id, token_version)
+    return {'token_version': token_version, 'error': None}
+
+def bump_token_version(user_id, values, token_version):
+    """
+    Write `values` and revoke the user's tokens by incrementing token_version.
+    
+    The increment is conditional on the version read, so two concurrent
+    changes cannot both write the same new version; the loser re-reads and
+    bumps again.
+    
+    Args:
+        user_id: The user's ID
+        values: Other columns to write in the same update
+        token_version: The version the caller read
+    
+    Returns:
+        dict: {'token_version': int or None, 'error': str or None}
+              token_version is None if the user does not exist
+    """
+    token_version = token_version or 0
+    for _ in range(_BUMP_RETRIES):
+        response = user_repository.update_bumping_token_version(user_id, values, token_version)
+        if response.error:
+            return {'token_version': None, 'error': str(response.error)}
+        if response.data:
+            cache_token_version(user_id, token_version + 1)
+            return {'token_version': token_version + 1, 'error': None}
+        
+        response = user_repository.get_by_id(user_id, 'token_version')
+        if response.error:
+            return {'token_version': None, 'error': str(response.error)}
+        if not response.data:
+            return {'token_version': None, 'error': None}
+        token_version = response.data[0].get('token_version') or 0
+    
+    return {'token_version': None, 'error': 'Token version kept changing; try again'}
@@ -0,0 +1,145 @@
+"""
+Deletes direct uploads that were never finalized.
+
+/uploads/sign lets the browser write an object before the server has seen
+it, and a browser that never calls /uploads/finalize leaves that object
+behind. Once an upload-key object is older than the signing window plus a
+margin (UPLOAD_SWEEP_MIN_AGE) and no account or user references it, it is
+deleted. Images uploaded through the server get upload_key names too, so
+unreferenced ones (e.g. left behind when a row update failed) are swept as
+well. Objects whose names upload_key could not have made, such as legacy
+uploads, are never touched.
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from config import Config
+from repositories import account_repository, user_repository
+from utils.storage_paths import ACCOUNT_IMAGE_PREFIX, PROFILE_PICTURE_PREFIX, is_upload_key
+from utils.supabase_storage import delete_file_from_supabase, list_files
+
+logger = logging.getLogger(__name__)
+
+_sweeper_thread = None
+_sweeper_stop = threading.Event()
+_sweeper_lock = threading.Lock()
+
+# Objects listed per Storage round trip
+_LIST_PAGE_SIZE = 1000
+# Keys per reference check: PostgREST sends the list in the URL of a GET,
+# which gateways reject once it reaches a few kilobytes
+_REFERENCE_CHUNK_SIZE = 100
+
+def _references(prefix, keys):
+    """
+    The keys among `keys` that an account or user row still holds.
+    """
+    if prefix == ACCOUNT_IMAGE_PREFIX:
+        lookup, column = account_repository.with_images, 'image'
+    else:
+        lookup, column = user_repository.with_profile_pictures, 'profilepicture'
+    referenced = set()
+    for start in range(0, len(keys), _REFERENCE_CHUNK_SIZE):
+        response = lookup(keys[start:start + _REFERENCE_CHUNK_SIZE])
+        if response.error:
+            raise RuntimeError(f"Error checking upload references: {response.error}")
+        referenced.update(row[column] for row in response.data)
+    return referenced
+
+def sweep_abandoned_uploads(min_age=None):
+    """
+    Delete upload-key objects older than min_age that nothing references.
+
+    Args:
+        min_age: Seconds an object must have existed (default: UPLOAD_SWEEP_MIN_AGE)
+
+    Returns:
+        dict: {'deleted': int, 'error': str or None}
+    """
+    min_age = Config.UPLOAD_SWEEP_MIN_AGE if min_age is None else min_age
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_age)
+    deleted = 0
+
+    try:
+        for prefix in (ACCOUNT_IMAGE_PREFIX, PROFILE_PICTURE_PREFIX):
+            folder = prefix.rstrip('/')
+            offset = 0
+            while True:
+                result = list_files(folder, limit=_LIST_PAGE_SIZE, offset=offset)
+                if result['error']:
+                    return {'deleted': deleted, 'error': result['error']}
+                files = result['files']
+
+                # Oldest first, so the page ends once objects are too new
+                candidates = []
+                reached_new = False
+                for entry in files:
+                    created_at = entry.get('created_at')
+                    if not created_at or datetime.fromisoformat(created_at.replace('Z', '+00:00')) > cutoff:
+                        reached_new = True
+                        break
+                    key = prefix + entry['name']
+                    if is_upload_key(key):
+                        candidates.append(key)
+
+                kept = 0
+                if candidates:
+                    referenced = _references(prefix, candidates)
+                    for key in candidates:
+                        if key in referenced:
+                            kept += 1
+                            continue
+                        delete_result = delete_file_from_supabase(key, 'images')
+                        if delete_result['error']:
+                            return {'deleted': deleted, 'error': delete_result['error']}
+                        deleted += 1
+
+                if reached_new or len(files) < _LIST_PAGE_SIZE:
+                    break
+                # Deleted objects no longer take up a place in the listing
+                offset += len(files) - (len(candidates) - kept)
+
+        if deleted:
+            logger.info("Swept %s abandoned uploads", deleted)
+        return {'deleted': deleted, 'error': None}
+
+    except Exception as err:
+        error_msg = f"Unexpected error sweeping abandoned uploads: {str(err)}"
+        logger.error(error_msg)
+        return {'deleted': deleted, 'error': error_msg}
+
+def start_upload_sweeper(interval=None):
+    """
+    Start a daemon thread that sweeps abandoned uploads every `interval` seconds.
+
+    Only one sweeper runs per process; later calls return the running thread.
+
+    Args:
+        interval: Seconds between sweeps (default: UPLOAD_SWEEP_INTERVAL)
+
+    Returns:
+        threading.Thread: The sweeper thread
+    """
+    global _sweeper_thread
+    interval = interval or Config.UPLOAD_SWEEP_INTERVAL
+
+    with _sweeper_lock:
+        if _sweeper_thread is not None and _sweeper_thread.is_alive():
+            return _sweeper_thread
+
+        def run():
+            while not _sweeper_stop.wait(interval):
+                sweep_abandoned_uploads()
+
+        _sweeper_stop.clear()
+        _sweeper_thread = threading.Thread(target=run, name='upload-sweeper', daemon=True)
+        _sweeper_thread.start()
+        logger.info("Upload sweeper started, interval: %ss", interval)
+        return _sweeper_thread
+
+def stop_upload_sweeper():
+    """
+    Signal the sweeper thread to exit after its current sweep.
+    """
+    _sweeper_stop.set()
@@ -2,6 +2,8 @@ import os
 import sys
 import json
 import io
+import binascii
+from urllib.parse import unquote, urlencode
 
 # Add the current directory to Python path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -12,17 +14,32 @@ def handler(event, context):
         from flask_app import app
         
         # Convert Vercel event to WSGI environ
-        environ = create_wsgi_environ(event, context)
+        try:
+            environ = create_wsgi_environ(event, context)
+        except ValueError as e:
+            return {
+                'statusCode': 400,
+                'headers': {'Content-Type': 'application/json'},
+                'body': json.dumps({'error': str(e)})
+            }
         
         # Process the request through Flask using the WSGI interface
         from werkzeug.wrappers import Response
         response = Response.from_app(app, environ)
         
-        # Convert Flask response to Vercel format
+        # Convert Flask response to Vercel format; binary bodies (msgpack,
+        # images) would not survive decoding as text, so they go as base64
+        if _is_text(response.mimetype):
+            return {
+                'statusCode': response.status_code,
+                'headers': dict(response.headers),
+                'body': response.get_data(as_text=True)
+            }
         return {
             'statusCode': response.status_code,
             'headers': dict(response.headers),
-            'body': response.get_data(as_text=True)
+            'body': binascii.b2a_base64(response.get_data(), newline=False).decode('ascii'),
+            'isBase64Encoded': True
         }
     except Exception as e:
         # Log the error for debugging
@@ -40,61 +57,142 @@ def handler(event, context):
             })
         }
 
+_TEXT_MIMETYPES = ('application/json', 'application/x-ndjson', 'application/javascript', 'application/xml')
+
+def _is_text(mimetype):
+    return not mimetype or mimetype.startswith('text/') or mimetype in _TEXT_MIMETYPES or mimetype.endswith('+json')
+
+# Headers that repeat are joined with ', ' except Cookie, which uses '; '
+_JOINERS = {'cookie': '; '}
+
+# Header name -> environ key, filled as names are seen. Content-Length maps
+# to None: the decoded body's length is authoritative, not the header's.
+_ENVIRON_KEYS = {}
+_MAX_ENVIRON_KEYS = 512
+
+def _environ_key(name):
+    lowered = name.lower()
+    if lowered == 'content-type':
+        key = 'CONTENT_TYPE'
+    elif lowered == 'content-length':
+        key = None
+    else:
+        key = 'HTTP_' + lowered.upper().replace('-', '_')
+    # Bounded, since clients choose the names
+    if len(_ENVIRON_KEYS) < _MAX_ENVIRON_KEYS:
+        _ENVIRON_KEYS[name] = key
+    return key
+
+def _first(value):
+    """The first entry of a comma-separated, proxy-appended header"""
+    return value.split(',', 1)[0].strip()
+
+def _query_string(event):
+    """
+    The raw query string of an event: queryString as a string or a mapping
+    of names to values or lists of values, else the part of path after '?'.
+    """
+    query = event.get('queryString')
+    if query is None:
+        query = event.get('multiValueQueryStringParameters') or event.get('queryStringParameters')
+    if isinstance(query, dict):
+        return urlencode(query, doseq=True)
+    if isinstance(query, (bytes, bytearray, memoryview)):
+        return bytes(query).decode('latin-1')
+    return query or ''
+
+def _body(event):
+    """
+    The request body and its length in bytes, decoded from base64 when the
+    event says so.
+
+    bytes bodies are returned as they are, and bytearray or memoryview
+    bodies as a byte view of the same buffer, so nothing is copied before
+    the body reaches wsgi.input.
+
+    Raises:
+        ValueError: If a base64 body does not decode
+    """
+    body = event.get('body')
+    if not body:
+        return b'', 0
+    if event.get('isBase64Encoded') or event.get('encoding') == 'base64':
+        try:
+            # a2b_base64 takes the ASCII str as is: one pass, no intermediate bytes
+            body = binascii.a2b_base64(body)
+        except (binascii.Error, ValueError, TypeError) as err:
+            raise ValueError(f"Invalid base64 request body: {err}") from err
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+    if type(body) is bytes:
+        return body, len(body)
+    view = memoryview(body).cast('B')
+    return view, view.nbytes
+
 def create_wsgi_environ(event, context):
-    """Create a WSGI environ dict from Vercel event"""
-    try:
-        # Get request data
-        method = event.get('method', 'GET') if isinstance(event, dict) else 'GET'
-        path = event.get('path', '/') if isinstance(event, dict) else '/'
-        query_string = event.get('queryString', '') if isinstance(event, dict) else ''
-        headers = event.get('headers', {}) if isinstance(event, dict) else {}
-        body = event.get('body', '') if isinstance(event, dict) else ''
-        
-        # Create environ dict
-        environ = {
-            'REQUEST_METHOD': method,
-            'PATH_INFO': path,
-            'QUERY_STRING': query_string,
-            'CONTENT_TYPE': headers.get('content-type', ''),
-            'CONTENT_LENGTH': str(len(body.encode()) if isinstance(body, str) else len(body)),
-            'SERVER_NAME': 'localhost',
-            'SERVER_PORT': '80',
-            'SERVER_PROTOCOL': 'HTTP/1.1',
-            'wsgi.version': (1, 0),
-            'wsgi.url_scheme': 'http',
-            'wsgi.input': io.BytesIO(body.encode() if isinstance(body, str) else body),
-            'wsgi.errors': sys.stderr,
-            'wsgi.multithread': False,
-            'wsgi.multiprocess': False,
-            'wsgi.run_once': True,
-            'wsgi.async': False,
-        }
-        
-        # Add HTTP headers
-        for key, value in headers.items():
-            environ[f'HTTP_{key.upper().replace("-", "_")}'] = value
-        
-        return environ
-    except Exception as e:
-        print(f"Error creating WSGI environ: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        # Return a minimal environ dict
-        return {
-            'REQUEST_METHOD': 'GET',
-            'PATH_INFO': '/',
-            'QUERY_STRING': '',
-            'CONTENT_TYPE': '',
-            'CONTENT_LENGTH': '0',
-            'SERVER_NAME': 'localhost',
-            'SERVER_PORT': '80',
-            'SERVER_PROTOCOL': 'HTTP/1.1',
-            'wsgi.version': (1, 0),
-            'wsgi.url_scheme': 'http',
-            'wsgi.input': io.BytesIO(b''),
-            'wsgi.errors': sys.stderr,
-            'wsgi.multithread': False,
-            'wsgi.multiprocess': False,
-            'wsgi.run_once': True,
-            'wsgi.async': False,
-        }
\ No newline at end of file
+    """
+    Create a WSGI environ dict from a Vercel event in one pass.
+
+    Handles base64 bodies (isBase64Encoded, or encoding: base64), query
+    strings given as strings or as mappings with list values, header names
+    in any case and repeated headers given as lists. CONTENT_TYPE and
+    CONTENT_LENGTH come from the headers and the decoded body, and
+    X-Forwarded-Proto/-For/-Host set wsgi.url_scheme, REMOTE_ADDR and
+    SERVER_NAME, since the function only ever sees the platform's proxy.
+
+    Raises:
+        ValueError: If the body is marked base64 but does not decode
+    """
+    if not isinstance(event, dict):
+        event = {}
+    path = event.get('path') or '/'
+    query_string = _query_string(event)
+    if '?' in path:
+        path, _, path_query = path.partition('?')
+        query_string = query_string or path_query
+    body, content_length = _body(event)
+
+    environ = {
+        'REQUEST_METHOD': (event.get('method') or event.get('httpMethod') or 'GET').upper(),
+        'SCRIPT_NAME': '',
+        'PATH_INFO': unquote(path, 'latin-1') if '%' in path else path,
+        'QUERY_STRING': query_string,
+        'CONTENT_TYPE': '',
+        'CONTENT_LENGTH': str(content_length),
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'REMOTE_ADDR': '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        # BytesIO shares a bytes body's buffer; a view is copied once, here
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': True,
+        'wsgi.async': False,
+    }
+
+    for name, value in (event.get('headers') or {}).items():
+        key = _ENVIRON_KEYS.get(name) or _environ_key(name)
+        if value.__class__ is list or value.__class__ is tuple:
+            value = _JOINERS.get(name.lower(), ', ').join(value)
+        if key:
+            environ[key] = value
+
+    # Behind the platform's proxy, the client and the original host and
+    # scheme are only known from the X-Forwarded-* headers
+    if 'HTTP_X_FORWARDED_PROTO' in environ:
+        environ['wsgi.url_scheme'] = _first(environ['HTTP_X_FORWARDED_PROTO']).lower()
+    if 'HTTP_X_FORWARDED_FOR' in environ:
+        environ['REMOTE_ADDR'] = _first(environ['HTTP_X_FORWARDED_FOR'])
+    host = environ.get('HTTP_X_FORWARDED_HOST') or environ.get('HTTP_HOST')
+    if host:
+        name, _, port = _first(host).rpartition(':')
+        if name and port.isdigit():
+            environ['SERVER_NAME'], environ['SERVER_PORT'] = name, port
+        else:
+            environ['SERVER_NAME'] = _first(host)
+            environ['SERVER_PORT'] = '443' if environ['wsgi.url_scheme'] == 'https' else '80'
+    return environ
@@ -3,4 +3,20 @@ if (typeof BASE_URL === 'undefined') {
     const BASE_URL = 'https://flask-vercel-deployment-ten.vercel.app';
     // Make BASE_URL available globally for other scripts
     window.BASE_URL = BASE_URL;
-}
\ No newline at end of file
+}
+
+// Data embedded by a server-rendered /dashboard (DASHBOARD_SSR): the same body
+// as GET /bootstrap. null when the page was served as a static file, in which
+// case the data is fetched from the API as before.
+window.initialDashboardData = (function () {
+    const element = document.getElementById('initial-data');
+    if (!element) {
+        return null;
+    }
+    try {
+        return JSON.parse(element.textContent);
+    } catch (error) {
+        console.error('Could not read the embedded dashboard data:', error);
+        return null;
+    }
+})();